@@ -1,46 +1,259 @@
 from time import time as now
 from random import random
+from collections import deque, OrderedDict
+from collections.abc import Sequence
+from itertools import count
+from contextlib import contextmanager
+import heapq
+import threading
+import struct
 import json
+import pickle
 
 from .__dependencies__ import file_system_py as FS
 from .__dependencies__.super_map import LazyDict
 from .__dependencies__.super_hash import super_hash
 
-# TODO:
-    # have each experiment be given their own pickle file
-
 # 
 # helpers
 # 
+# protocol 5 (python 3.8+) writes large buffers (ex: numpy arrays, bytearrays) straight from their memory into the file
+pickle_protocol = min(5, pickle.HIGHEST_PROTOCOL)
+
+# 
+# codecs
+# 
+# name => (magic bytes at the start of the file, module it needs)
+# every codec here can be appended to (a checkpoint adds one more compressed stream to the end of the file)
+codec_info = {
+    "none": (b"",                          None),
+    "zlib": (b"\x1f\x8b",                  "gzip"),
+    "lzma": (b"\xfd7zXZ\x00",              "lzma"),
+    "bz2":  (b"BZh",                       "bz2"),
+    "zstd": (b"\x28\xb5\x2f\xfd",          "zstandard"),
+    "lz4":  (b"\x04\x22\x4d\x18",          "lz4.frame"),
+}
+
+def available_codecs():
+    """
+    Example:
+        available_codecs() # ("none", "zlib", "lzma", "bz2") + ("zstd", "lz4") if those packages are installed
+    """
+    from importlib import import_module
+    return tuple(
+        each_codec for each_codec, (_, module_name) in codec_info.items()
+            if module_name is None or attempt(lambda: import_module(module_name), expected_errors=(ImportError,)) is not None
+    )
+
+def check_codec(codec):
+    codec = codec or "none"
+    if codec not in available_codecs():
+        raise Exception(f'''\n\nUnknown or unavailable codec: {repr(codec)}\nAvailable codecs are: {available_codecs()}\n(zstd needs `pip install zstandard`, lz4 needs `pip install lz4`)\n''')
+    return codec
+
+def check_pool(pool):
+    if pool not in ("threads", "processes"):
+        raise Exception(f'''\n\npool={repr(pool)} isn't supported, pool can be "threads" or "processes"\n''')
+    return pool
+
+def sniff_codec(file_path, offset=0):
+    with open(file_path, 'rb') as f_in:
+        f_in.seek(offset)
+        start = f_in.read(8)
+    for each_codec, (magic, _) in codec_info.items():
+        if magic and start.startswith(magic):
+            return each_codec
+    return "none"
+
+def codec_writer(codec, raw_file):
+    """
+    wraps an already-open binary file, closing the wrapper finishes the compressed stream (but leaves raw_file open)
+    """
+    from contextlib import nullcontext
+    if codec == "none":
+        return nullcontext(raw_file)
+    if codec == "zlib":
+        import gzip
+        return gzip.GzipFile(fileobj=raw_file, mode="wb")
+    if codec == "lzma":
+        import lzma
+        return lzma.LZMAFile(raw_file, mode="wb")
+    if codec == "bz2":
+        import bz2
+        return bz2.BZ2File(raw_file, mode="wb")
+    if codec == "zstd":
+        import zstandard
+        return zstandard.ZstdCompressor().stream_writer(raw_file, closefd=False)
+    if codec == "lz4":
+        import lz4.frame
+        return lz4.frame.LZ4FrameFile(raw_file, mode="wb")
+    check_codec(codec)
+
+def codec_reader(codec, raw_file):
+    """
+    wraps an already-open binary file, reads through every compressed stream in it (ex: one per checkpoint)
+    """
+    from contextlib import nullcontext
+    if codec == "none":
+        return nullcontext(raw_file)
+    if codec == "zlib":
+        import gzip
+        return gzip.GzipFile(fileobj=raw_file, mode="rb")
+    if codec == "lzma":
+        import lzma
+        return lzma.LZMAFile(raw_file, mode="rb")
+    if codec == "bz2":
+        import bz2
+        return bz2.BZ2File(raw_file, mode="rb")
+    if codec == "zstd":
+        import zstandard
+        return zstandard.ZstdDecompressor().stream_reader(raw_file, read_across_frames=True, closefd=False)
+    if codec == "lz4":
+        import lz4.frame
+        return lz4.frame.LZ4FrameFile(raw_file, mode="rb")
+    check_codec(codec)
+
 def large_pickle_load(file_path):
     """
     This is for loading really big python objects from pickle files
-    ~4Gb max value
+    the file is streamed into pickle.load (the whole file is never in memory as bytes)
+    compressed files are detected automatically
     """
-    import pickle
-    import os
-    max_bytes = 2**31 - 1
-    bytes_in = bytearray(0)
-    input_size = os.path.getsize(file_path)
-    with open(file_path, 'rb') as f_in:
-        for _ in range(0, input_size, max_bytes):
-            bytes_in += f_in.read(max_bytes)
-    output = pickle.loads(bytes_in)
-    return output
+    with open(file_path, 'rb') as raw_file:
+        with codec_reader(sniff_codec(file_path), raw_file) as f_in:
+            return pickle.load(f_in)
 
-def large_pickle_save(variable, file_path):
+def large_pickle_save(variable, file_path, codec=None):
     """
     This is for saving really big python objects into a file
     so that they can be loaded in later
-    ~4Gb max value
+    the pickle is streamed into the file (it never exists in memory as one big bytes object)
+    codec can be any of available_codecs()
+    """
+    import os
+    codec = check_codec(codec)
+    # write to a temp file first and then swap it in,
+    # so a crash mid-save leaves the old file (instead of no file, or half of one)
+    temp_path = f"{file_path}.{os.getpid()}.tmp"
+    FS.clear_a_path_for(temp_path, overwrite=True)
+    with open(temp_path, 'wb') as raw_file:
+        with codec_writer(codec, raw_file) as f_out:
+            pickle.dump(variable, f_out, protocol=pickle_protocol)
+        raw_file.flush()
+        os.fsync(raw_file.fileno())
+    if FS.is_folder(file_path):
+        FS.clear_a_path_for(file_path, overwrite=True)
+    os.replace(temp_path, file_path)
+
+def pickle_stream_load(file_path, offset=0, length=None):
+    """
+    loads every object from a file that had several pickles appended to it (ex: shards)
+    a truncated object at the end (ex: from a crash during an append) is ignored
+    offset/length => only that part of the file (ex: one experiment in a pack)
+    """
+    import io
+    with open(file_path, 'rb') as raw_file:
+        codec = sniff_codec(file_path, offset)
+        if length is not None:
+            raw_file.seek(offset)
+            raw_file = io.BytesIO(raw_file.read(length))
+        with codec_reader(codec, raw_file) as f_in:
+            while True:
+                try:
+                    yield pickle.load(f_in)
+                except (EOFError, pickle.UnpicklingError) as error:
+                    check_is_truncated_end(f_in, file_path, error)
+                    return
+
+def check_is_truncated_end(f_in, file_path, error):
+    """
+    (called when unpickling failed) only a cut-off object at the very end of the file is okay
+    bad data with more data after it is corruption, and ignoring it would silently drop everything after it
+    """
+    # (a cut-off compressed stream raises EOFError on any read)
+    if attempt(lambda: f_in.read(1), default=b"", expected_errors=(EOFError,)):
+        raise Exception(f'''\n\nThe file {file_path} is corrupt (unpickling failed with more data after it: {error})\n''') from error
+
+def pickle_session_load(file_path):
+    """
+    loads every object written by a single pickle.Pickler (ex: a journal)
+    later objects can be references to earlier ones, so they have to be loaded with a single Unpickler
+    a truncated object at the end is ignored
+    """
+    with open(file_path, 'rb') as f_in:
+        unpickler = pickle.Unpickler(f_in)
+        while True:
+            try:
+                yield unpickler.load()
+            except (EOFError, pickle.UnpicklingError) as error:
+                check_is_truncated_end(f_in, file_path, error)
+                return
+
+def pickle_stream_append(variable, file_path, codec=None):
+    """
+    appends one more pickle to the end of a file (creating it if needed)
+    codec is only used for new files, appending always uses the codec the file already has
+    """
+    import os
+    FS.ensure_is_folder(FS.parent_folder(file_path))
+    if FS.is_file(file_path) and os.path.getsize(file_path) > 0:
+        codec = sniff_codec(file_path)
+    codec = check_codec(codec)
+    with open(file_path, 'ab') as raw_file:
+        with codec_writer(codec, raw_file) as f_out:
+            pickle.dump(variable, f_out, protocol=pickle_protocol)
+        raw_file.flush()
+        os.fsync(raw_file.fileno())
+    return codec
+
+class FileLock:
+    """
+    Example:
+        with FileLock("some_folder/collection.lock"):
+            # only one process at a time gets here
+            pass
+        
+        lock = FileLock("some_folder/writer.lock")
+        if lock.acquire(blocking=False):
+            pass # nobody else is holding it
+    Note:
+        the lock belongs to the open file, so the operating system releases it when the process dies
+        (it doesn't nest, acquiring the same path twice in one process waits on itself)
     """
-    import pickle
-    bytes_out = pickle.dumps(variable, protocol=4)
-    max_bytes = 2**31 - 1
-    FS.clear_a_path_for(file_path, overwrite=True)
-    with open(file_path, 'wb') as f_out:
-        for idx in range(0, len(bytes_out), max_bytes):
-            f_out.write(bytes_out[idx:idx+max_bytes])
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+    
+    def acquire(self, blocking=True):
+        FS.ensure_is_folder(FS.parent_folder(self.path))
+        self.file = open(self.path, 'a+')
+        try:
+            try:
+                import fcntl
+                fcntl.flock(self.file.fileno(), fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except ImportError as error:
+                import msvcrt
+                msvcrt.locking(self.file.fileno(), msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+        except OSError as error:
+            self.file.close()
+            self.file = None
+            if blocking:
+                raise error
+            return False
+        return True
+    
+    def release(self):
+        if self.file is not None:
+            # closing the file releases the lock
+            self.file.close()
+            self.file = None
+    
+    def __enter__(self):
+        self.acquire()
+        return self
+    
+    def __exit__(self, _, error, traceback):
+        self.release()
 
 # save loading times without brittle code
 def attempt(a_lambda, default=None, expected_errors=(Exception,)):
@@ -52,6 +265,641 @@ def attempt(a_lambda, default=None, expected_errors=(Exception,)):
 def indent(string):
     return string.replace("\n", "\n    ")
 
+def first(a_tuple):
+    return a_tuple[0]
+
+def matches(value, condition):
+    """
+    Examples:
+        matches(3, 3)                      # => True
+        matches(3, lambda value: value > 5) # => False
+    """
+    if callable(condition):
+        return condition(value)
+    return value == condition
+
+class PerThreadCommits:
+    """
+    The per-thread state of a RecordKeeper().thread_safe()
+    - each thread gets its own pending record
+    - each thread appends (commit_number, record) to its own buffer
+      (the number is taken and appended under the lock, so a buffer never has a number that an earlier flush skipped)
+    - once any buffer reaches batch_size, every buffer is drained (under the lock)
+      and merged by commit_number, so records enter the keeper in commit order (across all threads)
+    """
+    def __init__(self, batch_size):
+        self.batch_size     = batch_size
+        self.lock           = threading.RLock()
+        self.local          = threading.local()
+        self.buffers        = []
+        self.commit_counter = count()
+    
+    def pending_record(self, keeper):
+        pending_record = getattr(self.local, "pending_record", None)
+        if pending_record is None:
+            pending_record = self.local.pending_record = AncestorDict(ancestors=keeper.local_data_lineage)
+        return pending_record
+    
+    def buffer(self):
+        buffer = getattr(self.local, "buffer", None)
+        if buffer is None:
+            buffer = self.local.buffer = deque()
+            with self.lock:
+                self.buffers.append((threading.current_thread(), buffer))
+        return buffer
+    
+    def commit(self, record, store):
+        buffer = self.buffer()
+        with self.lock:
+            buffer.append((next(self.commit_counter), record))
+        if len(buffer) >= self.batch_size:
+            self.flush(store)
+    
+    def flush(self, store):
+        with self.lock:
+            batches = []
+            still_active = []
+            for each_thread, each_buffer in self.buffers:
+                # only take what is there right now (other threads may still be appending)
+                batches.append([ each_buffer.popleft() for _ in range(len(each_buffer)) ])
+                if each_thread.is_alive() or len(each_buffer) > 0:
+                    still_active.append((each_thread, each_buffer))
+            self.buffers = still_active
+            for _, each_record in heapq.merge(*batches, key=first):
+                store(each_record)
+
+shared_memory_formats = { int: "q", float: "d", bool: "?" }
+
+def shared_memory_reader(recorder_reference, poll_seconds=0.001, max_poll_seconds=0.05):
+    """
+    (the parent's background thread of a SharedMemoryRecorder, see .read_ring())
+    it only has a weak reference, so the recorder can still be garbage collected
+    """
+    import time
+    wait = poll_seconds
+    while True:
+        recorder = recorder_reference()
+        if recorder is None or recorder.closed:
+            return
+        number_moved = recorder.read_ring(minimum=recorder.capacity // 2)
+        del recorder
+        wait = poll_seconds if number_moved else min(wait * 2, max_poll_seconds)
+        time.sleep(wait)
+
+class SharedMemoryRecorder:
+    """
+    Examples:
+        # parent process
+        record_keeper = RecordKeeper(experiment=1)
+        shared_recorder = record_keeper.shared_memory_recorder(dict(index=int, loss=float, name="16s"))
+        
+        # child process (the shared_recorder can be passed to multiprocessing.Process as an argument)
+        shared_recorder.push(index=1, loss=0.5, name="cartpole")
+        
+        # parent process
+        process.join()
+        len(record_keeper) # record_keeper.flush() (which is called by len/iter/save) drains the ring buffer
+        shared_recorder.close() # (or record_keeper.close_shared_memory(), saving an experiment does that for its record keepers)
+    Note:
+        - each record is a fixed-size struct in a multiprocessing.shared_memory ring buffer (no pickling, no pipes)
+        - one writer process per shared_recorder (make one shared_recorder per child process)
+        - schema values are int, float, bool, or a struct format code (ex: "16s" for strings up to 16 bytes of utf-8)
+        - keys not given to .push() come back as None
+        - when the ring buffer is half full, a thread in the parent moves the records out of it (until .drain() puts them in the record_keeper)
+          if the ring buffer is still full, .push() waits
+    """
+    header = struct.Struct("<QQ") # number_written, number_read
+    
+    def __init__(self, schema, capacity=65536, record_keeper=None):
+        try:
+            from multiprocessing import shared_memory
+        except ImportError as error:
+            raise Exception(f'''\n\nSharedMemoryRecorder() needs multiprocessing.shared_memory (python 3.8 or newer)\n''')
+        
+        if len(schema) > 64:
+            raise Exception(f'''\n\nSharedMemoryRecorder() supports at most 64 keys, but the schema had {len(schema)}\n''')
+        formats = []
+        for each_key, each_value in schema.items():
+            each_format = shared_memory_formats.get(each_value, each_value)
+            if not isinstance(each_format, str):
+                raise Exception(f'''\n\nSharedMemoryRecorder() schema values need to be int, float, bool, or a struct format code\nbut the value for {repr(each_key)} was: {each_value}\n''')
+            formats.append(each_format)
+        self.keys           = tuple(schema.keys())
+        self.formats        = tuple(formats)
+        self.capacity       = capacity
+        self.record_keeper  = record_keeper
+        self.is_owner       = True
+        self.record_struct  = struct.Struct("<Q"+"".join(self.formats)) # first value is a bitmask of which keys are present
+        self.text_sizes     = self.text_sizes_of(self.formats)
+        self.memory         = shared_memory.SharedMemory(create=True, size=self.header.size + capacity * self.record_struct.size)
+        self.number_written = 0
+        self.number_read    = 0
+        self.closed         = False
+        self._read_records  = [] # records the reader thread moved out of the ring buffer (until .drain())
+        self._lock          = threading.Lock()
+        self.header.pack_into(self.memory.buf, 0, 0, 0)
+        import weakref
+        self._reader = threading.Thread(target=shared_memory_reader, args=(weakref.ref(self),), daemon=True)
+        self._reader.start()
+    
+    @staticmethod
+    def text_sizes_of(formats):
+        """
+        how many bytes a string can have, None for keys that aren't strings
+        """
+        return tuple(
+            (struct.calcsize(each) - (1 if each.endswith("p") else 0) if each.endswith(("s", "p")) else None) for each in formats
+        )
+    
+    @property
+    def _empty_values(self):
+        return tuple(
+            (b"" if each.endswith(("s", "p")) else (False if each == "?" else 0)) for each in self.formats
+        )
+    
+    def push(self, data=None, **kwargs):
+        data = { **(data or {}), **kwargs }
+        values = list(self._empty_values)
+        present = 0
+        for index, each_key in enumerate(self.keys):
+            each_value = data.get(each_key, None)
+            if each_value is not None:
+                if isinstance(each_value, str):
+                    each_value = each_value.encode('utf-8')
+                    # (cutting it off could split a character, then it couldn't be decoded)
+                    if self.text_sizes[index] is not None and len(each_value) > self.text_sizes[index]:
+                        raise Exception(f'''\n\nSharedMemoryRecorder.push(): {repr(each_key)} is {len(each_value)} bytes of utf-8, but its schema ({repr(self.formats[index])}) only has room for {self.text_sizes[index]}\nvalue: {repr(data[each_key])}\n''')
+                values[index] = each_value
+                present |= 1 << index
+        
+        # wait for the reader if the ring buffer is full
+        buffer = self.memory.buf
+        capacity = self.capacity
+        while self.number_written - self.header.unpack_from(buffer, 0)[1] >= capacity:
+            from time import sleep
+            sleep(0.0005)
+        
+        slot = self.number_written % capacity
+        self.record_struct.pack_into(buffer, self.header.size + slot * self.record_struct.size, present, *values)
+        # only publish the record after its bytes are written
+        self.number_written += 1
+        struct.pack_into("<Q", buffer, 0, self.number_written)
+        return self
+    
+    def drain(self):
+        """
+        returns the records written since the last drain (and pushes them into the record_keeper, if there is one)
+        """
+        self.read_ring()
+        with self._lock:
+            records, self._read_records = self._read_records, []
+        if self.record_keeper is not None:
+            for each_record in records:
+                self.record_keeper.push(each_record)
+        return records
+    
+    def read_ring(self, minimum=1):
+        """
+        moves the records out of the ring buffer (if there are at least minimum of them), returns how many were moved
+        (they're kept until .drain(), so only the thread that calls .drain() touches the record_keeper)
+        """
+        with self._lock:
+            if self.closed:
+                return 0
+            buffer = self.memory.buf
+            number_written = self.header.unpack_from(buffer, 0)[0]
+            if number_written - self.number_read < minimum:
+                return 0
+            capacity = self.capacity
+            record_size = self.record_struct.size
+            offset = self.header.size
+            keys = self.keys
+            is_text = tuple(each.endswith(("s", "p")) for each in self.formats)
+            records = self._read_records
+            for each_number in range(self.number_read, number_written):
+                present, *values = self.record_struct.unpack_from(buffer, offset + (each_number % capacity) * record_size)
+                record = {}
+                for index, each_key in enumerate(keys):
+                    if present & (1 << index):
+                        each_value = values[index]
+                        if is_text[index]:
+                            each_value = each_value.rstrip(b"\x00").decode('utf-8')
+                        record[each_key] = each_value
+                    else:
+                        record[each_key] = None
+                records.append(record)
+            # only free up the slots after they've been read
+            number_moved = number_written - self.number_read
+            self.number_read = number_written
+            struct.pack_into("<Q", buffer, 8, number_written)
+            return number_moved
+    
+    def close(self):
+        """
+        frees the shared memory (in the parent, the records still in it are kept until .drain())
+        """
+        if self.closed:
+            return
+        if self.is_owner:
+            self.read_ring()
+        with self._lock:
+            self.closed = True
+            self.memory.close()
+            if self.is_owner:
+                attempt(lambda: self.memory.unlink(), expected_errors=(FileNotFoundError,))
+    
+    def __del__(self):
+        attempt(lambda: self.close())
+    
+    def __getstate__(self):
+        return (self.memory.name, self.keys, self.formats, self.capacity)
+    
+    def __setstate__(self, state):
+        from multiprocessing import shared_memory
+        name, self.keys, self.formats, self.capacity = state
+        try:
+            # python 3.13+ can skip the resource tracker (only the owner should unlink)
+            self.memory = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError as error:
+            self.memory = shared_memory.SharedMemory(name=name)
+        self.record_keeper = None
+        self.is_owner      = False
+        self.closed        = False
+        self._read_records = []
+        self._lock         = threading.Lock()
+        self.record_struct = struct.Struct("<Q"+"".join(self.formats))
+        self.text_sizes    = self.text_sizes_of(self.formats)
+        self.number_written, self.number_read = self.header.unpack_from(self.memory.buf, 0)
+
+# 
+# retention policies
+# 
+class EveryNth:
+    """
+    Examples:
+        record_keeper.retain(EveryNth(10)) # keeps commit 0, 10, 20, ...
+    """
+    def __init__(self, n, offset=0):
+        self.n = n
+        self.offset = offset
+        self.number_seen = 0
+    
+    def decide(self, record):
+        number = self.number_seen
+        self.number_seen += 1
+        return number % self.n == self.offset % self.n
+
+class LogSpaced:
+    """
+    Examples:
+        record_keeper.retain(LogSpaced(growth=2)) # keeps commit 0, 1, 2, 4, 8, 16, ...
+        record_keeper.retain(LogSpaced(growth=1.1)) # denser, still logarithmic
+    """
+    def __init__(self, growth=2):
+        if growth <= 1:
+            raise Exception(f'''\n\nLogSpaced(growth) needs growth > 1, but got: {growth}\n''')
+        self.growth = growth
+        self.number_seen = 0
+        self.next_number = 0
+    
+    def decide(self, record):
+        number = self.number_seen
+        self.number_seen += 1
+        if number >= self.next_number:
+            self.next_number = max(number + 1, number * self.growth)
+            return True
+        return False
+
+class KeepWhere:
+    """
+    Examples:
+        record_keeper.retain(KeepWhere(lambda record: record["loss"] > 10))
+    """
+    def __init__(self, predicate):
+        self.predicate = predicate
+    
+    def decide(self, record):
+        return bool(self.predicate(record))
+
+class Reservoir:
+    """
+    Examples:
+        record_keeper.retain(Reservoir(1000)) # a uniform random sample of 1000 records
+    Note:
+        the sample is taken over the records that haven't been saved yet
+        (records already saved to disk by an ExperimentCollection are never replaced)
+    """
+    replaces = True # .decide() can return the slot of a previously kept record
+    
+    def __init__(self, size, seed=None):
+        from random import Random
+        self.size = size
+        self.number_seen = 0
+        self.random = Random(seed)
+    
+    def decide(self, record):
+        number = self.number_seen
+        self.number_seen += 1
+        if number < self.size:
+            return True
+        slot = self.random.randint(0, number)
+        if slot < self.size:
+            # replace the record in that slot
+            return slot
+        return False
+
+# (these are for whole experiments, see ExperimentCollection.retain())
+class KeepLastErrorRuns:
+    """
+    Examples:
+        collection.retain(KeepLastErrorRuns(10)) # only the 10 most recent runs that had an error are kept
+    """
+    def __init__(self, n):
+        self.n = n
+    
+    def expired(self, entries):
+        error_runs = [ each for each in entries if each.get("had_error", False) ]
+        return error_runs[:max(len(error_runs) - self.n, 0)]
+
+class KeepOnlySuccessfulAfter:
+    """
+    Examples:
+        collection.retain(KeepOnlySuccessfulAfter(days=30)) # runs that had an error are deleted once they're 30 days old
+    """
+    def __init__(self, days=0, seconds=0):
+        self.seconds = days * 24 * 60 * 60 + seconds
+    
+    def expired(self, entries):
+        cutoff = now() - self.seconds
+        return [
+            each for each in entries
+                if each.get("had_error", False) and (each.get("experiment_end_time", None) or each.get("experiment_start_time", None) or 0) < cutoff
+        ]
+
+# 
+# sketches
+#
+class QuantileSketch:
+    """
+    Examples:
+        sketch = QuantileSketch()
+        for each in range(1_000_000):
+            sketch.add(random())
+        sketch.quantile(0.5)  # ~0.5
+        sketch.quantile(0.99) # ~0.99
+        sketch.merge(another_quantile_sketch)
+    Note:
+        this is a KLL-style sketch: memory stays around 3*k values no matter how many values are added
+        (larger k => more accurate)
+    """
+    def __init__(self, k=200):
+        self.k      = k
+        self.levels = [[]] # values in levels[n] each stand for 2**n of the added values
+        self.count  = 0
+        self.min    = None
+        self.max    = None
+    
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, int(self.k * (2/3)**depth))
+    
+    def _compress(self):
+        for level, items in enumerate(self.levels):
+            if len(items) >= self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append([])
+                items.sort()
+                # keep one value behind if there's an odd number (so the total weight stays exact)
+                leftover = [ items.pop() ] if len(items) % 2 else []
+                offset = 1 if random() < 0.5 else 0
+                self.levels[level+1].extend(items[offset::2])
+                self.levels[level] = leftover
+    
+    def add(self, value):
+        if value is None:
+            return self
+        self.levels[0].append(value)
+        self.count += 1
+        if self.min is None or value < self.min: self.min = value
+        if self.max is None or value > self.max: self.max = value
+        if len(self.levels[0]) >= self._capacity(0):
+            self._compress()
+        return self
+    
+    def merge(self, other):
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        for level, items in enumerate(other.levels):
+            self.levels[level].extend(items)
+        self.count += other.count
+        if other.min is not None and (self.min is None or other.min < self.min): self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max): self.max = other.max
+        while any(len(items) >= self._capacity(level) for level, items in enumerate(self.levels)):
+            self._compress()
+        return self
+    
+    def quantile(self, fraction):
+        if self.count == 0:
+            return None
+        if fraction <= 0:
+            return self.min
+        if fraction >= 1:
+            return self.max
+        weighted_values = sorted(
+            (each_value, 2**level)
+                for level, items in enumerate(self.levels)
+                    for each_value in items
+        )
+        total_weight = sum(weight for _, weight in weighted_values)
+        target = fraction * total_weight
+        running_weight = 0
+        for each_value, weight in weighted_values:
+            running_weight += weight
+            if running_weight >= target:
+                return each_value
+        return self.max
+    
+    def quantiles(self, fractions):
+        return [ self.quantile(each) for each in fractions ]
+    
+    @property
+    def median(self):
+        return self.quantile(0.5)
+    
+    def __len__(self):
+        return self.count
+    
+    def __repr__(self):
+        return f"QuantileSketch(count={self.count}, min={self.min}, median={self.median}, max={self.max})"
+
+class HistogramSketch:
+    """
+    Examples:
+        sketch = HistogramSketch(low=0, high=1, bins=20)
+        sketch.add(0.5)
+        sketch.counts    # how many values landed in each bin
+        sketch.edges     # the bin edges
+        sketch.quantile(0.99) # estimated by interpolating inside the bin
+        sketch.merge(another_histogram_sketch) # needs the same low/high/bins
+    Note:
+        values outside of low/high are counted in .underflow/.overflow
+    """
+    def __init__(self, low, high, bins=20):
+        self.low       = low
+        self.high      = high
+        self.bins      = bins
+        self.counts    = [0]*bins
+        self.underflow = 0
+        self.overflow  = 0
+        self.count     = 0
+        self.min       = None
+        self.max       = None
+    
+    @property
+    def edges(self):
+        width = (self.high - self.low) / self.bins
+        return [ self.low + width*index for index in range(self.bins+1) ]
+    
+    def add(self, value):
+        if value is None:
+            return self
+        self.count += 1
+        if self.min is None or value < self.min: self.min = value
+        if self.max is None or value > self.max: self.max = value
+        if value < self.low:
+            self.underflow += 1
+        elif value > self.high:
+            self.overflow += 1
+        else:
+            index = int((value - self.low) / (self.high - self.low) * self.bins)
+            self.counts[min(index, self.bins-1)] += 1
+        return self
+    
+    def merge(self, other):
+        if (self.low, self.high, self.bins) != (other.low, other.high, other.bins):
+            raise Exception(f'''\n\nHistogramSketch.merge() needs both histograms to have the same low/high/bins\nbut got {(self.low, self.high, self.bins)} and {(other.low, other.high, other.bins)}\n''')
+        self.counts     = [ a + b for a, b in zip(self.counts, other.counts) ]
+        self.underflow += other.underflow
+        self.overflow  += other.overflow
+        self.count     += other.count
+        if other.min is not None and (self.min is None or other.min < self.min): self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max): self.max = other.max
+        return self
+    
+    def quantile(self, fraction):
+        if self.count == 0:
+            return None
+        target = fraction * self.count
+        running_count = self.underflow
+        if running_count >= target:
+            return self.min
+        edges = self.edges
+        for index, each_count in enumerate(self.counts):
+            if each_count and running_count + each_count >= target:
+                inside_fraction = (target - running_count) / each_count
+                return edges[index] + inside_fraction * (edges[index+1] - edges[index])
+            running_count += each_count
+        return self.max
+    
+    def quantiles(self, fractions):
+        return [ self.quantile(each) for each in fractions ]
+    
+    @property
+    def median(self):
+        return self.quantile(0.5)
+    
+    def __len__(self):
+        return self.count
+    
+    def __repr__(self):
+        return f"HistogramSketch(low={self.low}, high={self.high}, bins={self.bins}, count={self.count})"
+
+class Rollup:
+    """
+    Examples:
+        rollup = Rollup()
+        rollup.add(1).add(3)
+        rollup.count, rollup.sum, rollup.min, rollup.max, rollup.mean # => 2, 4, 1, 3, 2.0
+        rollup.merge(another_rollup)
+    """
+    def __init__(self):
+        self.count = 0
+        self.sum   = 0
+        self.min   = None
+        self.max   = None
+    
+    def add(self, value):
+        self.count += 1
+        self.sum   += value
+        if self.min is None or value < self.min: self.min = value
+        if self.max is None or value > self.max: self.max = value
+        return self
+    
+    def merge(self, other):
+        self.count += other.count
+        self.sum   += other.sum
+        if other.min is not None and (self.min is None or other.min < self.min): self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max): self.max = other.max
+        return self
+    
+    @property
+    def mean(self):
+        if self.count == 0:
+            return None
+        return self.sum / self.count
+    
+    def __repr__(self):
+        return f"Rollup(count={self.count}, sum={self.sum}, min={self.min}, max={self.max}, mean={self.mean})"
+
+# ancestors are shared by keepers that can be in different threads (ex: several .thread_safe() keepers with one parent)
+aggregates_lock = threading.Lock()
+
+def update_aggregates(keeper, values):
+    from numbers import Real
+    with aggregates_lock:
+        # sketches: every keeper in the lineage that has a sketch for a key gets the value
+        lineage = []
+        has_rollups = False
+        while keeper is not None:
+            sketches = keeper.sketches
+            if sketches:
+                for each_key, each_sketch in sketches.items():
+                    each_value = values.get(each_key, None)
+                    if each_value is not None:
+                        each_sketch.add(each_value)
+            if keeper.rollup_keys:
+                has_rollups = True
+            lineage.append(keeper)
+            keeper = keeper.parent
+    
+        # rollups: every keeper in the lineage keeps a rollup for the keys declared on it or on any of its ancestors
+        if has_rollups:
+            inherited_keys = set()
+            for each_keeper in reversed(lineage):
+                inherited_keys.update(each_keeper.rollup_keys)
+                rollups = each_keeper.rollups
+                for each_key in inherited_keys:
+                    each_value = values.get(each_key, None)
+                    if isinstance(each_value, Real):
+                        if each_key not in rollups:
+                            rollups[each_key] = Rollup()
+                        rollups[each_key].add(each_value)
+
+def merge_sketches(sketch_dicts):
+    """
+    Examples:
+        merge_sketches([ record_keeper1.sketches, record_keeper2.sketches ]) # => { "loss": QuantileSketch(...) }
+    """
+    from copy import deepcopy
+    merged = {}
+    for each_sketches in sketch_dicts:
+        for each_key, each_sketch in each_sketches.items():
+            if each_key in merged:
+                merged[each_key].merge(each_sketch)
+            else:
+                merged[each_key] = deepcopy(each_sketch)
+    return merged
+
 # 
 # 
 # Main code
@@ -178,6 +1026,51 @@ class AncestorDict(dict):
         
         return the_copy
 
+class NodeParents:
+    """
+    the parents of records loaded from a shard (see LazyAncestorDict)
+    they're only looked up in the node table (see ShardStorage.node()) the first time they're needed
+    """
+    __slots__ = ("node_ids", "storage", "final_info", "resolved")
+    
+    def __init__(self, node_ids, storage=None, resolved=None):
+        self.node_ids   = node_ids
+        self.storage    = storage
+        self.final_info = None # see settle_experiment_info()
+        self.resolved   = resolved
+    
+    def resolve(self):
+        if self.resolved is None:
+            ancestors = tuple(self.storage.node(each) for each in self.node_ids)
+            if self.final_info:
+                settle_ancestors(ancestors, self.final_info)
+            self.resolved = ancestors
+        return self.resolved
+
+def ancestor_dict(itself, ancestors):
+    return AncestorDict(ancestors=ancestors, itself=itself)
+
+class LazyAncestorDict(AncestorDict):
+    """
+    a record loaded from disk, its parent data is only looked up when a key that isn't in the record itself is read
+    (ex: record["index"] never touches the parents, record["experiment_number"] does)
+    """
+    def __init__(self, *, parents, itself):
+        self.parents = parents
+        self.itself  = itself
+    
+    @property
+    def ancestors(self):
+        return self.parents.resolve()
+    
+    @ancestors.setter
+    def ancestors(self, value):
+        self.parents = NodeParents(None, resolved=value)
+    
+    def __reduce__(self):
+        # (saved as a regular AncestorDict)
+        return (ancestor_dict, (self.itself, self.ancestors))
+
 class AncestorMask(dict):
     def __init__(self, *, ancestors, index, frame):
         self.ancestors = ancestors
@@ -341,6 +1234,11 @@ class Recorder():
         self.frame          = {}
         self.parent         = None
         self.pending_record = {None:None}
+        self._retention     = None
+        self._retained_rows = []
+        self.sketches       = {}
+        self.rollups        = {}
+        self.rollup_keys    = ()
     
     def set_parent(self, parent):
         self.parent = parent
@@ -406,11 +1304,34 @@ class Recorder():
         return full_value
     
     def push(self, data=None, **kwargs):
-        self.length += 1
         pending_record = self.pending_record
         pending_record.update(data or {})
         pending_record.update(kwargs)
+        # sketches/rollups see every record (even ones the retention policy drops)
+        update_aggregates(self, pending_record)
         
+        retention = self._retention
+        if retention is not None:
+            decision = retention.decide(pending_record)
+            if decision is False:
+                self.pending_record = {None:None}
+                return self
+            if decision is not True:
+                # overwrite the row of a previously kept record
+                row_index = self._retained_rows[decision]
+                frame = self.frame
+                for each_key, each_value in frame.items():
+                    each_value[row_index] = pending_record.get(each_key, None)
+                for each_key, each_value in pending_record.items():
+                    if each_key not in frame:
+                        frame[each_key] = [None]*self.length
+                        frame[each_key][row_index] = each_value
+                self.pending_record = {None:None}
+                return self
+            if getattr(retention, "replaces", False):
+                self._retained_rows.append(self.length)
+        
+        self.length += 1
         frame = self.frame
         # extend everything down by 1
         for each_key, each_value in self.frame.items():
@@ -434,6 +1355,48 @@ class Recorder():
     def commit(self):
         return self.push()
     
+    def retain(self, policy):
+        """
+        Examples:
+            recorder.retain(EveryNth(10))
+            recorder.retain(Reservoir(1000))
+            recorder.retain(LogSpaced(growth=2))
+            recorder.retain(KeepWhere(lambda record: record["loss"] > 10))
+            recorder.retain(None) # keep everything again
+        Note:
+            the policy decides at push/commit time, so dropped records never get stored
+            (give each recorder its own policy object, the policy keeps count of the records it has seen)
+        """
+        self._retention     = policy
+        self._retained_rows = []
+        return self
+    
+    def sketch(self, key, sketch=None):
+        """
+        Examples:
+            recorder.sketch("loss") # QuantileSketch by default
+            recorder.sketch("latency", HistogramSketch(low=0, high=1, bins=50))
+            ...
+            recorder.sketches["loss"].quantile(0.99)
+        Note:
+            a sketch sees every push of this recorder and of all its sub-recorders
+        """
+        self.sketches[key] = sketch if sketch is not None else QuantileSketch()
+        return self
+    
+    def rollup(self, *keys):
+        """
+        Examples:
+            recorder.rollup("loss", "reward")
+            ...
+            recorder.rollups["loss"].mean # count/sum/min/max/mean of every push under this recorder
+            sub_recorder.rollups["loss"].mean # sub-recorders keep their own (subtree) rollup of the same keys
+        """
+        self.rollup_keys = tuple(self.rollup_keys) + tuple(each for each in keys if each not in self.rollup_keys)
+        for each_key in keys:
+            self.rollups.setdefault(each_key, Rollup())
+        return self
+    
     def swap_out(self, old_record_keeper, new_record_keeper):
         next_keeper = self
         while isinstance(next_keeper.parent, RecordKeeper):
@@ -526,14 +1489,22 @@ class Recorder():
         return self.local_data.values(*args, **kwargs)
     
     def __getstate__(self):
-        return (self.parent, self.local_data, self.sub_recorders, self.pending_record, self.frame, self.length)
+        return (self.parent, self.local_data, self.sub_recorders, self.pending_record, self.frame, self.length, (self.sketches, self.rollups, self.rollup_keys))
     
     def __setstate__(self, state):
-        self.parent, self.local_data, self.sub_recorders, self.pending_record, self.frame, self.length = state
+        self.parent, self.local_data, self.sub_recorders, self.pending_record, self.frame, self.length, *optional = state
+        self.sketches, self.rollups, self.rollup_keys = optional[0] if optional else ({}, {}, ())
         self._collection = None
+        self._retention = None
+        self._retained_rows = []
 
-    def save_to(self, path):
-        large_pickle_save(self, path)
+    def save_to(self, path, codec=None):
+        """
+        Example:
+            recorder.save_to("recorder.pickle")
+            recorder.save_to("recorder.pickle.xz", codec="lzma") # see available_codecs(), loading detects the codec
+        """
+        large_pickle_save(self, path, codec=codec)
 
 class RecordKeeper():
     @classmethod
@@ -557,6 +1528,13 @@ class RecordKeeper():
         self.collection_id      = None
         self._collection        = None
         self._live_files        = []
+        self._threads           = None
+        self._shared_recorders  = []
+        self._retention         = None
+        self._retained_slots    = []
+        self.sketches           = {}
+        self.rollups            = {}
+        self.rollup_keys        = ()
         
         # load local data
         if len(args) == 1:
@@ -586,7 +1564,8 @@ class RecordKeeper():
     
     @property
     def collection(self):
-        if self._collection:
+        # (not a truthiness check, that would call len() on the collection)
+        if self._collection is not None:
             return self._collection
         
         if self.collection_id is not None:
@@ -605,6 +1584,7 @@ class RecordKeeper():
     
     @property
     def records(self):
+        self.flush()
         if self.collection is None:
             return self.local_records
         else:
@@ -618,6 +1598,7 @@ class RecordKeeper():
     
     @property
     def all_records(self):
+        self.flush()
         for each in self.local_records:
             yield each
         for each_sub_record_keeper in self.sub_record_keepers:
@@ -635,53 +1616,182 @@ class RecordKeeper():
         if len(args) > 0:
             data = args[0]
         data.update(kwargs)
-        self.pending_record.update(data)
+        if self._threads is None:
+            self.pending_record.update(data)
+        else:
+            self._threads.pending_record(self).update(data)
         return self
 
     def commit(self,*, additional_info=None):
+        threads = self._threads
+        pending_record = self.pending_record if threads is None else threads.pending_record(self)
         # finalize the record
         if isinstance(additional_info, dict): 
-            self.pending_record.update(additional_info)
+            pending_record.update(additional_info)
         # make sure the ancestors are the most up-to-date (swap_out can cause them to change since init)
         local_lineage = self.local_data_lineage
-        self.pending_record.ancestors = local_lineage
+        pending_record.ancestors = local_lineage
+        if threads is None:
+            self._store(pending_record)
+            # start a new clean record
+            self.pending_record = AncestorDict(ancestors=local_lineage)
+        else:
+            threads.local.pending_record = AncestorDict(ancestors=local_lineage)
+            threads.commit(pending_record, self._store)
+        # return the record (AncestorDict) that was just committed
+        return pending_record
+    
+    def _store(self, record):
+        # sketches/rollups see every record (even ones the retention policy drops)
+        update_aggregates(self, record.itself)
+        retention = self._retention
+        if retention is not None:
+            decision = retention.decide(record)
+            if decision is False:
+                return
+            if decision is not True:
+                container, index, previous = self._retained_slots[decision]
+                # only pending records can be replaced (not ones that were already saved)
+                if index < len(container) and container[index] is previous:
+                    container[index] = record
+                    self._retained_slots[decision] = (container, index, record)
+                    for each in self._live_files:
+                        each.write("- "+json.dumps(record.itself)+"\n")
+                        each.flush()
+                    return
+            if getattr(retention, "replaces", False):
+                container = self.local_records if self.collection is None else self.collection._new_records
+                slot = (container, len(container), record)
+                if decision is True:
+                    self._retained_slots.append(slot)
+                else:
+                    self._retained_slots[decision] = slot
+        
         # save different depending on if part of a collection or not
-        output = self.pending_record
         if self.collection is not None:
-            self.collection.add_record(self.pending_record)
+            self.collection.add_record(record)
         else:
-            self.local_records.append(self.pending_record)
+            self.local_records.append(record)
         
         for each in self._live_files:
-            each.write("- "+json.dumps(self.pending_record.itself)+"\n")
+            each.write("- "+json.dumps(record.itself)+"\n")
             each.flush()
-        
-        # start a new clean record
-        self.pending_record = AncestorDict(ancestors=local_lineage)
-        # return the record (AncestorDict) that was just committed
-        return output
     
-    def swap_out(self, old_record_keeper, new_record_keeper):
-        next_keeper = self
-        while isinstance(next_keeper.parent, RecordKeeper):
-            if id(next_keeper.parent) == id(old_record_keeper):
-                next_keeper.parent = new_record_keeper
-                return True
-            # TODO: add infinte loop check (like if next_keeper.parent == next_keeper) 
-            next_keeper = next_keeper.parent
+    def retain(self, policy):
+        """
+        Examples:
+            record_keeper.retain(EveryNth(10))
+            record_keeper.retain(Reservoir(1000))
+            record_keeper.retain(LogSpaced(growth=2))
+            record_keeper.retain(KeepWhere(lambda record: record["loss"] > 10))
+            record_keeper.retain(None) # keep everything again
+        Note:
+            the policy decides at commit time, so dropped records are never stored or live-written
+            (give each record keeper its own policy object, the policy keeps count of the records it has seen)
+        """
+        self._retention      = policy
+        self._retained_slots = []
+        return self
     
-    @property
-    def number_of_records(self):
-        return len(self)
+    def sketch(self, key, sketch=None):
+        """
+        Examples:
+            record_keeper.sketch("loss") # QuantileSketch by default
+            record_keeper.sketch("latency", HistogramSketch(low=0, high=1, bins=50))
+            ...
+            record_keeper.sketches["loss"].quantile(0.99)
+        Note:
+            a sketch sees every commit of this keeper and of all its sub-keepers
+        """
+        self.sketches[key] = sketch if sketch is not None else QuantileSketch()
+        return self
     
-    def SubRecordKeeper(self, **kwargs):
-        return RecordKeeper(kwargs).set_parent(self)
+    def rollup(self, *keys):
+        """
+        Examples:
+            experiment_recorder.rollup("loss", "reward")
+            ...
+            experiment_recorder.rollups["loss"].mean # count/sum/min/max/mean of every commit under this keeper
+            model_recorder.rollups["loss"].mean      # sub-keepers keep their own (subtree) rollup of the same keys
+        """
+        self.rollup_keys = tuple(self.rollup_keys) + tuple(each for each in keys if each not in self.rollup_keys)
+        for each_key in keys:
+            self.rollups.setdefault(each_key, Rollup())
+        return self
     
-    def __iter__(self):
+    def thread_safe(self, batch_size=256):
+        """
+        Examples:
+            record_keeper = RecordKeeper().thread_safe()
+            # every thread can now .add()/.commit() without external locks
+            # - each thread has its own pending record
+            # - committed records are buffered per-thread, and merged
+            #   into the keeper (in commit order) in batches of batch_size
+            # - reading records (len(), iterating, saving, etc) flushes the buffers
+        """
+        if self._threads is None:
+            self._threads = PerThreadCommits(batch_size)
+        else:
+            self._threads.batch_size = batch_size
+        return self
+    
+    def flush(self):
+        """
+        moves any per-thread buffered records (.thread_safe()) and
+        any records from child processes (.shared_memory_recorder()) into the keeper
+        """
+        for each in self._shared_recorders:
+            each.drain()
+        if self._threads is not None:
+            self._threads.flush(self._store)
+        return self
+    
+    def shared_memory_recorder(self, schema, capacity=65536):
+        """
+        Examples:
+            shared_recorder = record_keeper.shared_memory_recorder(dict(index=int, loss=float))
+            # give shared_recorder to a child process, then in the child:
+            shared_recorder.push(index=1, loss=0.5)
+        Note:
+            see SharedMemoryRecorder for details
+        """
+        shared_recorder = SharedMemoryRecorder(schema, capacity, record_keeper=self)
+        self._shared_recorders.append(shared_recorder)
+        return shared_recorder
+    
+    def close_shared_memory(self):
+        """
+        drains and frees the shared memory of every .shared_memory_recorder() of this keeper
+        (saving an experiment does this for the record keepers of the experiment)
+        """
+        shared_recorders, self._shared_recorders = self._shared_recorders, []
+        for each in shared_recorders:
+            each.close()
+            each.drain()
+        return self
+    
+    def swap_out(self, old_record_keeper, new_record_keeper):
+        next_keeper = self
+        while isinstance(next_keeper.parent, RecordKeeper):
+            if id(next_keeper.parent) == id(old_record_keeper):
+                next_keeper.parent = new_record_keeper
+                return True
+            # TODO: add infinte loop check (like if next_keeper.parent == next_keeper) 
+            next_keeper = next_keeper.parent
+    
+    @property
+    def number_of_records(self):
+        return len(self)
+    
+    def SubRecordKeeper(self, **kwargs):
+        return RecordKeeper(kwargs).set_parent(self)
+    
+    def __iter__(self):
         for each in self.records:
             yield each
     
     def __len__(self):
+        self.flush()
         if self.collection is None:
             return len(self.local_records)
         else:
@@ -712,6 +1822,7 @@ class RecordKeeper():
     def __getitem__(self, key):
         # numerical acts like array of local records 
         if isinstance(key, (int, slice)):
+            self.flush()
             return self.local_records[key]
         # all else acts like dict of local data
         else:
@@ -728,6 +1839,7 @@ class RecordKeeper():
     def get(self, key, default=None):
         # numerical acts like array of local records 
         if isinstance(key, (int, slice)):
+            self.flush()
             try:
                 return self.local_records[key]
             except Exception as error:
@@ -749,13 +1861,27 @@ class RecordKeeper():
         return self.local_data.values(*args, **kwargs)
     
     def __getstate__(self):
-        return (self.parent, self.local_data, self.collection_id, self.sub_record_keepers, self.pending_record, self.local_records)
+        # locks/thread-locals/shared memory can't be pickled, so buffered records are merged in first
+        self.flush()
+        return (self.parent, self.local_data, self.collection_id, self.sub_record_keepers, self.pending_record, self.local_records, (self.sketches, self.rollups, self.rollup_keys))
     
     def __setstate__(self, state):
-        self.parent, self.local_data, self.collection_id, self.sub_record_keepers, self.pending_record, self.local_records = state
+        self.parent, self.local_data, self.collection_id, self.sub_record_keepers, self.pending_record, self.local_records, *optional = state
+        self.sketches, self.rollups, self.rollup_keys = optional[0] if optional else ({}, {}, ())
+        self._collection = None
+        self._live_files = []
+        self._threads    = None
+        self._shared_recorders = []
+        self._retention  = None
+        self._retained_slots = []
 
-    def save_to(self, path):
-        large_pickle_save(self, path)
+    def save_to(self, path, codec=None):
+        """
+        Example:
+            recorder.save_to("recorder.pickle")
+            recorder.save_to("recorder.pickle.xz", codec="lzma") # see available_codecs(), loading detects the codec
+        """
+        large_pickle_save(self, path, codec=codec)
     
     def __json__(self):
         return [ each.__json__() for each in self ]
@@ -775,6 +1901,1567 @@ class RecordKeeper():
     def __del__(self):
         for each in self._live_files:
             each.close()
+        for each in getattr(self, "_shared_recorders", ()):
+            each.close()
+
+experiment_index_keys = ("experiment_number", "error_number", "had_error", "experiment_start_time", "experiment_end_time", "experiment_duration")
+
+def settle_experiment_info(records, entries):
+    """
+    records that were checkpointed were pickled while their experiment was still running,
+    so their copy of the experiment info can be out of date (ex: had_error=True, no experiment_end_time)
+    the manifest entries have the final values, this puts them back into the (freshly loaded) records
+    """
+    final_info = {}
+    for each_entry in entries:
+        if each_entry.get("experiment_start_time", None) is not None:
+            final_info[each_entry["experiment_start_time"]] = { each_key: each_entry[each_key] for each_key in experiment_index_keys if each_key in each_entry }
+    settled = set()
+    for each_record in records:
+        parents = getattr(each_record, "parents", None)
+        if isinstance(parents, NodeParents) and parents.resolved is None:
+            # (parents that haven't been looked up yet get settled when they are)
+            if id(parents) not in settled:
+                settled.add(id(parents))
+                parents.final_info = { **(parents.final_info or {}), **final_info }
+            continue
+        settle_ancestors(getattr(each_record, "ancestors", ()), final_info, settled)
+    return records
+
+def settle_ancestors(ancestors, final_info, settled=None):
+    """
+    final_info => experiment_start_time => final values of experiment_index_keys
+    """
+    settled = settled if settled is not None else set()
+    for each_ancestor in ancestors:
+        if id(each_ancestor) not in settled:
+            settled.add(id(each_ancestor))
+            if isinstance(each_ancestor, dict) and "experiment_number" in each_ancestor and each_ancestor.get("experiment_start_time", None) in final_info:
+                info = final_info[each_ancestor["experiment_start_time"]]
+                dict.update(each_ancestor, info)
+                # (an unpickled LazyDict keeps a separate copy of its values in __dict__)
+                if getattr(each_ancestor, "__dict__", each_ancestor) is not each_ancestor:
+                    each_ancestor.__dict__.update(info)
+
+class RunParents:
+    """
+    the parents of the already-saved records of a run (while the run is still being saved, ex: checkpoints)
+    parent data can change after records were saved (ex: experiment_recorder["best_loss"] = 0.1 at the end),
+    .renames() says which node ids the earlier saves should point to instead
+    """
+    def __init__(self):
+        self.parents = {} # ids of the ancestors => (ancestors, node ids they were last saved as)
+        self.changed = {} # node_id => parent data, of what changed in the last .renames()
+    
+    def renames(self, node_id_of):
+        """
+        old node ids => new node ids, for the parents that changed since they were saved
+        Note:
+            parents that had the same data (ex: two RecordKeeper(model="a")) have the same node ids,
+            so it's unknown which of the saved records had which, a parent data that they changed differently keeps its old node id
+        """
+        node_ids = {} # id(parent data) => node_id (each one is only hashed once)
+        new_ids  = {} # old node ids => [ new node ids, ... ]
+        changed  = {} # node_id => parent data
+        for each_key, (ancestors, old_ids) in tuple(self.parents.items()):
+            for each_ancestor in ancestors:
+                if id(each_ancestor) not in node_ids:
+                    node_ids[id(each_ancestor)] = node_id_of(each_ancestor)
+                    if node_ids[id(each_ancestor)] not in old_ids:
+                        changed[node_ids[id(each_ancestor)]] = each_ancestor
+            new_ids.setdefault(old_ids, []).append(tuple(node_ids[id(each)] for each in ancestors))
+            self.parents[each_key] = (ancestors, new_ids[old_ids][-1])
+        renames = {}
+        for old_ids, all_new_ids in new_ids.items():
+            renamed = tuple(
+                each_new_ids[0] if len(set(each_new_ids)) == 1 else old_id
+                    for old_id, *each_new_ids in zip(old_ids, *all_new_ids)
+            )
+            if renamed != old_ids:
+                renames[old_ids] = renamed
+        self.changed = { each_id: each for each_id, each in changed.items() if any(each_id in each_new_ids for each_new_ids in renames.values()) }
+        return renames
+    
+    def add(self, parents):
+        """
+        parents => ids of the ancestors => (ancestors, node ids)
+        """
+        self.parents.update(parents)
+
+def node_renames_for(entry, chunk_index):
+    """
+    old node ids => node ids, for one chunk of a shard (see ShardStorage.save_shard())
+    a rename only applies to the chunks that were written before it
+    """
+    renames = {}
+    for chunk_count, each_renames in entry.get("node_renames", ()):
+        if chunk_index < chunk_count:
+            each_renames = { tuple(old_ids): tuple(new_ids) for old_ids, new_ids in each_renames }
+            renames = { **each_renames, **{ old_ids: each_renames.get(new_ids, new_ids) for old_ids, new_ids in renames.items() } }
+    return renames
+
+# 
+# zone maps
+# 
+zone_map_sketch_size = 8
+
+def stable_hash(value):
+    """
+    a 64 bit hash that is the same in every process (hash() of a str isn't, python picks a random seed for each process)
+    """
+    import hashlib
+    if type(value) in (int, bool) or (type(value) is float and value == value):
+        # (the hash of a number is the same everywhere, the tuple spreads even small ints evenly)
+        return hash((value, 0))
+    data = value.encode('utf-8') if type(value) is str else pickle.dumps(value, protocol=pickle_protocol)
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "big", signed=True)
+
+def zone_of(values, record_count):
+    """
+    values => every value of one key in a batch of records (that isn't None)
+    """
+    from itertools import repeat
+    zone = dict(null_count=record_count - len(values))
+    distinct_values = attempt(lambda: set(values), expected_errors=(TypeError,))
+    if distinct_values is None:
+        return zone # (ex: lists)
+    zone["distinct"] = len(distinct_values)
+    types = set(map(type, distinct_values))
+    # (a nan makes min/max meaningless, and it makes the sum nan)
+    total = attempt(lambda: sum(distinct_values), default=float("nan"), expected_errors=(OverflowError,)) if types <= { int, float, bool } else None
+    # the hashes get merged with ones from other processes, so they have to be the same in every process (see stable_hash())
+    if total is not None and total == total:
+        # (same as stable_hash(), but without a python call per value)
+        zone["hashes"] = heapq.nsmallest(zone_map_sketch_size, map(hash, zip(distinct_values, repeat(0))))
+        zone["min"], zone["max"] = min(distinct_values), max(distinct_values)
+    else:
+        zone["hashes"] = heapq.nsmallest(zone_map_sketch_size, map(stable_hash, distinct_values))
+        if types == { str } and max(map(len, distinct_values)) <= 100:
+            zone["min"], zone["max"] = min(distinct_values), max(distinct_values)
+    return zone
+
+def zone_map_of(records):
+    """
+    key => zone of that key across the records (keys of the records themselves and of their parent data)
+    Note:
+        a zone is dict(null_count=, distinct=, hashes=, min=, max=)
+        null_count is how many records have None for the key (or don't have it)
+        distinct is an estimate, hashes are the smallest hashes of the values (so zones can be merged, see merge_zones())
+        min/max are only there when every value is a number (or every value is a short string)
+        a key that isn't in the zone map doesn't have a value in any of the records
+        experiment_index_keys aren't included (the manifest entry has their final values)
+    """
+    values      = {} # key => values
+    itself_keys = set()
+    groups      = {} # ids of the ancestors => (ancestors, [ itself of each record ])
+    record_count = 0
+    for each_record in records:
+        record_count += 1
+        if isinstance(each_record, AncestorDict):
+            itself = each_record.itself
+            ancestors = each_record.ancestors
+            key = tuple(id(each) for each in ancestors)
+            if key not in groups:
+                groups[key] = (ancestors, [])
+            groups[key][1].append(itself)
+        else:
+            itself = each_record
+        itself_keys.update(itself)
+        for each_key, each_value in itself.items():
+            if each_value is not None and isinstance(each_key, str):
+                if each_key not in values:
+                    values[each_key] = []
+                values[each_key].append(each_value)
+    
+    # parent data is the same for a whole group, so each value is only added once (but counted once per record)
+    value_counts = { each_key: len(each_values) for each_key, each_values in values.items() }
+    for ancestors, itselves in groups.values():
+        parent_data = {}
+        for each_ancestor in reversed(ancestors):
+            parent_data.update(each_ancestor)
+        for each_key, each_value in parent_data.items():
+            if each_value is None or not isinstance(each_key, str) or each_key in experiment_index_keys:
+                continue
+            # (the record's own value wins over its parent data)
+            count = sum(1 for each in itselves if each_key not in each) if each_key in itself_keys else len(itselves)
+            if count:
+                values.setdefault(each_key, []).append(each_value)
+                value_counts[each_key] = value_counts.get(each_key, 0) + count
+    
+    zone_map = {}
+    for each_key, each_values in values.items():
+        if each_key not in experiment_index_keys:
+            zone_map[each_key] = zone_of(each_values, record_count)
+            zone_map[each_key]["null_count"] = record_count - value_counts[each_key]
+    return zone_map
+
+def distinct_estimate(hashes):
+    """
+    hashes => the smallest hashes of the distinct values (a k-minimum-values sketch)
+    """
+    if len(hashes) < zone_map_sketch_size:
+        return len(hashes)
+    # (the kth smallest hash, scaled to 0-1)
+    fraction = (hashes[zone_map_sketch_size-1] + 2**63 + 1) / 2**64
+    return round((zone_map_sketch_size - 1) / fraction)
+
+def merge_zones(zone, other_zone):
+    merged = dict(null_count=zone["null_count"] + other_zone["null_count"])
+    if "hashes" in zone and "hashes" in other_zone:
+        merged["hashes"] = sorted(set(zone["hashes"]) | set(other_zone["hashes"]))[:zone_map_sketch_size]
+        merged["distinct"] = max(distinct_estimate(merged["hashes"]), zone["distinct"], other_zone["distinct"])
+    if "min" in zone and "min" in other_zone:
+        bounds = attempt(lambda: (min(zone["min"], other_zone["min"]), max(zone["max"], other_zone["max"])), expected_errors=(TypeError,))
+        if bounds is not None:
+            merged["min"], merged["max"] = bounds
+    return merged
+
+def merge_zone_maps(zone_map, record_count, other_zone_map, other_record_count):
+    """
+    the zone map of both batches of records together (ex: an experiment before and after a checkpoint)
+    None => unknown (ex: an entry from before zone maps)
+    """
+    if zone_map is None or other_zone_map is None:
+        return None
+    merged = {}
+    for each_key in { **zone_map, **other_zone_map }:
+        # (a batch that doesn't have the key only has None for it)
+        zone = zone_map.get(each_key, dict(null_count=record_count))
+        other_zone = other_zone_map.get(each_key, dict(null_count=other_record_count))
+        if each_key not in zone_map:
+            merged[each_key] = dict(other_zone, null_count=other_zone["null_count"] + record_count)
+        elif each_key not in other_zone_map:
+            merged[each_key] = dict(zone, null_count=zone["null_count"] + other_record_count)
+        else:
+            merged[each_key] = merge_zones(zone, other_zone)
+    return merged
+
+def widen_zone_map(zone_map, record_count, parent_data):
+    """
+    the zone map, widened so it also covers the values of the parent data
+    (ex: parent data that changed after some of the records were saved, it's unknown how many of them point to it)
+    """
+    if zone_map is None:
+        return None
+    widened = dict(zone_map)
+    for each_key, each_value in parent_data.items():
+        if each_value is None or not isinstance(each_key, str) or each_key in experiment_index_keys:
+            continue
+        zone = zone_of([ each_value ], 1)
+        null_count = widened[each_key]["null_count"] if each_key in widened else record_count
+        if each_key in widened:
+            zone = merge_zones(widened[each_key], zone)
+        # (at least one record has the value now)
+        zone["null_count"] = max(0, min(null_count, record_count - 1))
+        widened[each_key] = zone
+    return widened
+
+class Compare:
+    """
+    Examples:
+        collection.select(index=Compare("<", 500))
+        collection.select(loss=Compare(">=", 10), had_error=False)
+        collection.map_shards(summarize, experiment_start_time=Compare(">", yesterday))
+    Note:
+        operator can be "<", "<=", ">", ">=", "==", "!="
+        unlike a lambda, a Compare can be checked against the min/max of a shard (see zone_map_of()),
+        so shards that can't have a matching record are never loaded
+        None (and values that can't be compared) never match "<", "<=", ">", ">="
+    """
+    def __init__(self, operator, value):
+        import operator as operators
+        functions = { "<": operators.lt, "<=": operators.le, ">": operators.gt, ">=": operators.ge, "==": operators.eq, "!=": operators.ne }
+        if operator not in functions:
+            raise Exception(f'''\n\nCompare({repr(operator)}, {repr(value)}): the operator can be one of {tuple(functions)}\n''')
+        self.operator = operator
+        self.value    = value
+        self.function = functions[operator]
+    
+    def __call__(self, value):
+        if value is None and self.operator not in ("==", "!="):
+            return False
+        return attempt(lambda: self.function(value, self.value), default=False, expected_errors=(TypeError,))
+    
+    def could_match(self, low, high):
+        """
+        False when no value between low and high (inclusive) can match
+        """
+        value = self.value
+        checks = {
+            "<":  lambda: low < value,
+            "<=": lambda: low <= value,
+            ">":  lambda: high > value,
+            ">=": lambda: high >= value,
+            "==": lambda: low <= value <= high,
+            "!=": lambda: not (low == high == value),
+        }
+        return attempt(checks[self.operator], default=True, expected_errors=(TypeError,))
+    
+    def __repr__(self):
+        return f"Compare({repr(self.operator)}, {repr(self.value)})"
+
+def zone_could_match(zone, record_count, condition):
+    """
+    False when none of the records that the zone describes can match the condition (see matches())
+    """
+    could_match_none = attempt(lambda: matches(None, condition), default=True)
+    if zone is None:
+        return could_match_none # (no record has a value for the key)
+    if zone["null_count"] > 0 and could_match_none:
+        return True
+    if zone["null_count"] >= record_count:
+        return False
+    if "min" not in zone or (callable(condition) and not isinstance(condition, Compare)):
+        return True
+    if isinstance(condition, Compare):
+        return condition.could_match(zone["min"], zone["max"])
+    return attempt(lambda: zone["min"] <= condition <= zone["max"], default=True, expected_errors=(TypeError,))
+
+def entry_could_match(entry, record_filters):
+    """
+    False when the zone map of the entry rules out every record for one of the filters
+    """
+    zone_map = entry.get("zone_map", None)
+    if zone_map is None:
+        return True # (an entry from before zone maps)
+    return all(
+        zone_could_match(zone_map.get(each_key, None), entry["record_count"], each_condition)
+            for each_key, each_condition in record_filters.items()
+    )
+
+def loaded_size_of(records, sample_size=100):
+    """
+    an estimate of how many bytes of memory the loaded records use (from a sample of them)
+    Note:
+        parent data is shared by many records, so it isn't counted
+        values are measured with sys.getsizeof() (ex: a list counts, but not what's in it)
+    """
+    import sys
+    if not records:
+        return 0
+    sample = records[::max(1, len(records) // sample_size)][:sample_size]
+    total = 0
+    for each_record in sample:
+        itself = getattr(each_record, "itself", each_record)
+        total += sys.getsizeof(each_record) + (sys.getsizeof(itself) if itself is not each_record else 0)
+        total += sum(map(sys.getsizeof, itself.values()))
+    return sys.getsizeof(records) + total * len(records) // len(sample)
+
+class ShardCache:
+    """
+    A least-recently-used cache of loaded shards
+    Note:
+        size is an estimate of the memory the loaded records use (see loaded_size_of())
+        not the size of the shard files (compressed shards can be many times smaller than their records)
+    """
+    def __init__(self, limit):
+        self.limit  = limit
+        self.size   = 0
+        self.shards = OrderedDict()
+        self.lock   = threading.Lock() # (shards can be loaded by several threads, see ExperimentCollection(workers=))
+    
+    def get(self, key, load):
+        with self.lock:
+            if key in self.shards:
+                self.shards.move_to_end(key)
+                return self.shards[key][0]
+        # (loading happens outside of the lock, so shards load in parallel)
+        value = load()
+        size = loaded_size_of(value)
+        with self.lock:
+            if key not in self.shards:
+                self.shards[key] = (value, size)
+                self.size += size
+            # always keep the most recent one, even if it alone is over the limit
+            while self.size > self.limit and len(self.shards) > 1:
+                _, (_, old_size) = self.shards.popitem(last=False)
+                self.size -= old_size
+        return value
+    
+    def clear(self):
+        with self.lock:
+            self.shards.clear()
+            self.size = 0
+
+class ShardStorage:
+    """
+    The on-disk layout of an ExperimentCollection
+        collection_folder/
+            manifests/          # one manifest per writer (process), one line per shard (append-only), together they're the index of the collection
+            manifest.jsonl      # (older collections) the manifest from before there was one per writer
+            shards/             # one file per saved experiment (or error run), only ever appended to (checkpoints)
+            nodes/              # one file per writer, the parent data (local_data of record keepers) of every record, each one stored once
+            records.pickle      # (older collections) every record from before shards existed
+    Note:
+        each manifest entry has everything needed to list/select experiments without loading records:
+            sequence, shard, record_count, record_keys, zone_map, experiment_number, error_number,
+            had_error, experiment_start_time, experiment_end_time, experiment_duration
+        zone_map has the min/max/null count/distinct count of each key of the records (see zone_map_of())
+        a shard file is a stream of pickled chunks of records (a checkpoint appends one more chunk)
+        a chunk is dict(node_ids=[ ... ], columns={ key: pickled values }), node_ids point to the parent data in nodes/
+        each key of the records is pickled on its own, so loading a few keys only unpickles those (see .load_columns())
+        (older chunks are dict(node_rows=[ (node_ids, itself), ... ]), and older shards are a stream of lists of records)
+        a shard can have several manifest entries (one per checkpoint), the latest one wins
+        every writer only appends to its own manifest and its own shards, so writers never wait on each other
+        (reading merges all the manifests, ordered by experiment_start_time)
+        shard_size is the byte size of the shard as of that entry, anything past it was never committed
+        codec is the compression of the shard (new shards use the storage's codec, older shards keep theirs)
+        the first line of a writer's manifest is dict(manifest_id=...), so a manifest that was compacted away and then made again isn't mistaken for the old one
+        a manifest line with "tombstone" deletes the runs that it lists (by experiment_start_time, numbers get re-used after an error)
+        (older tombstones without "runs" delete every run of that experiment number, or of one run, if it has an error_number)
+        the shard files stay until .compact()
+    """
+    def __init__(self, folder_path, cache_limit=2**30, codec=None, writer_id=None):
+        from uuid import uuid4
+        self.folder_path          = folder_path
+        self.writer_id            = writer_id or uuid4().hex[:12]
+        self.manifest_folder      = f"{folder_path}/manifests"
+        self.manifest_path        = f"{self.manifest_folder}/{self.writer_id}.jsonl"
+        self.legacy_manifest_path = f"{folder_path}/manifest.jsonl"
+        self.shard_folder         = f"{folder_path}/shards"
+        self.legacy_records_path  = f"{folder_path}/records.pickle"
+        self.cache                = ShardCache(cache_limit)
+        self.codec                = check_codec(codec)
+        self._manifest_cache      = {} # path => (size, mtime, bytes parsed, lines) so only what was appended gets parsed again
+        self._manifest_ids        = {} # name => manifest_id (the first line of the manifest, None for older manifests)
+        self._manifest_lock       = threading.Lock()
+        self.writer_lock          = None # (a FileLock, held from the first line this writer appends, see ExperimentCollection.writer_is_running())
+        self.node_folder          = f"{folder_path}/nodes"
+        self.node_path            = f"{self.node_folder}/{self.writer_id}.pickle"
+        self._nodes               = {} # node_id => parent data (one object, shared by every record that has that parent)
+        self._node_file_sizes     = {} # path => size when it was read
+        self._written_node_ids    = set()
+        self._node_lock           = threading.Lock()
+        self._run_parents         = {} # shard => RunParents (of runs that are still being saved, ex: checkpoints)
+    
+    @property
+    def manifest_paths(self):
+        import os
+        manifest_paths = [ self.legacy_manifest_path ] if FS.is_file(self.legacy_manifest_path) else []
+        if FS.is_folder(self.manifest_folder):
+            manifest_paths += [ f"{self.manifest_folder}/{each}" for each in sorted(os.listdir(self.manifest_folder)) if each.endswith(".jsonl") ]
+        return manifest_paths
+    
+    @property
+    def entries(self):
+        return self.read_manifests()[0]
+    
+    def read_manifests(self, include_deleted=False):
+        """
+        returns (entries, manifest_sizes, manifest_of, compaction, tombstones)
+            manifest_sizes => manifest name => number of bytes that were read (only complete lines)
+            manifest_of    => entry_id => name of the manifest the entry came from
+            compaction     => the header of the latest compaction (or None)
+            tombstones     => the tombstone lines (entries they delete are left out, unless include_deleted=True)
+        """
+        import os
+        manifest_lines = {}
+        compaction = None
+        manifest_paths = self.manifest_paths
+        for each_path in manifest_paths:
+            name = each_path[len(self.folder_path)+1:]
+            try:
+                stat = os.stat(each_path)
+            except FileNotFoundError:
+                continue # (removed by a compaction)
+            cached = self._manifest_cache.get(each_path, None)
+            if cached is not None and cached[:2] == (stat.st_size, stat.st_mtime_ns):
+                end, lines = cached[2], cached[3]
+            else:
+                # manifests are append-only, so only the part after what was already parsed needs to be read
+                end, lines = (cached[2], list(cached[3])) if cached is not None and stat.st_size >= cached[2] else (0, [])
+                with open(each_path, 'rb') as manifest_file:
+                    manifest_file.seek(end)
+                    content = manifest_file.read()
+                # (a writer could be in the middle of writing the last line)
+                content = content[:content.rfind(b"\n")+1]
+                for each_line in content.split(b"\n")[:-1]:
+                    end += len(each_line) + 1
+                    each_object = attempt(lambda: json.loads(each_line)) if each_line.strip() else None
+                    if isinstance(each_object, dict):
+                        lines.append((end, each_object))
+                self._manifest_cache[each_path] = (stat.st_size, stat.st_mtime_ns, end, lines)
+            for _, each_object in lines:
+                if "compaction" in each_object and (compaction is None or each_object["compacted_at"] > compaction["compacted_at"]):
+                    compaction = each_object
+            manifest_lines[name] = (end, lines)
+            self._manifest_ids[name] = lines[0][1].get("manifest_id", None) if lines else None
+        for each_path in set(self._manifest_cache) - set(manifest_paths):
+            del self._manifest_cache[each_path]
+        
+        # the latest compaction replaced everything that was in the manifests when it ran
+        superseded = compaction["superseded_manifests"] if compaction else {}
+        superseded_ids = compaction.get("superseded_manifest_ids", None) if compaction else None
+        entries = {}
+        manifest_of = {}
+        tombstones = []
+        for name, (_, lines) in manifest_lines.items():
+            superseded_size = superseded.get(name, 0)
+            # (a manifest with the same name, that was made after the compaction removed the old one)
+            if superseded_ids is not None and superseded_ids.get(name, None) != self._manifest_ids[name]:
+                superseded_size = 0
+            manifest_entries = {}
+            for end, each_entry in lines:
+                if end <= superseded_size or "compaction" in each_entry or "manifest_id" in each_entry:
+                    continue
+                if "tombstone" in each_entry:
+                    tombstones.append(each_entry)
+                else:
+                    # later entries for the same shard replace earlier ones
+                    manifest_entries[self.entry_id(each_entry)] = each_entry
+            # a shard can be in two manifests (ex: a different writer recovered its journal), the one with more records wins
+            for each_id, each_entry in manifest_entries.items():
+                if each_id not in entries or self.completeness(each_entry) > self.completeness(entries[each_id]):
+                    entries[each_id] = each_entry
+                    manifest_of[each_id] = name
+        entries = list(entries.values())
+        # older collections get indexed once
+        legacy_records_folded = compaction is not None and compaction.get("legacy_records_folded", False)
+        if FS.is_file(self.legacy_records_path) and not legacy_records_folded and not any(each.get("shard", None) == "records.pickle" for each in entries):
+            for each_entry in self.index_legacy_records(sequence=len(entries)):
+                entries.append(each_entry)
+                manifest_of[self.entry_id(each_entry)] = self.manifest_path[len(self.folder_path)+1:]
+        if not include_deleted:
+            deleted = self.deleted_runs(tombstones)
+            entries = [ each for each in entries if not self.is_deleted(each, deleted) ]
+        entries.sort(key=lambda each: each.get("experiment_start_time", None) or 0)
+        return entries, { name: size for name, (size, _) in manifest_lines.items() }, manifest_of, compaction, tombstones
+    
+    @staticmethod
+    def run_id(entry):
+        # (the error_number of a run changes when it finishes, and a number is re-used after an error, the start time doesn't change)
+        start_time = entry.get("experiment_start_time", None)
+        return start_time if start_time is not None else (entry.get("experiment_number", None), entry.get("error_number", None))
+    
+    @staticmethod
+    def deleted_runs(tombstones):
+        deleted_runs = set()
+        for each in tombstones:
+            if "runs" in each:
+                deleted_runs.update(("run", tuple(each_run) if isinstance(each_run, list) else each_run) for each_run in each["runs"])
+            else:
+                deleted_runs.add(("number", each["experiment_number"], each["error_number"]))
+        return deleted_runs
+    
+    @staticmethod
+    def is_deleted(entry, deleted_runs):
+        experiment_number = entry.get("experiment_number", None)
+        return (
+            ("run", ShardStorage.run_id(entry)) in deleted_runs
+            or ("number", experiment_number, None) in deleted_runs
+            or ("number", experiment_number, entry.get("error_number", None)) in deleted_runs
+        )
+    
+    def delete(self, experiment_number, error_number=None):
+        """
+        error_number=None => every run of the experiment
+        Note:
+            only runs that are in the manifest right now are deleted (a later run that gets the same number stays)
+        """
+        entries = self.read_manifests(include_deleted=True)[0]
+        runs = []
+        for each_entry in entries:
+            if each_entry.get("experiment_number", None) == experiment_number and error_number in (None, each_entry.get("error_number", None)):
+                if self.run_id(each_entry) not in runs:
+                    runs.append(self.run_id(each_entry))
+        self.append_entry(dict(tombstone=True, experiment_number=experiment_number, error_number=error_number, runs=runs, deleted_at=now()))
+    
+    @staticmethod
+    def completeness(entry):
+        return (entry["record_count"], not entry.get("in_progress", False))
+    
+    @staticmethod
+    def entry_id(entry):
+        if entry.get("part_of_shard", False):
+            return (entry["shard"], entry["experiment_number"], entry["error_number"])
+        if "offset" in entry:
+            return (entry["shard"], entry["offset"])
+        return entry["shard"]
+    
+    @property
+    def next_sequence(self):
+        return max((each["sequence"] for each in self.entries), default=-1) + 1
+    
+    def append_entry(self, entry):
+        import os
+        from uuid import uuid4
+        # (compaction only removes the manifests of writers that aren't holding their lock)
+        if self.writer_lock is not None and self.writer_lock.file is None:
+            self.writer_lock.acquire()
+        FS.ensure_is_folder(self.manifest_folder)
+        with self._manifest_lock:
+            with open(self.manifest_path, 'a') as manifest_file:
+                if manifest_file.tell() == 0:
+                    manifest_file.write(json.dumps(dict(manifest_id=uuid4().hex))+"\n")
+                manifest_file.write(json.dumps(entry)+"\n")
+                manifest_file.flush()
+                os.fsync(manifest_file.fileno())
+    
+    @staticmethod
+    def index_entry_for(records, **info):
+        keys = set()
+        seen_ancestors = set()
+        for each_record in records:
+            keys.update(each_record.itself.keys())
+            for each_ancestor in each_record.ancestors:
+                if id(each_ancestor) not in seen_ancestors:
+                    seen_ancestors.add(id(each_ancestor))
+                    keys.update(each_ancestor.keys())
+        return dict(
+            record_count=len(records),
+            record_keys=sorted(each for each in keys if isinstance(each, str)),
+            zone_map=zone_map_of(records),
+            **info,
+        )
+    
+    def index_legacy_records(self, sequence):
+        records = self.cached_file("records.pickle")
+        # group by experiment run (in order of appearance)
+        groups = {}
+        for each_record in records:
+            groups.setdefault((each_record["experiment_number"], each_record["error_number"]), []).append(each_record)
+        entries = []
+        for (experiment_number, error_number), each_group in groups.items():
+            first_record = each_group[0]
+            entry = dict(
+                sequence=sequence + len(entries),
+                shard="records.pickle",
+                part_of_shard=True, # the file has other experiments in it
+                **self.index_entry_for(
+                    each_group,
+                    **{ each_key: first_record[each_key] for each_key in experiment_index_keys },
+                ),
+            )
+            self.append_entry(entry)
+            entries.append(entry)
+        return entries
+    
+    @staticmethod
+    def new_shard_name(experiment_number=None, error_number=None, **_):
+        from uuid import uuid4
+        return f"shards/{experiment_number}.{error_number}.{uuid4().hex[:12]}.pickle"
+    
+    def save_shard(self, records, shard=None, **info):
+        """
+        shard=None                     => records become a new shard
+        shard=(name of a shard)        => records are appended to that shard (ex: checkpoints)
+        """
+        import os
+        shard = shard or self.new_shard_name(**info)
+        path = f"{self.folder_path}/{shard}"
+        # (a deleted experiment can still be running, its shard is still only ever appended to)
+        entries = self.read_manifests(include_deleted=True)[0]
+        previous_entry = None
+        for each_entry in entries:
+            if each_entry["shard"] == shard and not each_entry.get("part_of_shard", False):
+                previous_entry = each_entry
+        # cut off anything that was appended but never committed (ex: a crash mid-checkpoint)
+        # otherwise a half-written pickle would hide everything appended after it
+        if FS.is_file(path):
+            committed_size = previous_entry.get("shard_size", None) if previous_entry is not None else 0
+            if committed_size is not None and os.path.getsize(path) > committed_size:
+                os.truncate(path, committed_size)
+        # parent data that changed since the earlier saves of this run (ex: set at the end of the experiment)
+        run_parents = self._run_parents.pop(shard, None) or RunParents()
+        renames = run_parents.renames(self.node_id_of)
+        changed_nodes = run_parents.changed
+        self.write_nodes({ each_id: each for each_id, each in changed_nodes.items() if each_id not in self._written_node_ids })
+        parents = {}
+        codec = pickle_stream_append(self.to_chunk(records, parents), path, codec=self.codec)
+        run_parents.add(parents)
+        if info.get("in_progress", False):
+            self._run_parents[shard] = run_parents
+        entry = dict(
+            sequence=max((each["sequence"] for each in entries), default=-1) + 1,
+            shard=shard,
+            shard_size=os.path.getsize(path),
+            codec=codec,
+            **self.index_entry_for(records, **info),
+        )
+        entry["chunk_count"] = 1
+        if previous_entry is not None:
+            entry["zone_map"] = merge_zone_maps(previous_entry.get("zone_map", None), previous_entry["record_count"], entry["zone_map"], entry["record_count"])
+            entry["record_count"] += previous_entry["record_count"]
+            entry["record_keys"] = sorted(set(entry["record_keys"]) | set(previous_entry["record_keys"]))
+            if "journal_segment" not in entry and "journal_segment" in previous_entry:
+                entry["journal_segment"] = previous_entry["journal_segment"]
+            node_renames = previous_entry.get("node_renames", [])
+            if previous_entry.get("chunk_count", None) is None:
+                del entry["chunk_count"] # (unknown, the earlier chunks are from before chunks were counted)
+            else:
+                entry["chunk_count"] = previous_entry["chunk_count"] + 1
+            # (the renames only apply to the chunks written before this one, see node_renames_for())
+            if renames and "chunk_count" in entry:
+                node_renames = node_renames + [ [ previous_entry["chunk_count"], [ [ old_ids, new_ids ] for old_ids, new_ids in renames.items() ] ] ]
+                for each_node in changed_nodes.values():
+                    entry["zone_map"] = widen_zone_map(entry["zone_map"], entry["record_count"], each_node)
+                    entry["record_keys"] = sorted(set(entry["record_keys"]) | { each for each in each_node if isinstance(each, str) })
+            if node_renames:
+                entry["node_renames"] = node_renames
+        # the records are only visible once their manifest line exists (so a crash mid-save can't produce half-written records)
+        self.append_entry(entry)
+        return entry
+    
+    # 
+    # node table
+    # 
+    @staticmethod
+    def node_id_of(parent_data):
+        import hashlib
+        # (the id is the hash of the data, so the same parent data gets the same id in every shard and every process)
+        return hashlib.sha1(pickle.dumps(parent_data, protocol=pickle_protocol)).hexdigest()
+    
+    def write_nodes(self, new_nodes):
+        """
+        new_nodes => node_id => parent data
+        """
+        if new_nodes:
+            # (nodes have to be on disk before any shard points to them)
+            pickle_stream_append(new_nodes, self.node_path, codec=self.codec)
+            self._written_node_ids.update(new_nodes)
+    
+    def to_chunk(self, records, parents=None):
+        """
+        replaces the parent data of records with node ids (the parent data is written to the node table, only if it isn't there already)
+        parents => a dict that gets ids of the ancestors => (ancestors, node ids) of every record
+        """
+        node_ids      = {} # id(parent data) => node_id
+        id_tuples     = {} # ids of the ancestors => tuple of node ids (the same tuple object, so pickle only writes it once)
+        new_nodes     = {}
+        rows          = []
+        for each_record in records:
+            if not isinstance(each_record, AncestorDict):
+                rows.append((None, each_record))
+                continue
+            key = tuple(id(each) for each in each_record.ancestors)
+            if key not in id_tuples:
+                for each_ancestor in each_record.ancestors:
+                    if id(each_ancestor) not in node_ids:
+                        node_id = self.node_id_of(each_ancestor)
+                        node_ids[id(each_ancestor)] = node_id
+                        if node_id not in self._written_node_ids:
+                            new_nodes[node_id] = each_ancestor
+                id_tuples[key] = tuple(node_ids[id(each)] for each in each_record.ancestors)
+                if parents is not None:
+                    parents[key] = (each_record.ancestors, id_tuples[key])
+            rows.append((id_tuples[key], each_record.itself))
+        self.write_nodes(new_nodes)
+        if any(type(itself) is not dict for _, itself in rows):
+            return dict(node_rows=rows) # (ex: records that are a subclass of dict)
+        return self.columns_of(rows)
+    
+    @staticmethod
+    def columns_of(rows):
+        """
+        rows => [ (node_ids, itself), ... ]
+        each column is a pickle of (row numbers, values), row numbers is None when every record has the key
+        """
+        columns = {}
+        for row_number, (_, itself) in enumerate(rows):
+            for each_key, each_value in itself.items():
+                if each_key not in columns:
+                    columns[each_key] = ([], [])
+                row_numbers, values = columns[each_key]
+                row_numbers.append(row_number)
+                values.append(each_value)
+        return dict(
+            node_ids=[ node_ids for node_ids, _ in rows ],
+            columns={
+                each_key: pickle.dumps((None if len(row_numbers) == len(rows) else row_numbers, values), protocol=pickle_protocol)
+                    for each_key, (row_numbers, values) in columns.items()
+            },
+        )
+    
+    @staticmethod
+    def itselves_of(chunk, columns=None):
+        """
+        columns=None => every key
+        """
+        itselves = [ {} for _ in chunk["node_ids"] ]
+        for each_key in (chunk["columns"] if columns is None else columns):
+            if each_key in chunk["columns"]:
+                row_numbers, values = pickle.loads(chunk["columns"][each_key])
+                if row_numbers is None:
+                    for itself, each_value in zip(itselves, values):
+                        itself[each_key] = each_value
+                else:
+                    for each_row_number, each_value in zip(row_numbers, values):
+                        itselves[each_row_number][each_key] = each_value
+        return itselves
+    
+    def from_chunk(self, chunk, columns=None, node_renames=None):
+        """
+        columns => only those keys of the records themselves are unpickled (the rest of the record is missing)
+        node_renames => old node_id => node_id (see node_renames_for())
+        """
+        if not isinstance(chunk, dict):
+            return chunk or [] # (shards from before the node table)
+        if "node_rows" in chunk:
+            rows = chunk["node_rows"]
+        else:
+            rows = zip(chunk["node_ids"], self.itselves_of(chunk, columns))
+        # the parents are only looked up once they're needed (see LazyAncestorDict)
+        parents = {} # node ids => NodeParents (records with the same parents share it)
+        records = []
+        for node_ids, itself in rows:
+            if node_ids is None:
+                records.append(itself)
+                continue
+            if node_ids not in parents:
+                parents[node_ids] = NodeParents(node_renames.get(node_ids, node_ids) if node_renames else node_ids, self)
+            records.append(LazyAncestorDict(parents=parents[node_ids], itself=itself))
+        return records
+    
+    def node(self, node_id):
+        if node_id not in self._nodes:
+            self.read_nodes()
+            if node_id not in self._nodes:
+                raise Exception(f'''\n\nThe collection {self.folder_path} has a record that points to parent data that is missing from {self.node_folder} (node {node_id})\n''')
+        return self._nodes[node_id]
+    
+    def read_nodes(self):
+        import os
+        with self._node_lock:
+            if not FS.is_folder(self.node_folder):
+                return
+            for each_name in os.listdir(self.node_folder):
+                path = f"{self.node_folder}/{each_name}"
+                size = os.path.getsize(path)
+                # (node files are small, so a file that changed is just read again)
+                if size != self._node_file_sizes.get(path, None):
+                    for each_chunk in pickle_stream_load(path):
+                        for node_id, each_node in each_chunk.items():
+                            # the first object stays, so records loaded earlier keep sharing it
+                            self._nodes.setdefault(node_id, each_node)
+                    self._node_file_sizes[path] = size
+    
+    def read_chunks(self, shard, offset=0, length=None, columns=None, entry=None, first_chunk=0):
+        """
+        entry => the node renames of the entry are applied (first_chunk is the index of the chunk at the offset)
+        """
+        records = []
+        for chunk_index, each_chunk in enumerate(pickle_stream_load(f"{self.folder_path}/{shard}", offset=offset, length=length), first_chunk):
+            records += self.from_chunk(each_chunk, columns, entry and node_renames_for(entry, chunk_index))
+        return records
+    
+    @staticmethod
+    def part_of(records, entry):
+        if not entry.get("part_of_shard", False):
+            # anything appended after the last manifest entry (ex: crash before the entry was written) doesn't count
+            if len(records) > entry["record_count"]:
+                return records[:entry["record_count"]]
+            return records
+        experiment_number, error_number = entry["experiment_number"], entry["error_number"]
+        return [ each for each in records if each["experiment_number"] == experiment_number and each["error_number"] == error_number ]
+    
+    def cached_file(self, shard, entry=None):
+        import os
+        path = f"{self.folder_path}/{shard}"
+        size = os.path.getsize(path)
+        # the size is part of the key because checkpoints can append to a shard
+        return self.cache.get((path, size), lambda: self.load_file(shard, entry))
+    
+    def load_file(self, shard, entry=None):
+        # (the older records.pickle is from before checkpoints, so it never needs this)
+        if entry is None or entry.get("part_of_shard", False):
+            return self.read_chunks(shard)
+        return settle_experiment_info(self.read_chunks(shard, entry=entry), [ entry ])
+    
+    def load_packed(self, entry):
+        """
+        entries with an offset are one part of a pack file (see .compact())
+        """
+        records = self.read_chunks(entry["shard"], offset=entry["offset"], length=entry["length"], entry=entry)
+        return settle_experiment_info(records, [ entry ])
+    
+    def load_shard(self, entry):
+        if "offset" in entry:
+            return self.part_of(self.load_packed(entry), entry)
+        return self.part_of(self.load_file(entry["shard"], entry), entry)
+    
+    def cached_shard(self, entry):
+        if "offset" in entry:
+            key = (f"{self.folder_path}/{entry['shard']}", entry["offset"], entry["length"])
+            return self.part_of(self.cache.get(key, lambda: self.load_packed(entry)), entry)
+        return self.part_of(self.cached_file(entry["shard"], entry), entry)
+    
+    def select_records(self, entry, record_filters):
+        """
+        records of the entry that match the filters
+        """
+        return records_matching(self.cached_shard(entry), record_filters)
+    
+    def load_columns(self, entry, columns):
+        """
+        one dict per record of the entry, with only the given keys (None for keys a record doesn't have)
+        only those keys get unpickled (and the parent data is only looked up if one of the keys is in it)
+        """
+        columns = tuple(dict.fromkeys(columns))
+        if entry.get("part_of_shard", False):
+            # (the older records.pickle, the records are needed to know which ones are part of the entry)
+            return [ project(each, columns) for each in self.load_shard(entry) ]
+        offset, length = (entry["offset"], entry["length"]) if "offset" in entry else (0, None)
+        rows = []
+        for chunk_index, each_chunk in enumerate(pickle_stream_load(f"{self.folder_path}/{entry['shard']}", offset=offset, length=length)):
+            node_renames = node_renames_for(entry, chunk_index)
+            if isinstance(each_chunk, dict) and "columns" in each_chunk:
+                rows += self.rows_of(each_chunk, columns, entry, node_renames)
+            else:
+                rows += [ project(each, columns) for each in settle_experiment_info(self.from_chunk(each_chunk, node_renames=node_renames), [ entry ]) ]
+        # (anything appended after the entry was never committed)
+        return rows[:entry["record_count"]]
+    
+    def rows_of(self, chunk, columns, entry, node_renames=None):
+        """
+        .load_columns() of one chunk, straight from its columns
+        (keys that some records don't have are looked up in their parent data)
+        """
+        node_renames = node_renames or {}
+        rows = self.itselves_of(chunk, columns)
+        incomplete = [ index for index, each_row in enumerate(rows) if len(each_row) < len(columns) ]
+        if incomplete:
+            node_ids = chunk["node_ids"]
+            parents = {
+                node_ids[index]: AncestorDict(ancestors=tuple(self.node(each) for each in node_renames.get(node_ids[index], node_ids[index]) or ()))
+                    for index in incomplete
+            }
+            settle_experiment_info(parents.values(), [ entry ])
+            for index in incomplete:
+                row, each_parents = rows[index], parents[node_ids[index]]
+                rows[index] = { each_key: row[each_key] if each_key in row else each_parents[each_key] for each_key in columns }
+        return rows
+    
+    def load_new_records(self, entry, previous_entry=None):
+        """
+        records of the entry that an earlier entry of the same run (ex: from before a checkpoint) didn't have
+        (when the shard was only appended to, only the appended bytes get read)
+        """
+        if previous_entry is None:
+            return self.load_shard(entry)
+        was_appended = (
+            entry["shard"] == previous_entry["shard"]
+            and "offset" not in entry and not entry.get("part_of_shard", False)
+            and None not in (entry.get("shard_size", None), previous_entry.get("shard_size", None))
+        )
+        if not was_appended:
+            return self.load_shard(entry)[previous_entry["record_count"]:]
+        length = entry["shard_size"] - previous_entry["shard_size"]
+        if length <= 0:
+            return []
+        records = self.read_chunks(entry["shard"], offset=previous_entry["shard_size"], length=length, entry=entry, first_chunk=previous_entry.get("chunk_count", 0) or 0)
+        return settle_experiment_info(records, [ entry ])
+    
+    def load_records(self):
+        records = []
+        loaded_files = {}
+        for each_entry in self.entries:
+            shard = each_entry["shard"]
+            if "offset" in each_entry:
+                records += self.part_of(self.load_packed(each_entry), each_entry)
+                continue
+            if shard not in loaded_files:
+                loaded_files[shard] = self.load_file(shard, each_entry)
+            records += self.part_of(loaded_files[shard], each_entry)
+        return records
+    
+    def compact(self, small_shard_size=2**26, pack_size=2**28, max_bytes=None, drop_superseded_error_runs=False, writer_is_running=lambda writer_id: False):
+        """
+        Note:
+            - entries of small shards (and of packs that are mostly dropped entries) are copied into pack files
+              as byte ranges (offset/length), one shard at a time, so memory stays bounded
+            - a new manifest (manifests/compacted.*.jsonl) replaces everything that was in the manifests
+              (writers that are still running keep appending to their own manifest, only the part that was read gets replaced)
+            - files that nothing points to anymore are removed
+            - max_bytes limits how much gets copied in one call (call it again to keep going)
+            - drop_superseded_error_runs=True drops runs that had an error if the experiment later succeeded
+            - deleted experiments (see .delete()) are dropped, their tombstones are kept in the new manifest
+        """
+        import os
+        from uuid import uuid4
+        entries, manifest_sizes, manifest_of, previous_compaction, tombstones = self.read_manifests(include_deleted=True)
+        
+        def writer_of(entry):
+            return FS.name(manifest_of[self.entry_id(entry)])
+        def is_open(entry):
+            # (its writer could still append to it)
+            return entry.get("in_progress", False) and writer_is_running(writer_of(entry))
+        def size_of(entry):
+            if "offset" in entry:
+                return entry["length"]
+            if entry.get("part_of_shard", False) or entry.get("shard_size", None) is None:
+                return os.path.getsize(f"{self.folder_path}/{entry['shard']}")
+            return entry["shard_size"]
+        
+        # (a deleted experiment that is still running is kept until it's done, it stays hidden by its tombstone)
+        deleted = self.deleted_runs(tombstones)
+        dropped = [ each for each in entries if self.is_deleted(each, deleted) and not is_open(each) ]
+        if drop_superseded_error_runs:
+            succeeded = { each.get("experiment_number", None) for each in entries if not each.get("had_error", False) and not each.get("in_progress", False) and not self.is_deleted(each, deleted) }
+            dropped += [ each for each in entries if each.get("had_error", False) and each.get("experiment_number", None) in succeeded and not is_open(each) and not self.is_deleted(each, deleted) ]
+        dropped_ids = { self.entry_id(each) for each in dropped }
+        kept = [ each for each in entries if self.entry_id(each) not in dropped_ids ]
+        
+        # packs that are mostly dropped/moved entries get re-packed
+        pack_usage = {}
+        for each_entry in kept:
+            if "offset" in each_entry:
+                pack_usage[each_entry["shard"]] = pack_usage.get(each_entry["shard"], 0) + each_entry["length"]
+        def is_small(entry):
+            if "offset" in entry:
+                return pack_usage[entry["shard"]] < os.path.getsize(f"{self.folder_path}/{entry['shard']}") / 2
+            return size_of(entry) < small_shard_size
+        
+        candidates = []
+        total_size = 0
+        for each_entry in kept:
+            if not is_open(each_entry) and is_small(each_entry):
+                if max_bytes is not None and total_size + size_of(each_entry) > max_bytes and candidates:
+                    break
+                candidates.append(each_entry)
+                total_size += size_of(each_entry)
+        if not candidates and not dropped:
+            return dict(packed_entries=0, packed_bytes=0, dropped_entries=0, removed_files=0)
+        
+        # 
+        # copy into packs
+        # 
+        moved = {}
+        # a pack that isn't full yet gets added to (appending doesn't change the byte ranges already in it)
+        candidate_packs = { each["shard"] for each in candidates if "offset" in each }
+        open_packs = [
+            each_pack for each_pack in pack_usage
+                if each_pack not in candidate_packs and os.path.getsize(f"{self.folder_path}/{each_pack}") < pack_size
+        ]
+        pack = open_packs[0] if open_packs else None
+        pack_file = open(f"{self.folder_path}/{pack}", 'ab') if pack else None
+        def finish_pack():
+            if pack_file is not None:
+                pack_file.flush()
+                os.fsync(pack_file.fileno())
+                pack_file.close()
+        for each_entry in candidates:
+            if pack_file is None or pack_file.tell() >= pack_size:
+                finish_pack()
+                pack = f"packs/{uuid4().hex[:12]}.pickle"
+                FS.ensure_is_folder(f"{self.folder_path}/packs")
+                pack_file = open(f"{self.folder_path}/{pack}", 'ab')
+            offset = pack_file.tell()
+            source_path = f"{self.folder_path}/{each_entry['shard']}"
+            rewritten = each_entry.get("part_of_shard", False) or ("offset" not in each_entry and each_entry.get("shard_size", None) is None)
+            if rewritten:
+                # (no byte range to copy, the records have to be re-written)
+                with codec_writer(self.codec, pack_file) as f_out:
+                    pickle.dump(self.to_chunk(self.load_shard(each_entry)), f_out, protocol=pickle_protocol)
+            else:
+                # the committed bytes are copied as they are (no unpickling, same codec)
+                with open(source_path, 'rb') as source_file:
+                    source_file.seek(each_entry.get("offset", 0))
+                    remaining = size_of(each_entry)
+                    while remaining > 0:
+                        block = source_file.read(min(remaining, 2**20))
+                        if not block:
+                            break
+                        pack_file.write(block)
+                        remaining -= len(block)
+            moved_entry = dict(each_entry, shard=pack, offset=offset, length=pack_file.tell() - offset)
+            moved_entry["shard_size"] = moved_entry["length"]
+            moved_entry.pop("part_of_shard", None)
+            if rewritten:
+                # (the re-written records already point to the renamed nodes, and they're all in one chunk)
+                moved_entry.pop("node_renames", None)
+                moved_entry["chunk_count"] = 1
+            moved[self.entry_id(each_entry)] = moved_entry
+        finish_pack()
+        
+        # 
+        # the new manifest (swapped in all at once)
+        # 
+        new_entries = [ moved.get(self.entry_id(each), each) for each in kept ]
+        legacy_records_folded = (previous_compaction is not None and previous_compaction.get("legacy_records_folded", False)) or (
+            FS.is_file(self.legacy_records_path) and not any(each["shard"] == "records.pickle" for each in new_entries)
+        )
+        compaction_id = uuid4().hex[:12]
+        header = dict(
+            compaction=compaction_id,
+            compacted_at=now(),
+            superseded_manifests=manifest_sizes,
+            superseded_manifest_ids={ each_name: self._manifest_ids.get(each_name, None) for each_name in manifest_sizes },
+            legacy_records_folded=legacy_records_folded,
+        )
+        FS.ensure_is_folder(self.manifest_folder)
+        compacted_manifest_path = f"{self.manifest_folder}/compacted.{compaction_id}.jsonl"
+        with open(compacted_manifest_path+".tmp", 'w') as manifest_file:
+            # (tombstones stay, a writer that is still running could add to a deleted experiment)
+            for each_line in [ header, *tombstones, *new_entries ]:
+                manifest_file.write(json.dumps(each_line)+"\n")
+            manifest_file.flush()
+            os.fsync(manifest_file.fileno())
+        os.replace(compacted_manifest_path+".tmp", compacted_manifest_path)
+        
+        # 
+        # remove what isn't needed anymore
+        # 
+        still_used = { each["shard"] for each in new_entries } | { each["shard"] for each in entries if is_open(each) }
+        removed_files = 0
+        for each_shard in { each["shard"] for each in candidates + dropped }:
+            if each_shard not in still_used and FS.is_file(f"{self.folder_path}/{each_shard}"):
+                FS.remove(f"{self.folder_path}/{each_shard}")
+                removed_files += 1
+        for each_name in manifest_sizes:
+            # (a running writer still appends to its manifest)
+            if not writer_is_running(FS.name(each_name)):
+                FS.remove(f"{self.folder_path}/{each_name}")
+        self.cache.clear()
+        return dict(packed_entries=len(candidates), packed_bytes=total_size, dropped_entries=len(dropped), removed_files=removed_files)
+
+class SqliteStorage:
+    """
+    The on-disk layout of an ExperimentCollection(backend="sqlite")
+        collection_folder/
+            collection.sqlite
+                experiments(shard, sequence, experiment_number, error_number, had_error, entry)
+                nodes(node_id, digest, data)                              # local_data of each record keeper (stored once)
+                records(record_id, shard, node_ids, fields, data)         # node_ids => the ancestors of the record
+                tombstones(experiment_number, error_number, shard, deleted_at) # deleted runs (shard NULL => older tombstone, every run of that number, error_number NULL => any error_number)
+    Note:
+        this has the same interface as ShardStorage (an "experiments" row is a manifest entry, a "shard" is just a name)
+        data columns are pickles (so any value can be recorded), fields is the json of the simple values of a record (numbers, strings, bools)
+        fields is what select() filters on inside sqlite, so only the records that can match get unpickled
+        index_keys adds an sqlite index on those fields, ex: index_keys=("index", "training")
+    """
+    def __init__(self, folder_path, cache_limit=2**30, codec=None, index_keys=()):
+        self.folder_path   = folder_path
+        self.database_path = f"{folder_path}/collection.sqlite"
+        self.cache         = ShardCache(cache_limit)
+        self.codec         = check_codec(codec)
+        self.index_keys    = tuple(index_keys)
+        if self.codec != "none":
+            raise Exception(f'''\n\nExperimentCollection(backend="sqlite") doesn't compress records, remove the codec={repr(codec)} argument\n''')
+        self._node_ids     = {} # digest => node_id
+        self._run_parents  = {} # shard => RunParents (of runs that are still being saved, ex: checkpoints)
+        FS.ensure_is_folder(folder_path)
+        with self.connect() as connection:
+            connection.executescript("""
+                CREATE TABLE IF NOT EXISTS experiments (
+                    shard             TEXT PRIMARY KEY,
+                    sequence          INTEGER,
+                    experiment_number INTEGER,
+                    error_number      INTEGER,
+                    had_error         INTEGER,
+                    entry             TEXT
+                );
+                CREATE TABLE IF NOT EXISTS nodes (
+                    node_id INTEGER PRIMARY KEY,
+                    digest  TEXT UNIQUE,
+                    data    BLOB
+                );
+                CREATE TABLE IF NOT EXISTS records (
+                    record_id INTEGER PRIMARY KEY,
+                    shard     TEXT,
+                    node_ids  TEXT,
+                    fields    TEXT,
+                    data      BLOB
+                );
+                CREATE TABLE IF NOT EXISTS tombstones (
+                    experiment_number INTEGER,
+                    error_number      INTEGER,
+                    shard             TEXT,
+                    deleted_at        REAL
+                );
+                CREATE INDEX IF NOT EXISTS experiments_by_number ON experiments(experiment_number, error_number);
+                CREATE INDEX IF NOT EXISTS records_by_shard ON records(shard, record_id);
+                CREATE INDEX IF NOT EXISTS tombstones_by_number ON tombstones(experiment_number);
+            """)
+            # (collections from before tombstones had a shard)
+            if "shard" not in [ each[1] for each in connection.execute("PRAGMA table_info(tombstones)") ]:
+                connection.execute("ALTER TABLE tombstones ADD COLUMN shard TEXT")
+            view = connection.execute("SELECT sql FROM sqlite_master WHERE type = 'view' AND name = 'live_experiments'").fetchone()
+            if view is not None and "tombstones.shard" not in view[0]:
+                connection.execute("DROP VIEW live_experiments")
+            connection.executescript("""
+                CREATE INDEX IF NOT EXISTS tombstones_by_shard ON tombstones(shard);
+                CREATE VIEW IF NOT EXISTS live_experiments AS SELECT * FROM experiments WHERE NOT EXISTS (
+                    SELECT 1 FROM tombstones WHERE tombstones.shard = experiments.shard
+                ) AND NOT EXISTS (
+                    SELECT 1 FROM tombstones WHERE tombstones.shard IS NULL AND tombstones.experiment_number = experiments.experiment_number AND (tombstones.error_number IS NULL OR tombstones.error_number = experiments.error_number)
+                );
+            """)
+            for each_key in self.index_keys:
+                index_name = f"records_by_{each_key}".replace('"', '""')
+                connection.execute(f"""CREATE INDEX IF NOT EXISTS "{index_name}" ON records(shard, json_extract(fields, {self.json_path(each_key)}))""")
+    
+    @contextmanager
+    def connect(self):
+        """
+        Example:
+            with self.connect() as connection:
+                connection.execute(...)
+        Note:
+            one connection per operation (checkpoints save from a background thread)
+            the statements are one transaction (rolled back if one fails) and the connection always gets closed
+        """
+        import sqlite3
+        connection = sqlite3.connect(self.database_path, timeout=60)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+    
+    @staticmethod
+    def json_path(key):
+        return "'$.\"" + key.replace("'", "''").replace('"', '\\"') + "\"'"
+    
+    @staticmethod
+    def fields_of(a_dict):
+        import math
+        return json.dumps({
+            each_key: each_value
+                for each_key, each_value in a_dict.items()
+                    if isinstance(each_key, str) and (
+                        each_value is None or isinstance(each_value, (bool, int, str)) or (isinstance(each_value, float) and math.isfinite(each_value))
+                    )
+        })
+    
+    @property
+    def entries(self):
+        with self.connect() as connection:
+            rows = connection.execute("SELECT entry FROM live_experiments ORDER BY sequence").fetchall()
+        return [ json.loads(each_entry) for (each_entry,) in rows ]
+    
+    @staticmethod
+    def new_shard_name(experiment_number=None, error_number=None, **_):
+        from uuid import uuid4
+        return f"{experiment_number}.{error_number}.{uuid4().hex[:12]}"
+    
+    def node_id_for(self, connection, local_data):
+        import hashlib
+        data = pickle.dumps(local_data, protocol=pickle_protocol)
+        digest = hashlib.sha1(data).hexdigest()
+        if digest not in self._node_ids:
+            connection.execute("INSERT OR IGNORE INTO nodes (digest, data) VALUES (?, ?)", (digest, data))
+            (self._node_ids[digest],) = connection.execute("SELECT node_id FROM nodes WHERE digest = ?", (digest,)).fetchone()
+        return self._node_ids[digest]
+    
+    def save_shard(self, records, shard=None, **info):
+        """
+        shard=None                     => records become a new experiment row
+        shard=(name of a shard)        => records are added to that experiment (ex: checkpoints)
+        """
+        shard = shard or self.new_shard_name(**info)
+        # everything is one transaction, so a crash mid-save can't produce half-written records
+        with self.connect() as connection:
+            # parent data that changed since the earlier saves of this run (ex: set at the end of the experiment)
+            # the records that were already saved get pointed to the new nodes
+            run_parents = self._run_parents.pop(shard, None) or RunParents()
+            renames = run_parents.renames(lambda local_data: self.node_id_for(connection, local_data))
+            for old_ids, new_ids in renames.items():
+                connection.execute("UPDATE records SET node_ids = ? WHERE shard = ? AND node_ids = ?", (json.dumps(list(new_ids)), shard, json.dumps(list(old_ids))))
+            
+            node_ids = {} # id(local_data) => node_id (parent data is only pickled once per save)
+            parents  = {} # ids of the ancestors => (ancestors, node ids)
+            rows = []
+            size = 0
+            for each_record in records:
+                itself, ancestors = (each_record.itself, each_record.ancestors) if hasattr(each_record, "ancestors") else (dict(each_record), ())
+                for each_ancestor in ancestors:
+                    if id(each_ancestor) not in node_ids:
+                        node_ids[id(each_ancestor)] = self.node_id_for(connection, each_ancestor)
+                if ancestors:
+                    parents[tuple(id(each) for each in ancestors)] = (ancestors, tuple(node_ids[id(each)] for each in ancestors))
+                data = pickle.dumps(itself, protocol=pickle_protocol)
+                size += len(data)
+                rows.append((
+                    shard,
+                    json.dumps([ node_ids[id(each)] for each in ancestors ]),
+                    self.fields_of(itself),
+                    data,
+                ))
+            connection.executemany("INSERT INTO records (shard, node_ids, fields, data) VALUES (?, ?, ?, ?)", rows)
+            run_parents.add(parents)
+            if info.get("in_progress", False):
+                self._run_parents[shard] = run_parents
+            
+            previous = connection.execute("SELECT entry FROM experiments WHERE shard = ?", (shard,)).fetchone()
+            previous_entry = json.loads(previous[0]) if previous else None
+            if previous_entry is None:
+                (sequence,) = connection.execute("SELECT COALESCE(MAX(sequence), -1) + 1 FROM experiments").fetchone()
+            else:
+                sequence = previous_entry["sequence"]
+            entry = dict(
+                sequence=sequence,
+                shard=shard,
+                shard_size=size,
+                codec="none",
+                **self.index_entry_for(records, **info),
+            )
+            if previous_entry is not None:
+                entry["shard_size"] += previous_entry["shard_size"]
+                entry["zone_map"] = merge_zone_maps(previous_entry.get("zone_map", None), previous_entry["record_count"], entry["zone_map"], entry["record_count"])
+                entry["record_count"] += previous_entry["record_count"]
+                entry["record_keys"] = sorted(set(entry["record_keys"]) | set(previous_entry["record_keys"]))
+                if "journal_segment" not in entry and "journal_segment" in previous_entry:
+                    entry["journal_segment"] = previous_entry["journal_segment"]
+                for each_node in run_parents.changed.values():
+                    entry["zone_map"] = widen_zone_map(entry["zone_map"], entry["record_count"], each_node)
+                    entry["record_keys"] = sorted(set(entry["record_keys"]) | { each for each in each_node if isinstance(each, str) })
+            connection.execute(
+                "INSERT OR REPLACE INTO experiments (shard, sequence, experiment_number, error_number, had_error, entry) VALUES (?, ?, ?, ?, ?, ?)",
+                (shard, sequence, entry.get("experiment_number", None), entry.get("error_number", None), entry.get("had_error", None), json.dumps(entry)),
+            )
+        return entry
+    
+    index_entry_for = staticmethod(ShardStorage.index_entry_for)
+    
+    def delete(self, experiment_number, error_number=None):
+        """
+        error_number=None => every run of the experiment
+        Note:
+            only runs that exist right now are deleted (a later run that gets the same number stays)
+        """
+        with self.connect() as connection:
+            connection.execute(
+                "INSERT INTO tombstones (experiment_number, error_number, shard, deleted_at) SELECT experiment_number, error_number, shard, ? FROM experiments WHERE experiment_number = ? AND (? IS NULL OR error_number = ?)",
+                (now(), experiment_number, error_number, error_number),
+            )
+    
+    def query_records(self, where="", arguments=()):
+        """
+        runs SELECT ... FROM records {where} and turns the rows back into records
+        (each node is unpickled once, so records share their parent data like they did before saving)
+        """
+        with self.connect() as connection:
+            rows = connection.execute(f"SELECT node_ids, data FROM records {where}", arguments).fetchall()
+            node_ids = set()
+            rows = [ (json.loads(each_node_ids), each_data) for each_node_ids, each_data in rows ]
+            for each_node_ids, _ in rows:
+                node_ids.update(each_node_ids)
+            nodes = self.load_nodes(connection, node_ids)
+        return [
+            AncestorDict(ancestors=tuple(nodes[each_id] for each_id in each_node_ids), itself=pickle.loads(each_data))
+                for each_node_ids, each_data in rows
+        ]
+    
+    @staticmethod
+    def load_nodes(connection, node_ids):
+        nodes = {}
+        node_ids = list(node_ids)
+        # (sqlite limits the number of arguments)
+        for index in range(0, len(node_ids), 900):
+            batch = node_ids[index:index+900]
+            for each_node_id, each_data in connection.execute(f"SELECT node_id, data FROM nodes WHERE node_id IN ({','.join('?'*len(batch))})", batch):
+                nodes[each_node_id] = pickle.loads(each_data)
+        return nodes
+    
+    def load_shard(self, entry):
+        return settle_experiment_info(self.query_records("WHERE shard = ? ORDER BY record_id", (entry["shard"],)), [ entry ])
+    
+    def load_columns(self, entry, columns):
+        """
+        one dict per record of the entry, with only the given keys (None for keys a record doesn't have)
+        values that are in fields are read by sqlite, a record only gets unpickled if one of the keys isn't there
+        """
+        paths = [ self.json_path(each) if isinstance(each, str) else None for each in columns ]
+        in_fields = [ f"json_type(fields, {each}) IS NOT NULL" for each in paths if each is not None ]
+        data = "data" if len(in_fields) < len(paths) else f"CASE WHEN {' AND '.join(in_fields) or 1} THEN NULL ELSE data END"
+        values = "".join(f", json_type(fields, {each}), json_extract(fields, {each})" if each is not None else ", NULL, NULL" for each in paths)
+        with self.connect() as connection:
+            rows = connection.execute(f"SELECT node_ids, {data}{values} FROM records WHERE shard = ? ORDER BY record_id", (entry["shard"],)).fetchall()
+            # (sqlite gives back 1/0 for json booleans)
+            json_constants = { "true": True, "false": False, "null": None }
+            results = []
+            in_parents = [] # (row, key, node_ids) of keys that aren't in the record itself
+            for each_node_ids, each_data, *each_values in rows:
+                row = {}
+                itself = None
+                for index, each_key in enumerate(columns):
+                    json_type, value = each_values[2*index], each_values[2*index+1]
+                    if json_type is not None:
+                        row[each_key] = json_constants.get(json_type, value)
+                        continue
+                    if itself is None:
+                        itself = pickle.loads(each_data)
+                    if each_key in itself:
+                        row[each_key] = itself[each_key]
+                    else:
+                        in_parents.append((row, each_key, each_node_ids))
+                results.append(row)
+            if in_parents:
+                node_id_lists = { each_node_ids: json.loads(each_node_ids) for _, _, each_node_ids in in_parents }
+                nodes = self.load_nodes(connection, { each_id for each_list in node_id_lists.values() for each_id in each_list })
+                parents = { each_node_ids: AncestorDict(ancestors=tuple(nodes[each_id] for each_id in each_list)) for each_node_ids, each_list in node_id_lists.items() }
+                settle_experiment_info(parents.values(), [ entry ])
+                for each_row, each_key, each_node_ids in in_parents:
+                    each_row[each_key] = parents[each_node_ids][each_key]
+        return results
+    
+    def cached_shard(self, entry):
+        # record_count is part of the key because checkpoints can add to an experiment
+        return self.cache.get((entry["shard"], entry["record_count"]), lambda: self.load_shard(entry))
+    
+    def select_records(self, entry, record_filters):
+        """
+        records of the entry that match the filters
+        Note:
+            a key that isn't in the record itself could be in its parent data,
+            so sqlite only rules out records that have the key with a different value (the rest are checked after loading)
+        """
+        conditions, arguments = [], [ entry["shard"] ]
+        for each_key, each_condition in record_filters.items():
+            if isinstance(each_condition, Compare):
+                operator, each_condition = each_condition.operator.replace("==", "="), each_condition.value
+            else:
+                operator = "="
+            if isinstance(each_key, str) and isinstance(each_condition, (bool, int, float, str)):
+                path = self.json_path(each_key)
+                conditions.append(f"(json_extract(fields, {path}) IS NULL OR json_extract(fields, {path}) {operator} ?)")
+                arguments.append(each_condition)
+        if not conditions:
+            return records_matching(self.cached_shard(entry), record_filters)
+        return records_matching(settle_experiment_info(self.query_records(f"WHERE shard = ? AND {' AND '.join(conditions)} ORDER BY record_id", arguments), [ entry ]), record_filters)
+    
+    def load_new_records(self, entry, previous_entry=None):
+        """
+        records of the entry that an earlier entry of the same run (ex: from before a checkpoint) didn't have
+        """
+        skip = previous_entry["record_count"] if previous_entry is not None else 0
+        return settle_experiment_info(self.query_records("WHERE shard = ? ORDER BY record_id LIMIT -1 OFFSET ?", (entry["shard"], skip)), [ entry ])
+    
+    def load_records(self):
+        records = self.query_records("JOIN live_experiments USING (shard) ORDER BY live_experiments.sequence, records.record_id")
+        return settle_experiment_info(records, self.entries)
+    
+    def compact(self, drop_superseded_error_runs=False, **_):
+        """
+        sqlite manages its own pages, so this drops what isn't needed (deleted experiments, etc) and then VACUUMs
+        """
+        with self.connect() as connection:
+            # (tombstones stay, a writer that is still running could add to a deleted experiment)
+            dropped = "SELECT shard FROM experiments EXCEPT SELECT shard FROM live_experiments"
+            if drop_superseded_error_runs:
+                dropped += """
+                    UNION SELECT shard FROM live_experiments AS errored WHERE had_error AND json_extract(entry, '$.in_progress') IS NOT 1 AND EXISTS (
+                        SELECT 1 FROM live_experiments AS succeeded WHERE NOT succeeded.had_error AND succeeded.experiment_number = errored.experiment_number
+                    )
+                """
+            dropped_shards = [ each for (each,) in connection.execute(dropped).fetchall() ]
+            dropped_entries = len(dropped_shards)
+            for index in range(0, len(dropped_shards), 900):
+                batch = dropped_shards[index:index+900]
+                connection.execute(f"DELETE FROM records WHERE shard IN ({','.join('?'*len(batch))})", batch)
+                connection.execute(f"DELETE FROM experiments WHERE shard IN ({','.join('?'*len(batch))})", batch)
+            # parent data that no record points to anymore
+            connection.execute("DELETE FROM nodes WHERE node_id NOT IN (SELECT DISTINCT json_each.value FROM records, json_each(records.node_ids))")
+            # (VACUUM can't run inside a transaction)
+            connection.commit()
+            connection.execute("VACUUM")
+        self._node_ids = {}
+        self.cache.clear()
+        return dict(packed_entries=0, packed_bytes=0, dropped_entries=dropped_entries, removed_files=0)
+
+class RecordsView(Sequence):
+    """
+    Examples:
+        records = collection.records
+        len(records)
+        records[10], records[-1], records[100:200]
+        for each in records:
+            pass
+    Note:
+        a read-only view over several lists of records (ex: loaded + not-yet-saved), nothing is copied
+        it follows the lists (records added after it was created show up in it), list(view) makes a snapshot
+        slicing returns a regular list (only the slice is copied)
+    """
+    __slots__ = ("segments",)
+    
+    def __init__(self, *segments):
+        self.segments = segments
+    
+    def __len__(self):
+        return sum(len(each) for each in self.segments)
+    
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step != 1:
+                return list(self)[key]
+            selected = []
+            for each_segment in self.segments:
+                if stop <= 0:
+                    break
+                if start < len(each_segment):
+                    selected += each_segment[start:stop]
+                start, stop = max(start - len(each_segment), 0), stop - len(each_segment)
+            return selected
+        if key < 0:
+            key += len(self)
+        if key >= 0:
+            for each_segment in self.segments:
+                if key < len(each_segment):
+                    return each_segment[key]
+                key -= len(each_segment)
+        raise IndexError("records index out of range")
+    
+    def __iter__(self):
+        from itertools import chain
+        return chain.from_iterable(self.segments)
+    
+    def __reversed__(self):
+        for each_segment in reversed(self.segments):
+            yield from reversed(each_segment)
+    
+    def __add__(self, other):
+        return list(self) + list(other)
+    
+    def __radd__(self, other):
+        return list(other) + list(self)
+    
+    def __eq__(self, other):
+        if isinstance(other, (list, tuple, RecordsView)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+    
+    __hash__ = None
+    
+    def __repr__(self):
+        return f"RecordsView(number_of_records={len(self)})"
+
+def shard_task(storage, entry, function=None, record_filters=None):
+    """
+    loads the records of one entry (in a worker thread, or in a worker process when storage is (storage type, folder path))
+    then only keeps the ones that match record_filters, and returns function(records)
+    """
+    if isinstance(storage, tuple):
+        storage_type, folder_path = storage
+        records = storage_type(folder_path, cache_limit=0).load_shard(entry)
+    else:
+        records = storage.cached_shard(entry)
+    records = records_matching(records, record_filters)
+    return records if function is None else function(records)
+
+def records_matching(records, filters):
+    """
+    the records that match every filter (a missing key counts as None)
+    """
+    if not filters:
+        return records
+    return [
+        each for each in records
+            # (AncestorDict gives None for missing keys)
+            if all(matches(each.get(each_key, None) if type(each) is dict else each[each_key], each_condition) for each_key, each_condition in filters.items())
+    ]
+
+def project(record, columns):
+    """
+    a dict with only the given keys of the record (None for keys it doesn't have)
+    """
+    if type(record) is dict:
+        return { each_key: record.get(each_key, None) for each_key in columns }
+    # (AncestorDict gives None for missing keys)
+    return { each_key: record[each_key] for each_key in columns }
+
+def records_where(predicate, records):
+    return [ each for each in records if predicate(each) ]
 
 class Experiment(object):
     def __init__(self, internal_experiment_info, save_experiment):
@@ -802,27 +3489,71 @@ class ExperimentCollection:
         - experiment_start_time
         - experiment_end_time
         - experiment_duration
+        journal=True writes every committed record to an append-only journal (see .recover_journal())
+        backend="sqlite" stores everything in one sqlite database (see SqliteStorage) instead of shard files
+        experiments can be deleted (see .delete_experiment() and .retain())
+        workers=8 loads shards 8 at a time (pool="threads" or pool="processes"), see .map_shards() for analysis on every core
+        (processes have to send the loaded records back, so for loading threads are usually faster, processes pay off with .map_shards())
     """
     
-    # TODO: make it so that Experiments uses database with detached/reattached pickled objects instead of a single pickle file
+    # filters on these keys get checked against the index instead of each record (see .split_filters())
+    index_filter_keys = experiment_index_keys
     
-    def __init__(self, folder_path, quiet=False, records=None, extension=".collection"):
+    def __init__(self, folder_path, quiet=False, records=None, extension=".collection", cache_limit=2**30, checkpoint_every=None, checkpoint_seconds=None, journal=False, codec=None, backend="shards", index_keys=(), workers=None, pool="threads"):
         self.folder_path                         = FS.make_absolute_path(folder_path+extension)
         self.quiet                               = quiet
         self.id                                  = None # will be changed almost immediately
         self.collection_name                     = FS.name(self.folder_path)
         self._records                            = None
+        self._saved_record_count                 = None # records in the manifests (+ checkpoints still being written), see __len__
         self._new_records                        = records or []
         self.collection_keeper                   = RecordKeeper({})
         self.internal_experiment_info            = None
         self.current_experiment                  = None
         self.prev_internal_experiment_local_data = dict(experiment_number=0, error_number=0, had_error=False)
+        self._sketch_templates                   = {}
+        self.checkpoint_every                    = checkpoint_every   # number of records
+        self.checkpoint_seconds                  = checkpoint_seconds
+        self._experiment_shard                   = None
+        self._parent_snapshots                   = {} # id(parent data) => (parent data, its copy), see .snapshot_records()
+        self._last_checkpoint_time               = now()
+        self._checkpoint_queue                   = None
+        self._checkpoint_error                   = None
+        self.journal                             = journal
+        self._journal_file                       = None
+        self._journal_pickler                    = None
+        self._journal_segment_number             = 0
+        self._experiment_retention               = ()
+        self._loaded_segments                    = ([], {}) # (records, entry => (start, end)) of the last load, see .load_records()
+        self.workers                             = workers
+        self.pool                                = check_pool(pool)
         
+        from uuid import uuid4
+        # every ExperimentCollection object is its own writer (several processes can write to one collection at the same time)
+        self.writer_id = uuid4().hex[:12]
         self.sub_paths = LazyDict(
             id=f"{self.folder_path}/collection_id.txt",
             collection_info=f"{self.folder_path}/collection_info.pickle",
             records=f"{self.folder_path}/records.pickle",
+            sketches=f"{self.folder_path}/sketches.pickle",
+            journal=f"{self.folder_path}/journal",
+            lock=f"{self.folder_path}/collection.lock",
+            writers=f"{self.folder_path}/writers",
         )
+        # held while numbering experiments and while updating collection_info/sketches
+        self.lock = FileLock(self.sub_paths.lock)
+        # held from the first time this writer writes anything (so other writers don't recover its journal or remove its manifest)
+        self._writer_lock = FileLock(f"{self.sub_paths.writers}/{self.writer_id}.lock")
+        # cache_limit is about how many bytes of memory loaded shards can use for collection[n]/.select()
+        # codec compresses new shards (see available_codecs()), ex: codec="zstd"
+        if backend == "shards":
+            self.storage = ShardStorage(self.folder_path, cache_limit=cache_limit, codec=codec, writer_id=self.writer_id)
+            self.storage.writer_lock = self._writer_lock
+        elif backend == "sqlite":
+            # index_keys => record keys that get an sqlite index, ex: index_keys=("index",)
+            self.storage = SqliteStorage(self.folder_path, cache_limit=cache_limit, codec=codec, index_keys=index_keys)
+        else:
+            raise Exception(f'''\n\nExperimentCollection(backend={repr(backend)}) isn't supported, backend can be "shards" or "sqlite"\n''')
         
         # create the main folder if it doesn't exist
         FS.ensure_is_folder(self.folder_path)
@@ -830,12 +3561,13 @@ class ExperimentCollection:
         # 
         # load/set self.id
         # 
-        if FS.is_file(self.sub_paths.id):
-            self.id = FS.read(self.sub_paths.id)
-        else:
-            if not self.quiet: print(f'Will create new experiment collection: {self.collection_name}')
-            self.id = f"{random()}"
-            FS.write(data=self.id, to=self.sub_paths.id)
+        with self.lock:
+            if FS.is_file(self.sub_paths.id):
+                self.id = FS.read(self.sub_paths.id)
+            else:
+                if not self.quiet: print(f'Will create new experiment collection: {self.collection_name}')
+                self.id = f"{random()}"
+                FS.write(data=self.id, to=self.sub_paths.id)
         # when a record_keeper is saved, it shouldn't contain a copy of the experiment collection
         # (otherwise every record keeper would contain the entire collection instead of being Independent)
         # however, when record_keeper loads itself back, it should reconnect to the experiment_collection if its available
@@ -848,41 +3580,426 @@ class ExperimentCollection:
         self.collection_keeper.collection_id = self.id
         
         self.load_basic_info()
+        # a journal that is still around means an experiment didn't get to save
+        self.recover_journal()
     
     def load_basic_info(self):
         self.prev_internal_experiment_local_data = self.prev_internal_experiment_local_data or dict(experiment_number=0, error_number=0, had_error=False)
         if FS.is_file(self.sub_paths.collection_info):
             self.collection_keeper.local_data, self.prev_internal_experiment_local_data = large_pickle_load(self.sub_paths.collection_info)
+    
+    def load_prev_experiment_info(self):
+        """
+        the latest experiment info on disk (other writers could have started experiments since this collection was loaded)
+        """
+        if FS.is_file(self.sub_paths.collection_info):
+            self.prev_internal_experiment_local_data = large_pickle_load(self.sub_paths.collection_info)[1]
+        return self.prev_internal_experiment_local_data
         
     def load_records(self):
-        if FS.is_file(self.sub_paths.records):
-            self._records = large_pickle_load(self.sub_paths.records) or []
-        else:
-            self._records = []
+        """
+        Note:
+            only entries that are new or changed since the last load (ex: another process saved or checkpointed an experiment)
+            are read from disk, records of every other entry are re-used
+        """
+        previous_records, previous_segments = self._loaded_segments
+        records, segments = [], {}
+        entries = self.storage.entries
+        # (any change to an entry, ex: a checkpoint, makes it a different key)
+        keys = [ json.dumps(each_entry, sort_keys=True) for each_entry in entries ]
+        loaded = iter(self.map_entries([ each_entry for each_entry, key in zip(entries, keys) if key not in previous_segments ]))
+        for each_entry, key in zip(entries, keys):
+            if key in previous_segments:
+                start, end = previous_segments[key]
+                segment = previous_records[start:end]
+            else:
+                segment = next(loaded)
+            segments[key] = (len(records), len(records) + len(segment))
+            records += segment
+        self._records = records
+        self._loaded_segments = (records, segments)
     
     def reload(self):
         self.load_basic_info()
-        self._records = None # records will do an on-demand reload because it can be a really slow operation
+        # records will do an on-demand reload because it can be a slow operation
+        # (only the new/changed shards get read, see .load_records())
+        self._records = None
+        self._saved_record_count = None
         
     @property
     def records(self):
+        self.wait_for_checkpoints()
         if self._records is None:
             self.load_records()
-        return self._records + self._new_records
+        return RecordsView(self._records, self._new_records)
     
     def __len__(self,):
-        return len(self.records)
+        if self._records is None:
+            # the manifests are only read once (until the next .reload()), checkpoints and saves add to the count
+            if self._saved_record_count is None:
+                # (only the manifests need the checkpoints to be written)
+                self.wait_for_checkpoints()
+                self._saved_record_count = sum(each["record_count"] for each in self.storage.entries)
+            return self._saved_record_count + len(self._new_records)
+        # checkpointed records are already in ._records (see .checkpoint()), so there's nothing to wait for
+        return len(self._records) + len(self._new_records)
+    
+    @property
+    def index(self):
+        """
+        Examples:
+            for each in collection.index:
+                print(each.experiment_number, each.had_error, each.experiment_duration, each.record_count)
+        Note:
+            this comes from the manifests (no records are loaded)
+            keys: sequence, shard, shard_size, codec, record_count, record_keys, zone_map, experiment_number, error_number,
+                  had_error, experiment_start_time, experiment_end_time, experiment_duration
+        """
+        self.wait_for_checkpoints()
+        return tuple(LazyDict(each) for each in self.storage.entries)
+    
+    def sketch(self, key, sketch=None):
+        """
+        Examples:
+            collection.sketch("loss")
+            collection.sketch("latency", HistogramSketch(low=0, high=1, bins=50))
+            with collection.new_experiment() as experiment_recorder:
+                ...
+            collection.sketches["loss"].quantile(0.99)          # across all experiments
+            collection.experiment_sketches[(1, 0)]["loss"]      # (experiment_number, error_number) => sketches
+        Note:
+            every new experiment gets a fresh copy of the sketch,
+            which sees every record of that experiment and is saved along with it
+        """
+        self._sketch_templates[key] = sketch if sketch is not None else QuantileSketch()
+        return self
+    
+    @property
+    def experiment_sketches(self):
+        if FS.is_file(self.sub_paths.sketches):
+            return large_pickle_load(self.sub_paths.sketches)
+        return {}
+    
+    @property
+    def sketches(self):
+        return merge_sketches(self.experiment_sketches.values())
     
     def add_record(self, record):
+        if self.journal:
+            self.write_to_journal(record)
         self._new_records.append(record)
+        if self.checkpoint_every is not None and len(self._new_records) >= self.checkpoint_every:
+            self.checkpoint()
+        elif self.checkpoint_seconds is not None and now() - self._last_checkpoint_time >= self.checkpoint_seconds:
+            self.checkpoint()
+    
+    def checkpoint(self):
+        """
+        Example:
+            collection = ExperimentCollection("my_study", checkpoint_every=100_000, checkpoint_seconds=60)
+            # or call collection.checkpoint() manually
+        Note:
+            appends the pending records to the current experiment's shard (in a background thread)
+            and releases them from memory. If the process gets killed, everything up to the
+            last checkpoint is still on disk, and the save at the end only writes the tail
+        """
+        self._last_checkpoint_time = now()
+        if self.internal_experiment_info is None or len(self._new_records) == 0:
+            return
+        records = list(self._new_records)
+        self._new_records.clear()
+        if self._records is not None:
+            self._records += records
+        if self._saved_record_count is not None:
+            self._saved_record_count += len(records)
+        experiment_info = self.internal_experiment_info.local_data
+        info = { each_key: experiment_info[each_key] for each_key in experiment_index_keys }
+        shard = self._experiment_shard
+        # the caller keeps changing parent data while the checkpoint is written, so it gets a copy of the records
+        snapshot, sync_snapshot = self.snapshot_records(records)
+        # the journal so far covers exactly these records, so it can go once they're in the shard
+        journal_segment = self.close_journal_segment()
+        def write_checkpoint():
+            sync_snapshot()
+            self.storage.save_shard(snapshot, shard=shard, in_progress=True, **info, **self.journal_info(journal_segment))
+            if journal_segment is not None:
+                FS.remove(journal_segment)
+        
+        # one background thread does the writing (in order)
+        if self._checkpoint_queue is None:
+            import queue
+            self._checkpoint_queue = queue.Queue()
+            def checkpoint_writer():
+                while True:
+                    job = self._checkpoint_queue.get()
+                    try:
+                        job()
+                    except Exception as error:
+                        self._checkpoint_error = error
+                    finally:
+                        self._checkpoint_queue.task_done()
+            threading.Thread(target=checkpoint_writer, daemon=True).start()
+        self._checkpoint_queue.put(write_checkpoint)
+    
+    def snapshot_records(self, records):
+        """
+        returns (records, sync)
+            records => shallow copies of the records, their parent data is a copy too
+            sync    => copies the parent data (as it is right now) into those copies, call it right before saving
+        Note:
+            a parent keeps the same copy for the whole experiment, so the storage still sees parent data
+            that changed after records were saved (see RunParents), the copies only change when sync() is called
+        """
+        from copy import copy
+        snapshots = self._parent_snapshots
+        copies    = {} # ids of the ancestors => tuple of their copies
+        snapshot  = []
+        for each_record in records:
+            if not isinstance(each_record, AncestorDict):
+                snapshot.append(copy(each_record))
+                continue
+            ancestors = each_record.ancestors
+            key = tuple(id(each) for each in ancestors)
+            if key not in copies:
+                for each_ancestor in ancestors:
+                    if id(each_ancestor) not in snapshots:
+                        snapshots[id(each_ancestor)] = (each_ancestor, copy(each_ancestor))
+                copies[key] = tuple(snapshots[id(each)][1] for each in ancestors)
+            snapshot.append(AncestorDict(ancestors=copies[key], itself=dict(each_record.itself)))
+        current_data = [ (each_copy, dict(each_parent)) for each_parent, each_copy in snapshots.values() ]
+        def sync():
+            for each_copy, each_data in current_data:
+                each_copy.clear()
+                each_copy.update(each_data)
+        return snapshot, sync
+    
+    def writer_is_running(self, writer_id):
+        if writer_id == self.writer_id:
+            return True
+        writer_lock = FileLock(f"{self.sub_paths.writers}/{writer_id}.lock")
+        if not writer_lock.acquire(blocking=False):
+            return True
+        FS.remove(writer_lock.path)
+        writer_lock.release()
+        return False
+    
+    def compact(self, small_shard_size=2**26, pack_size=2**28, max_bytes=None, drop_superseded_error_runs=False):
+        """
+        Examples:
+            collection.compact()                                  # merge small shards (< 64Mb) into packs (~256Mb)
+            collection.compact(drop_superseded_error_runs=True)   # also drop runs that had an error, if that experiment later succeeded
+            # a bit at a time (ex: on a schedule)
+            while collection.compact(max_bytes=2**30)["packed_entries"]:
+                pass
+        Note:
+            shards are copied byte-for-byte (not unpickled) so memory stays bounded,
+            and it is safe to run while other processes are writing to the collection
+            returns dict(packed_entries, packed_bytes, dropped_entries, removed_files)
+        """
+        self.wait_for_checkpoints()
+        with FileLock(f"{self.folder_path}/compaction.lock"):
+            result = self.storage.compact(
+                small_shard_size=small_shard_size,
+                pack_size=pack_size,
+                max_bytes=max_bytes,
+                drop_superseded_error_runs=drop_superseded_error_runs,
+                writer_is_running=self.writer_is_running,
+            )
+        self._records = None
+        self._saved_record_count = None
+        return result
+    
+    def delete_experiment(self, experiment_number, error_number=None):
+        """
+        Examples:
+            collection.delete_experiment(3)                 # every run of experiment 3
+            collection.delete_experiment(3, error_number=2) # only one run
+        Note:
+            this only writes a tombstone (no records are touched), the experiment is gone right away,
+            the disk space comes back on the next .compact()
+            the tombstone lists the runs that exist right now, so a later run that re-uses the number (after an error) isn't deleted
+        """
+        self.wait_for_checkpoints()
+        self.storage.delete(experiment_number, error_number=error_number)
+        with self.lock:
+            all_experiment_sketches = self.experiment_sketches
+            deleted_sketches = [ each for each in all_experiment_sketches if each[0] == experiment_number and error_number in (None, each[1]) ]
+            if deleted_sketches:
+                for each in deleted_sketches:
+                    del all_experiment_sketches[each]
+                large_pickle_save(all_experiment_sketches, self.sub_paths.sketches)
+        self._records = None
+        self._saved_record_count = None
+    
+    def retain(self, *policies):
+        """
+        Examples:
+            collection.retain(KeepLastErrorRuns(5), KeepOnlySuccessfulAfter(days=30))
+        Note:
+            the policies are applied right away, and again after every experiment is saved
+            (experiments that are still running are left alone)
+        """
+        self._experiment_retention = policies
+        self.apply_retention()
+        return self
+    
+    def apply_retention(self):
+        if not self._experiment_retention:
+            return
+        entries = [ each for each in self.storage.entries if not each.get("in_progress", False) ]
+        expired = {}
+        for each_policy in self._experiment_retention:
+            for each_entry in each_policy.expired(entries):
+                expired[(each_entry["experiment_number"], each_entry["error_number"])] = each_entry
+        for experiment_number, error_number in expired:
+            self.delete_experiment(experiment_number, error_number=error_number)
+    
+    # 
+    # journal
+    # 
+    @property
+    def journal_segments(self):
+        import os
+        if not FS.is_folder(self.sub_paths.journal):
+            return []
+        names = [ each for each in os.listdir(self.sub_paths.journal) if each.endswith(".pickle") ]
+        return [ f"{self.sub_paths.journal}/{each}" for each in sorted(names) ]
+    
+    def write_to_journal(self, record):
+        if self._journal_file is None:
+            if self._writer_lock.file is None:
+                self._writer_lock.acquire()
+            self._journal_segment_number += 1
+            FS.ensure_is_folder(self.sub_paths.journal)
+            self._journal_file = open(f"{self.sub_paths.journal}/{self.writer_id}.{self._journal_segment_number:09}.pickle", 'ab')
+            # one pickler for the whole segment => the parent data of records is only written once
+            self._journal_pickler = pickle.Pickler(self._journal_file, protocol=pickle_protocol)
+            experiment_info = self.internal_experiment_info.local_data if self.internal_experiment_info is not None else {}
+            self._journal_pickler.dump(dict(
+                shard=self._experiment_shard,
+                info={ each_key: experiment_info.get(each_key, None) for each_key in experiment_index_keys },
+            ))
+        self._journal_pickler.dump(record)
+        # flushed to the OS (not fsync'd) so it survives the process being killed
+        self._journal_file.flush()
+    
+    def close_journal_segment(self):
+        """
+        returns the path of the segment (or None), the caller removes it once the records are in a shard
+        """
+        import os
+        if self._journal_file is None:
+            return None
+        journal_file = self._journal_file
+        self._journal_file, self._journal_pickler = None, None
+        os.fsync(journal_file.fileno())
+        journal_file.close()
+        return journal_file.name
+    
+    @staticmethod
+    def journal_info(journal_segment):
+        """
+        the manifest entry remembers the last journal segment that is in the shard
+        so if the process dies before removing the segment, .recover_journal() doesn't add its records a second time
+        """
+        if journal_segment is None:
+            return {}
+        return dict(journal_segment=FS.name(journal_segment)) # writer_id.segment_number
+    
+    @staticmethod
+    def is_committed(journal_segment, entry):
+        """
+        True when the records of the journal segment are already in the shard of the entry
+        """
+        committed = entry.get("journal_segment", None) if entry is not None else None
+        if committed is None:
+            return False
+        segment_name = FS.name(journal_segment)
+        # (segments of a writer are numbered in order, and they're saved in order)
+        return committed.split(".")[0] == segment_name.split(".")[0] and committed >= segment_name
+    
+    def recover_journal(self):
+        """
+        Note:
+            called automatically when a collection is opened
+            every journal segment left behind (the process died before a checkpoint/save)
+            is appended to the shard of its experiment and marked as had_error=True, recovered=True
+            segments that are already in the shard (the process died before removing them, see .journal_info()) are just removed
+            journals of writers that are still running are left alone
+            this only reads the journal (the un-checkpointed tail), never the whole collection
+            (records dropped by a Reservoir after being committed are still in the journal, and get recovered too)
+        """
+        import os
+        recovered_info = None
+        writer_locks = {}
+        def writer_is_running(writer_id):
+            if writer_id == self.writer_id:
+                return True
+            if writer_id is None: # (journals from before there were writer ids)
+                return False
+            if writer_id not in writer_locks:
+                writer_lock = FileLock(f"{self.sub_paths.writers}/{writer_id}.lock")
+                writer_locks[writer_id] = writer_lock if writer_lock.acquire(blocking=False) else None
+            return writer_locks[writer_id] is None
+        
+        latest_entries = None # shard => the latest entry of the shard
+        for each_segment in self.journal_segments:
+            name_parts = FS.name(each_segment).split(".") # writer_id.segment_number
+            if writer_is_running(name_parts[0] if len(name_parts) == 2 else None):
+                continue
+            header, *records = list(pickle_session_load(each_segment)) or [ None ]
+            if records:
+                if latest_entries is None:
+                    latest_entries = { each_entry["shard"]: each_entry for each_entry in self.storage.entries }
+                # (the process died after the records were saved, but before the segment was removed)
+                if self.is_committed(each_segment, latest_entries.get(header["shard"], None)):
+                    records = []
+            if records:
+                info = dict(header["info"])
+                info["had_error"] = True
+                if info.get("experiment_end_time", None) is None:
+                    info["experiment_end_time"] = os.path.getmtime(each_segment)
+                    if info.get("experiment_start_time", None) is not None:
+                        info["experiment_duration"] = info["experiment_end_time"] - info["experiment_start_time"]
+                if not self.quiet: print(f"Recovering {len(records)} records from journal: {FS.name(each_segment)}")
+                latest_entries[header["shard"]] = self.storage.save_shard(records, shard=header["shard"], recovered=True, **info, **self.journal_info(each_segment))
+                recovered_info = info
+            FS.remove(each_segment)
+        # the writer is gone, and so is its journal
+        for each_writer_lock in writer_locks.values():
+            if each_writer_lock is not None:
+                FS.remove(each_writer_lock.path)
+                each_writer_lock.release()
+        
+        # the next experiment continues after the recovered one (instead of re-using its number)
+        if recovered_info is not None and recovered_info.get("experiment_number", None) is not None:
+            with self.lock:
+                prev = self.load_prev_experiment_info()
+                if (recovered_info["experiment_number"], recovered_info["error_number"]) >= (prev["experiment_number"], prev["error_number"]):
+                    self.prev_internal_experiment_local_data = dict(recovered_info)
+                    large_pickle_save((self.collection_keeper.local_data, self.prev_internal_experiment_local_data), self.sub_paths.collection_info)
+            self._records = None
+            self._saved_record_count = None
+    
+    def wait_for_checkpoints(self):
+        if self._checkpoint_queue is not None:
+            self._checkpoint_queue.join()
+        if self._checkpoint_error is not None:
+            error, self._checkpoint_error = self._checkpoint_error, None
+            raise error
     
     @property
     def experiment_numbers(self):
         experiment_numbers = set()
+        self.wait_for_checkpoints()
         # must manually calculate because experiments can be deleted
-        for each in self.records:
+        # the manifest knows the experiment number of every shard (loaded or not), so only unsaved records need to be checked
+        for each_entry in self.storage.entries:
+            experiment_numbers.add(each_entry.get("experiment_number", None))
+        for each in self._new_records:
             experiment_numbers.add(each.get("experiment_number", None))
-        return tuple(experiment_numbers)
+        experiment_numbers.discard(None)
+        return tuple(sorted(experiment_numbers))
         
     def __getitem__(self, key):
         experiment_numbers = self.experiment_numbers
@@ -890,20 +4007,304 @@ class ExperimentCollection:
             key = experiment_numbers[key]
         if key not in experiment_numbers:
             return []
-        return tuple(each for each in self.records if each.get("experiment_number",None) == key)
+        return self.select(experiment_number=key)
+    
+    def select(self, where=None, columns=None, **experiment_filters):
+        """
+        Examples:
+            collection.select(experiment_number=3)
+            collection.select(had_error=False)
+            collection.select(experiment_number=lambda number: number > 10)
+            collection.select(where=lambda record: record["loss"] > 1, had_error=False)
+            collection.select(columns=["index", "loss"], had_error=False) # => ({ "index": 0, "loss": 0.9 }, ...)
+            collection.select(index=Compare("<", 500))
+        Note:
+            filters on anything in collection.index (experiment_number, had_error, experiment_duration, etc) are checked against the index,
+            so only the shards that can match get loaded (and loaded shards are cached, see cache_limit)
+            filters on other keys are checked against the min/max of each shard first (see zone_map_of()),
+            that works for values and Compare(), but not for lambdas
+            with columns, each result is a plain dict of just those keys, and only those keys get unpickled (see .load())
+        """
+        def where_matches(records):
+            return [ each for each in records if where(each) ] if where is not None else list(records)
+        
+        if columns is not None:
+            return self.select_columns(columns, where, experiment_filters)
+        self.wait_for_checkpoints()
+        # everything is already in memory
+        if self._records is not None:
+            return tuple(where_matches(records_matching(self.records, experiment_filters)))
+        
+        selected = []
+        for each_entry, record_filters in self.matching_entries(experiment_filters):
+            selected += where_matches(self.storage.select_records(each_entry, record_filters))
+        selected += where_matches(records_matching(self._new_records, experiment_filters))
+        return tuple(selected)
+    
+    def matching_entries(self, experiment_filters):
+        """
+        (entry, record_filters) of every entry that could have records matching the filters
+        filters on the experiment info (see split_filters()) are checked against the entry,
+        the rest (record_filters) are checked against the entry's zone map (see zone_map_of()) and then on each record
+        """
+        matching = []
+        for each_entry in self.storage.entries:
+            shard_filters, record_filters = self.split_filters(each_entry, experiment_filters)
+            if all(matches(each_entry[each_key], each_condition) for each_key, each_condition in shard_filters.items()):
+                if entry_could_match(each_entry, record_filters):
+                    matching.append((each_entry, record_filters))
+        return matching
+    
+    def split_filters(self, entry, experiment_filters):
+        """
+        (shard_filters, record_filters)
+        Note:
+            only the keys in .index_filter_keys are checked against the entry,
+            the entry also has bookkeeping (shard, offset, length, sequence, etc) that a record could have a key for too
+        """
+        shard_filters, record_filters = {}, {}
+        for each_key, each_condition in (experiment_filters or {}).items():
+            if each_key in self.index_filter_keys and each_key in entry:
+                shard_filters[each_key] = each_condition
+            else:
+                record_filters[each_key] = each_condition
+        return shard_filters, record_filters
+    
+    def select_columns(self, columns, where=None, experiment_filters=None):
+        """
+        (see .select(columns=...))
+        where gets the row (only the columns), filters can be on any key
+        """
+        columns = tuple(dict.fromkeys((columns,) if isinstance(columns, str) else columns))
+        experiment_filters = experiment_filters or {}
+        def rows_matching(rows, filters):
+            if not filters and where is None:
+                return rows
+            return [
+                each_row for each_row in (
+                    { each_key: each_row[each_key] for each_key in columns }
+                        for each_row in rows
+                            if all(matches(each_row[each_key], each_condition) for each_key, each_condition in filters.items())
+                )
+                    if where is None or where(each_row)
+            ]
+        
+        self.wait_for_checkpoints()
+        # every key a filter needs gets loaded too
+        loaded_columns = columns + tuple(each for each in experiment_filters if each not in columns)
+        if self._records is not None:
+            return tuple(rows_matching((project(each, loaded_columns) for each in self.records), experiment_filters))
+        
+        selected = []
+        for each_entry, record_filters in self.matching_entries(experiment_filters):
+            needed_columns = columns + tuple(each for each in record_filters if each not in columns)
+            selected += rows_matching(self.storage.load_columns(each_entry, needed_columns), record_filters)
+        selected += rows_matching((project(each, loaded_columns) for each in self._new_records), experiment_filters)
+        return tuple(selected)
+    
+    def load(self, columns, **experiment_filters):
+        """
+        Example:
+            data = collection.load(columns=["index", "loss"], had_error=False)
+            plot(data["index"], data["loss"])
+        Note:
+            one list per column (in the same order as .select()), only those keys get unpickled (see .select(columns=...))
+        """
+        columns = (columns,) if isinstance(columns, str) else tuple(columns)
+        rows = self.select(columns=columns, **experiment_filters)
+        return { each_key: [ each_row[each_key] for each_row in rows ] for each_key in columns }
+    
+    # 
+    # parallel
+    # 
+    def map_entries(self, entries, function=None, experiment_filters=None, workers=None, pool=None):
+        """
+        runs shard_task() for every entry (on .workers threads/processes), results are in the same order as the entries
+        """
+        workers = workers or self.workers
+        pool = check_pool(pool or self.pool)
+        # (filters on the experiment info were already checked, the rest are checked on each record)
+        record_filters = [ self.split_filters(each_entry, experiment_filters)[1] for each_entry in entries ]
+        if not workers or len(entries) < 2:
+            return [ shard_task(self.storage, each_entry, function, each_filters) for each_entry, each_filters in zip(entries, record_filters) ]
+        from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+        from itertools import repeat
+        if pool == "processes":
+            if not isinstance(self.storage, (ShardStorage, SqliteStorage)):
+                raise Exception(f'''\n\npool="processes" only works on an ExperimentCollection, use pool="threads" instead\n''')
+            # (each process opens the collection itself, only the results get sent back)
+            storage = (type(self.storage), self.storage.folder_path)
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                return list(executor.map(shard_task, repeat(storage), entries, repeat(function), record_filters))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(shard_task, repeat(self.storage), entries, repeat(function), record_filters))
+    
+    def map_shards(self, function, workers=None, pool=None, **experiment_filters):
+        """
+        Examples:
+            best_losses = collection.map_shards(lambda records: min(each["loss"] for each in records), had_error=False)
+            # every core (with processes, the function has to be importable, ex: defined at the top level of a file)
+            summaries = collection.map_shards(summarize, workers=8, pool="processes")
+        Note:
+            function gets the records of one experiment run at a time, the results are in experiment order
+            filters work like .select() (ones on collection.index keys pick the shards, the rest filter the records)
+            only saved records are included (and with pool="processes", only the results are sent back, not the records)
+        """
+        self.wait_for_checkpoints()
+        entries = [ each_entry for each_entry, _ in self.matching_entries(experiment_filters) ]
+        return self.map_entries(entries, function, experiment_filters, workers=workers, pool=pool)
+    
+    def filter_records(self, predicate, workers=None, pool=None, **experiment_filters):
+        """
+        Examples:
+            collection.filter_records(lambda record: record["loss"] > 10, workers=8)
+        Note:
+            like .select(where=predicate), but each shard is loaded and checked in parallel (see .map_shards())
+        """
+        from functools import partial
+        return tuple(
+            each
+                for each_batch in self.map_shards(partial(records_where, predicate), workers=workers, pool=pool, **experiment_filters)
+                    for each in each_batch
+        )
+    
+    # 
+    # watching
+    # 
+    @staticmethod
+    def run_of(entry):
+        # (the error_number of a run changes when it finishes, the start time doesn't)
+        return (entry.get("experiment_number", None), entry.get("experiment_start_time", None))
+    
+    def runs_seen_so_far(self):
+        self.wait_for_checkpoints()
+        return { self.run_of(each): each for each in self.storage.entries }
+    
+    def new_records_since(self, seen):
+        """
+        seen => (experiment_number, experiment_start_time) => the last entry of that run that was seen (this updates it)
+        returns [ (entry, new_records), ... ] for every run that got new records (new experiments, checkpoints, recovered journals)
+        """
+        self.wait_for_checkpoints()
+        updates = []
+        for each_entry in self.storage.entries:
+            run = self.run_of(each_entry)
+            previous_entry = seen.get(run, None)
+            # (compaction moves entries without changing their record_count)
+            if previous_entry is None or each_entry["record_count"] > previous_entry["record_count"]:
+                new_records = self.storage.load_new_records(each_entry, previous_entry)
+                if new_records:
+                    updates.append((LazyDict(each_entry), new_records))
+            seen[run] = each_entry
+        return updates
+    
+    def watch(self, poll_seconds=0.1, max_poll_seconds=5, idle_timeout=None, from_start=False):
+        """
+        Examples:
+            for entry, new_records in collection.watch():
+                print(f"experiment {entry.experiment_number} has {len(new_records)} new records")
+        Note:
+            yields every time an experiment is saved or checkpointed (by any process), new_records are only the records that weren't yielded before
+            checking only reads what was appended to the manifests, and while nothing changes it checks less often
+            (the wait goes from poll_seconds up to max_poll_seconds)
+            idle_timeout => stop once nothing new has happened for that many seconds
+            from_start=True => first yields everything that is already in the collection
+        """
+        import time
+        seen = {} if from_start else self.runs_seen_so_far()
+        wait, last_change = poll_seconds, now()
+        while True:
+            updates = self.new_records_since(seen)
+            for each_update in updates:
+                yield each_update
+            if updates:
+                wait, last_change = poll_seconds, now()
+            elif idle_timeout is not None and now() - last_change >= idle_timeout:
+                return
+            else:
+                wait = min(wait * 1.5, max_poll_seconds)
+            time.sleep(wait)
+    
+    async def watch_async(self, poll_seconds=0.1, max_poll_seconds=5, idle_timeout=None, from_start=False):
+        """
+        Examples:
+            async for entry, new_records in collection.watch_async():
+                await dashboard.update(new_records)
+        Note:
+            same as .watch(), the loading runs in a thread so the event loop isn't blocked
+            (ex: one task per collection for a dashboard that watches many of them)
+        """
+        import asyncio
+        loop = asyncio.get_running_loop()
+        seen = {} if from_start else await loop.run_in_executor(None, self.runs_seen_so_far)
+        wait, last_change = poll_seconds, now()
+        while True:
+            updates = await loop.run_in_executor(None, self.new_records_since, seen)
+            for each_update in updates:
+                yield each_update
+            if updates:
+                wait, last_change = poll_seconds, now()
+            elif idle_timeout is not None and now() - last_change >= idle_timeout:
+                return
+            else:
+                wait = min(wait * 1.5, max_poll_seconds)
+            await asyncio.sleep(wait)
     
     def save(self):
         relative_path = FS.make_relative_path(to=self.folder_path)
         if not self.quiet: print(f"Saving experiment: {self.internal_experiment_info.local_data}")
         FS.ensure_is_folder(self.folder_path)
         # save basic collection info
-        large_pickle_save((self.collection_keeper.local_data, self.internal_experiment_info.local_data), self.sub_paths.collection_info)
-        records = self.records
-        if not self.quiet: print(f"Saving {len(records)} records")
-        # save records
-        large_pickle_save(records, self.sub_paths.records)
-        self._records = records
+        with self.lock:
+            # (unless another writer started an experiment after this one, then it decides the next experiment number)
+            if self.load_prev_experiment_info()["experiment_number"] == self.internal_experiment_info.local_data["experiment_number"]:
+                large_pickle_save((self.collection_keeper.local_data, self.internal_experiment_info.local_data), self.sub_paths.collection_info)
+        # pull in records still sitting in per-thread buffers
+        keepers_to_flush = [ self.collection_keeper ]
+        while keepers_to_flush:
+            each_keeper = keepers_to_flush.pop()
+            each_keeper.flush()
+            keepers_to_flush.extend(each_keeper.sub_record_keepers)
+        # the experiment is over, so its shared memory (see RecordKeeper.shared_memory_recorder()) can go
+        keepers_to_close = [ self.internal_experiment_info ]
+        while keepers_to_close:
+            each_keeper = keepers_to_close.pop()
+            each_keeper.close_shared_memory()
+            keepers_to_close.extend(each_keeper.sub_record_keepers)
+        # save the sketches of this experiment
+        experiment_sketches = self.internal_experiment_info.sketches
+        if experiment_sketches:
+            experiment_info = self.internal_experiment_info.local_data
+            with self.lock:
+                all_experiment_sketches = self.experiment_sketches
+                all_experiment_sketches[(experiment_info["experiment_number"], experiment_info["error_number"])] = experiment_sketches
+                large_pickle_save(all_experiment_sketches, self.sub_paths.sketches)
+        # save only the new records (as their own shard, older shards are never rewritten)
+        new_records = list(self._new_records)
+        if not self.quiet: print(f"Saving {len(new_records)} records")
+        experiment_info = self.internal_experiment_info.local_data
+        # (if there were checkpoints, this only appends the tail to the experiment's shard)
+        self.wait_for_checkpoints()
+        journal_segment = self.close_journal_segment()
+        # (the same copies of the parent data as the checkpoints, see .snapshot_records())
+        snapshot, sync_snapshot = self.snapshot_records(new_records)
+        sync_snapshot()
+        self._parent_snapshots = {}
+        self.storage.save_shard(
+            snapshot,
+            shard=self._experiment_shard,
+            **{ each_key: experiment_info[each_key] for each_key in experiment_index_keys },
+            **self.journal_info(journal_segment),
+        )
+        # the records are in the shard, so the journal is no longer needed
+        if journal_segment is not None:
+            FS.remove(journal_segment)
+        if self._records is not None:
+            self._records += new_records
+        if self._saved_record_count is not None:
+            self._saved_record_count += len(new_records)
         self._new_records.clear() # remove out new records whenever they're saved to prevent .reload() from adding duplicates
+        self.apply_retention()
         if not self.quiet: print(f"Experiment collection saved in: {relative_path}")
     
     def new_experiment(self, experiment_info=None, **kwargs):
@@ -914,14 +4315,29 @@ class ExperimentCollection:
         # - self.collection_keeper.local_data (root) => data about the collection
         # - self.internal_experiment_info            => automated data about the experiment
         # - self.current_experiment                  => user-data about the experiment
-        self.internal_experiment_info = RecordKeeper(
-            experiment_number=self.prev_internal_experiment_local_data["experiment_number"] + 1 if not self.prev_internal_experiment_local_data["had_error"] else self.prev_internal_experiment_local_data["experiment_number"],
-            error_number=self.prev_internal_experiment_local_data["error_number"]+1,
-            had_error=True, # default assumption => is later set to False (if it succeeds)
-            experiment_start_time=now(),
-        ).set_parent(self.collection_keeper)
+        # (other writers can see that this one is running)
+        if self._writer_lock.file is None:
+            self._writer_lock.acquire()
+        with self.lock:
+            prev = self.load_prev_experiment_info()
+            self.internal_experiment_info = RecordKeeper(
+                experiment_number=prev["experiment_number"] + 1 if not prev["had_error"] else prev["experiment_number"],
+                error_number=prev["error_number"]+1,
+                had_error=True, # default assumption => is later set to False (if it succeeds)
+                experiment_start_time=now(),
+            ).set_parent(self.collection_keeper)
+            # claim the experiment number
+            # (other writers see it like a finished experiment, and take the next number)
+            experiment_number = self.internal_experiment_info.local_data["experiment_number"]
+            large_pickle_save((self.collection_keeper.local_data, dict(experiment_number=experiment_number, error_number=0, had_error=False)), self.sub_paths.collection_info)
+        from copy import deepcopy
+        for each_key, each_sketch in self._sketch_templates.items():
+            self.internal_experiment_info.sketch(each_key, deepcopy(each_sketch))
         
         self.current_experiment = RecordKeeper(experiment_info).set_parent(self.internal_experiment_info)
+        self._parent_snapshots = {}
+        self._experiment_shard = self.storage.new_shard_name(**self.internal_experiment_info.local_data)
+        self._last_checkpoint_time = now()
         
         def save_experiment(_, error, traceback):
             # mutate the internal experiment record keeper based on having an error or not
@@ -953,4 +4369,187 @@ class ExperimentCollection:
         return Experiment(
             internal_experiment_info=self.current_experiment,
             save_experiment=save_experiment,
-        )
\ No newline at end of file
+        )
+class MergedStorage:
+    """
+    The storage of a MergedCollection (same interface as ShardStorage, but read-only)
+    Note:
+        entries of every source get:
+            experiment_number          (renumbered, or (namespace, experiment_number))
+            original_experiment_number (the number inside of its own collection)
+            collection                 (the namespace of its collection)
+        records are wrapped instead of copied: the wrapper puts those three values in front of the record's parent data
+        parent data that is identical across collections (ex: the same model config) is only kept once
+    """
+    def __init__(self, sources, numbering="renumber", cache_limit=2**30):
+        if numbering not in ("renumber", "namespace"):
+            raise Exception(f'''\n\nMergedCollection(numbering={repr(numbering)}) isn't supported, numbering can be "renumber" or "namespace"\n''')
+        self.sources    = sources # list of (namespace, storage)
+        self.numbering  = numbering
+        self.cache      = ShardCache(cache_limit)
+        self._entries   = None
+        self._originals = {} # id(entry) => (storage, entry in its own collection)
+        self._parents   = {} # super_hash => parent data
+    
+    @property
+    def entries(self):
+        # hundreds of manifests are read once, not on every call (see .reload())
+        if self._entries is None:
+            entries = []
+            self._originals = {}
+            new_numbers = {}
+            for source_index, (namespace, storage) in enumerate(self.sources):
+                source_entries = storage.entries
+                for each_number in sorted(set(each.get("experiment_number", None) for each in source_entries) - { None }):
+                    new_numbers[source_index, each_number] = len(new_numbers) + 1 if self.numbering == "renumber" else (namespace, each_number)
+                for each_entry in source_entries:
+                    original_number = each_entry.get("experiment_number", None)
+                    entry = dict(
+                        each_entry,
+                        experiment_number=new_numbers.get((source_index, original_number), None),
+                        original_experiment_number=original_number,
+                        collection=namespace,
+                    )
+                    self._originals[id(entry)] = (storage, each_entry)
+                    entries.append(entry)
+            self._entries = entries
+        return self._entries
+    
+    def reload(self):
+        self._entries = None
+        self.cache.clear()
+        for _, each_storage in self.sources:
+            each_storage.cache.clear()
+    
+    def wrap(self, records, entry):
+        renumbered_info = dict(
+            experiment_number=entry["experiment_number"],
+            original_experiment_number=entry["original_experiment_number"],
+            collection=entry["collection"],
+        )
+        canonical_parents = {} # id(parent data) => the one copy that is kept
+        def canonical(parent):
+            if id(parent) not in canonical_parents:
+                key = attempt(lambda: super_hash(parent), default=id(parent))
+                canonical_parents[id(parent)] = self._parents.setdefault(key, parent)
+            return canonical_parents[id(parent)]
+        
+        wrapped = []
+        for each_record in records:
+            itself, ancestors = (each_record.itself, each_record.ancestors) if hasattr(each_record, "ancestors") else (dict(each_record), ())
+            wrapped.append(AncestorDict(
+                ancestors=(renumbered_info, *(canonical(each) for each in ancestors)),
+                itself=itself,
+            ))
+        return wrapped
+    
+    def load_shard(self, entry):
+        storage, original_entry = self._originals[id(entry)]
+        return self.wrap(storage.load_shard(original_entry), entry)
+    
+    def cached_shard(self, entry):
+        storage, original_entry = self._originals[id(entry)]
+        key = (storage.folder_path, entry["shard"], entry["record_count"])
+        return self.cache.get(key, lambda: self.load_shard(entry))
+    
+    def select_records(self, entry, record_filters):
+        storage, original_entry = self._originals[id(entry)]
+        # sqlite can filter before unpickling, shard files have to be loaded anyways (so use the cache)
+        if isinstance(storage, SqliteStorage) and record_filters:
+            return self.wrap(storage.select_records(original_entry, record_filters), entry)
+        return records_matching(self.cached_shard(entry), record_filters)
+    
+    def load_columns(self, entry, columns):
+        storage, original_entry = self._originals[id(entry)]
+        rows = storage.load_columns(original_entry, columns)
+        renumbered_info = { each_key: entry[each_key] for each_key in ("experiment_number", "original_experiment_number", "collection") if each_key in columns }
+        for each_row in rows:
+            each_row.update(renumbered_info)
+        return rows
+    
+    def load_records(self):
+        records = []
+        for each_entry in self.entries:
+            records += self.load_shard(each_entry)
+        return records
+
+class MergedCollection:
+    """
+    Examples:
+        # collections copied back from different machines
+        merged = MergedCollection([ "node1/my_study", "node2/my_study" ])
+        merged = MergedCollection("results/*/my_study") # glob
+        merged.experiment_numbers                       # (1, 2, 3, ...) numbered across all of them
+        merged[3]
+        merged.select(had_error=False, collection="results/node2/my_study")
+        
+        # keep the original numbers instead
+        merged = MergedCollection(dict(node1="node1/my_study", node2="node2/my_study"), numbering="namespace")
+        merged[("node2", 3)]
+    Note:
+        this is read-only, nothing in the source folders is rewritten
+        listing/selecting works like ExperimentCollection (only the shards that can match get loaded)
+    """
+    def __init__(self, collections, numbering="renumber", extension=".collection", cache_limit=2**30, workers=None):
+        import glob
+        if isinstance(collections, str):
+            collections = [ collections ]
+        if not isinstance(collections, dict):
+            namespaces = {}
+            for each_path in collections:
+                each_path = each_path[:-len(extension)] if each_path.endswith(extension) else each_path
+                for each_match in sorted(glob.glob(each_path+extension)) or [ each_path+extension ]:
+                    namespaces[each_match[:-len(extension)]] = each_match
+            collections = namespaces
+        
+        sources = []
+        for namespace, each_path in collections.items():
+            folder_path = FS.make_absolute_path(each_path if each_path.endswith(extension) else each_path+extension)
+            if not FS.is_folder(folder_path):
+                raise Exception(f'''\n\nMergedCollection(): {repr(each_path)} isn't a collection folder ({folder_path} doesn't exist)\n''')
+            if FS.is_file(f"{folder_path}/collection.sqlite"):
+                storage = SqliteStorage(folder_path, cache_limit=0)
+            else:
+                storage = ShardStorage(folder_path, cache_limit=0)
+            sources.append((namespace, storage))
+        
+        self.collections      = tuple(collections.keys())
+        self.storage          = MergedStorage(sources, numbering=numbering, cache_limit=cache_limit)
+        self._records            = None
+        self._saved_record_count = None
+        self._new_records        = []
+        self._loaded_segments    = ([], {})
+        self.workers          = workers # (threads)
+        self.pool             = "threads"
+    
+    def wait_for_checkpoints(self):
+        pass # nothing is written
+    
+    def reload(self):
+        self._records = None
+        self._saved_record_count = None
+        self.storage.reload()
+    
+    # these only use .storage/._records, so they work the same as they do for ExperimentCollection
+    load_records       = ExperimentCollection.load_records
+    map_entries        = ExperimentCollection.map_entries
+    map_shards         = ExperimentCollection.map_shards
+    filter_records     = ExperimentCollection.filter_records
+    records            = ExperimentCollection.records
+    __len__            = ExperimentCollection.__len__
+    index              = ExperimentCollection.index
+    experiment_numbers = ExperimentCollection.experiment_numbers
+    select             = ExperimentCollection.select
+    select_columns     = ExperimentCollection.select_columns
+    matching_entries   = ExperimentCollection.matching_entries
+    split_filters      = ExperimentCollection.split_filters
+    index_filter_keys  = experiment_index_keys + ("collection", "original_experiment_number")
+    load               = ExperimentCollection.load
+    
+    def __getitem__(self, key):
+        experiment_numbers = self.experiment_numbers
+        if isinstance(key, int) and key < 0:
+            key = experiment_numbers[key]
+        if key not in experiment_numbers:
+            return []
+        return self.select(experiment_number=key)
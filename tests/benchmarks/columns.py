@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+# loading 2 keys out of 30 from a 1M record collection
+# compares loading every record (then reading the 2 keys) against collection.load(columns=...)
+from rigorous_recorder import RecordKeeper, ExperimentCollection
+from time import time as now
+import shutil
+
+number_of_records = 1_000_000
+number_of_keys = 30
+
+folder = "data.ignore/benchmarks/columns"
+shutil.rmtree(folder+".collection", ignore_errors=True)
+collection = ExperimentCollection(folder, quiet=True)
+for each_experiment in range(5):
+    with collection.new_experiment() as experiment_recorder:
+        for each_index in range(number_of_records // 5):
+            experiment_recorder.push(index=each_index, loss=each_index/number_of_records, **{ f"metric_{each}": each_index * each for each in range(number_of_keys - 2) })
+
+def measure(name, function):
+    start = now()
+    function()
+    print(f'''{name:>36} {(now() - start):>8.2f}s''')
+
+def every_record():
+    records = ExperimentCollection(folder, quiet=True).records
+    return [ each["index"] for each in records ], [ each["loss"] for each in records ]
+
+print(f'''{"operation":>36} {"time":>9}''')
+measure("load every record, read 2 keys", every_record)
+measure("load(columns=[index, loss])", lambda: ExperimentCollection(folder, quiet=True).load(columns=["index", "loss"]))
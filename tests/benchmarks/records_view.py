@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+# repeated access to collection.records (len, indexing, experiment_numbers, etc) on a 5M record collection
+# compares the view against concatenating the loaded and pending records on every access (how .records used to work)
+from rigorous_recorder import RecordKeeper, ExperimentCollection
+from time import time as now
+import shutil
+
+number_of_records = 5_000_000
+repeats = 20
+
+folder = "data.ignore/benchmarks/records_view"
+shutil.rmtree(folder+".collection", ignore_errors=True)
+collection = ExperimentCollection(folder, quiet=True)
+for each_experiment in range(5):
+    with collection.new_experiment() as experiment_recorder:
+        for each_index in range(number_of_records // 5):
+            experiment_recorder.push(index=each_index, loss=each_index/number_of_records)
+collection = ExperimentCollection(folder, quiet=True)
+collection.records # loads the shards
+
+def concatenated():
+    return collection._records + collection._new_records
+
+def measure(name, function):
+    start = now()
+    for _ in range(repeats):
+        function()
+    print(f'''{name:>28} {(now() - start) / repeats * 1000:>10.2f}ms''')
+
+print(f'''{"operation":>28} {"per call":>12}''')
+measure("len(concatenated)",        lambda: len(concatenated()))
+measure("len(collection.records)",  lambda: len(collection.records))
+measure("len(collection)",          lambda: len(collection))
+measure("concatenated[-1]",         lambda: concatenated()[-1])
+measure("collection.records[-1]",   lambda: collection.records[-1])
+measure("collection.records[:100]", lambda: collection.records[:100])
+measure("iterate concatenated",     lambda: sum(1 for _ in concatenated()))
+measure("iterate collection.records", lambda: sum(1 for _ in collection.records))
+measure("collection.experiment_numbers", lambda: collection.experiment_numbers)
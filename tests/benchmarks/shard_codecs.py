@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+# size, save time and load time of a collection shard for every available codec
+from rigorous_recorder import RecordKeeper, ExperimentCollection, available_codecs
+from random import random
+from time import time as now
+import os
+import shutil
+
+number_of_records = 200_000
+
+print(f'''{"codec":>6} {"shard size":>11} {"ratio":>6} {"save time":>10} {"load time":>10}''')
+raw_size = None
+for each_codec in available_codecs():
+    folder = f"data.ignore/benchmarks/shard_codecs/{each_codec}"
+    shutil.rmtree(folder+".collection", ignore_errors=True)
+    collection = ExperimentCollection(folder, quiet=True, codec=each_codec)
+    with collection.new_experiment() as experiment_recorder:
+        train_recorder = RecordKeeper(training=True, model="model1").set_parent(experiment_recorder)
+        for each_index in range(number_of_records):
+            train_recorder.push(index=each_index, loss=round(random(), 4), accuracy=random())
+        start = now()
+    save_time = now() - start
+    
+    entry = collection.index[-1]
+    size = os.path.getsize(f"{collection.folder_path}/{entry.shard}")
+    raw_size = raw_size or size
+    start = now()
+    assert len(ExperimentCollection(folder, quiet=True).records) == number_of_records
+    load_time = now() - start
+    print(f'''{each_codec:>6} {size/1024/1024:>9.1f}MB {raw_size/size:>5.1f}x {save_time:>9.2f}s {load_time:>9.2f}s''')
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# compares the old byte-buffer pickle helpers against the current streaming ones (peak memory and time)
+# each measurement runs in its own process so ru_maxrss isn't polluted by the other runs
+import sys
+import os
+import pickle
+import resource
+import subprocess
+from time import time as now
+
+number_of_records = 300_000
+path = "data.ignore/benchmarks/streaming_pickle.pickle"
+
+def bytes_buffer_save(variable, file_path):
+    bytes_out = pickle.dumps(variable, protocol=4)
+    max_bytes = 2**31 - 1
+    with open(file_path, 'wb') as f_out:
+        for idx in range(0, len(bytes_out), max_bytes):
+            f_out.write(bytes_out[idx:idx+max_bytes])
+
+def bytes_buffer_load(file_path):
+    max_bytes = 2**31 - 1
+    bytes_in = bytearray(0)
+    input_size = os.path.getsize(file_path)
+    with open(file_path, 'rb') as f_in:
+        for _ in range(0, input_size, max_bytes):
+            bytes_in += f_in.read(max_bytes)
+    return pickle.loads(bytes_in)
+
+def peak_megabytes():
+    # linux reports kilobytes, mac reports bytes
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+if len(sys.argv) > 1:
+    from rigorous_recorder import RecordKeeper, large_pickle_save, large_pickle_load
+    method, operation = sys.argv[1], sys.argv[2]
+    save, load = (bytes_buffer_save, bytes_buffer_load) if method == "bytes_buffer" else (large_pickle_save, large_pickle_load)
+    if operation == "save":
+        keeper = RecordKeeper(benchmark=True)
+        for each_index in range(number_of_records):
+            keeper.commit(additional_info=dict(index=each_index, loss=each_index/number_of_records, weights=bytes(100)))
+        baseline = peak_megabytes()
+        start = now()
+        save(keeper, path)
+    else:
+        baseline = peak_megabytes()
+        start = now()
+        keeper = load(path)
+    duration = now() - start
+    print(f"{duration} {peak_megabytes() - baseline}")
+    sys.exit(0)
+
+os.makedirs(os.path.dirname(path), exist_ok=True)
+print(f'''{"method":>14} {"save time":>10} {"save peak":>10} {"load time":>10} {"load peak":>10} {"file":>10}''')
+for method in ("bytes_buffer", "streaming"):
+    results = []
+    for operation in ("save", "load"):
+        output = subprocess.run([ sys.executable, __file__, method, operation ], capture_output=True, text=True, check=True).stdout
+        results += [ float(each) for each in output.split() ]
+    save_time, save_peak, load_time, load_peak = results
+    print(f'''{method:>14} {save_time:>9.2f}s {save_peak:>8.0f}MB {load_time:>9.2f}s {load_peak:>8.0f}MB {os.path.getsize(path)/1024/1024:>8.0f}MB''')
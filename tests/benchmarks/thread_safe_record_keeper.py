@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+# compares a RecordKeeper guarded by an external lock against RecordKeeper().thread_safe()
+from rigorous_recorder import RecordKeeper
+from threading import Thread, Lock
+from time import time as now
+
+records_per_thread = 20_000
+
+def run(number_of_threads, thread_safe):
+    keeper = RecordKeeper(benchmark=True)
+    if thread_safe:
+        keeper.thread_safe()
+        def worker():
+            for each_index in range(records_per_thread):
+                keeper.add(index=each_index)
+                keeper.commit(additional_info=dict(loss=0.5))
+    else:
+        lock = Lock()
+        def worker():
+            for each_index in range(records_per_thread):
+                with lock:
+                    keeper.add(index=each_index)
+                    keeper.commit(additional_info=dict(loss=0.5))
+    
+    threads = [ Thread(target=worker) for _ in range(number_of_threads) ]
+    start = now()
+    for each in threads: each.start()
+    for each in threads: each.join()
+    assert len(keeper) == number_of_threads * records_per_thread
+    return now() - start
+
+print(f'''{"threads":>8} {"external lock":>15} {"thread_safe()":>15}''')
+for number_of_threads in (1, 2, 4, 8, 16):
+    locked = run(number_of_threads, thread_safe=False)
+    buffered = run(number_of_threads, thread_safe=True)
+    print(f'''{number_of_threads:>8} {locked:>14.3f}s {buffered:>14.3f}s''')
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+from rigorous_recorder import RecordKeeper, ExperimentCollection, pickle_stream_append, pickle_stream_load
+from random import random
+import os
+import sys
+import shutil
+
+# 
+# child process: checkpoints, then gets killed (no chance to save)
+# 
+if len(sys.argv) > 1 and sys.argv[1] == "--killed-experiment":
+    collection = ExperimentCollection("data.ignore/checkpoints_killed", quiet=True, checkpoint_every=1_000)
+    with collection.new_experiment() as experiment_recorder:
+        for each_index in range(2_500):
+            experiment_recorder.push(index=each_index, loss=random())
+        collection.wait_for_checkpoints()
+        os._exit(1) # like a SIGKILL/OOM
+
+# 
+# normal run
+# 
+collection = ExperimentCollection("data.ignore/checkpoints", quiet=True, checkpoint_every=1_000)
+with collection.new_experiment() as experiment_recorder:
+    train_recorder = RecordKeeper(training=True).set_parent(experiment_recorder)
+    for each_index in range(10_500):
+        train_recorder.push(index=each_index, loss=random())
+        # checkpointed records are released from memory
+        assert len(collection._new_records) < 1_000
+    
+    # another process can already see the checkpointed part of the experiment
+    collection.wait_for_checkpoints()
+    observer = ExperimentCollection("data.ignore/checkpoints", quiet=True)
+    assert observer.index[-1].in_progress == True
+    assert len(observer[-1]) == 10_000
+
+# the exit-time save only appended the tail
+entry = collection.index[-1]
+assert entry.record_count == 10_500 and not entry.get("in_progress", False)
+assert [ each["index"] for each in collection[-1] ] == list(range(10_500))
+# records from earlier checkpoints get the final experiment info when loaded
+reopened = ExperimentCollection("data.ignore/checkpoints", quiet=True)
+assert all(each["had_error"] == False and each["error_number"] == 0 and each["experiment_end_time"] is not None for each in reopened[-1])
+assert all(each["had_error"] == False for each in reopened.records)
+
+# 
+# killed run
+# 
+import subprocess
+subprocess.run([ sys.executable, __file__, "--killed-experiment" ])
+killed = ExperimentCollection("data.ignore/checkpoints_killed", quiet=True)
+# everything up to the last checkpoint survived
+assert killed.index[-1].in_progress == True
+assert killed.index[-1].record_count == 2_000
+assert len(killed[-1]) == 2_000
+print(f'''killed.index[-1] = {killed.index[-1]}''')
+
+# 
+# commits don't wait for a checkpoint that is still being written
+# 
+from time import time as now, sleep
+shutil.rmtree("data.ignore/checkpoints_slow.collection", ignore_errors=True)
+slow = ExperimentCollection("data.ignore/checkpoints_slow", quiet=True, checkpoint_every=10)
+original_save_shard = slow.storage.save_shard
+def slow_save_shard(*args, **kwargs):
+    sleep(0.5)
+    return original_save_shard(*args, **kwargs)
+slow.storage.save_shard = slow_save_shard
+with slow.new_experiment() as experiment_recorder:
+    slowest_commit = 0
+    for each_index in range(30):
+        start = now()
+        experiment_recorder.push(index=each_index)
+        slowest_commit = max(slowest_commit, now() - start)
+    assert slowest_commit < 0.25, f"a commit waited {slowest_commit:.3f}s for a checkpoint"
+    assert len(slow) == 30
+assert [ each["index"] for each in slow[-1] ] == list(range(30))
+
+# 
+# parent data that changes while a checkpoint is being written
+# 
+for each_backend in ("shards", "sqlite"):
+    path = f"data.ignore/checkpoints_mutated_{each_backend}"
+    shutil.rmtree(f"{path}.collection", ignore_errors=True)
+    mutated = ExperimentCollection(path, quiet=True, backend=each_backend, checkpoint_every=10)
+    original_save_shard = mutated.storage.save_shard
+    def slow_save_shard(*args, original_save_shard=original_save_shard, **kwargs):
+        sleep(0.3)
+        return original_save_shard(*args, **kwargs)
+    mutated.storage.save_shard = slow_save_shard
+    with mutated.new_experiment() as experiment_recorder:
+        experiment_recorder["phase"] = "a"
+        for each_index in range(10):
+            experiment_recorder.push(index=each_index)
+        # (the checkpoint is still being written)
+        experiment_recorder["phase"] = "b"
+        for each_index in range(1_000):
+            experiment_recorder[f"key_{each_index}"] = each_index
+        mutated.wait_for_checkpoints()
+        # the checkpoint has the parent data from when it was made
+        observer = ExperimentCollection(path, quiet=True, backend=each_backend)
+        assert [ each["phase"] for each in observer[-1] ] == [ "a" ] * 10
+        assert "key_0" not in observer[-1][0]
+        experiment_recorder.push(index=10)
+    # (parent data that changed after a checkpoint still gets to the checkpointed records once the experiment is saved)
+    assert [ each["phase"] for each in mutated[-1] ] == [ "b" ] * 11
+
+# 
+# commits and len() don't re-read the manifests (every checkpoint adds to them)
+# 
+import threading
+shutil.rmtree("data.ignore/checkpoints_count.collection", ignore_errors=True)
+counted = ExperimentCollection("data.ignore/checkpoints_count", quiet=True, checkpoint_every=20)
+manifest_reads = []
+original_read_manifests = counted.storage.read_manifests
+def counting_read_manifests(*args, **kwargs):
+    if threading.current_thread() is threading.main_thread():
+        manifest_reads.append(1)
+    return original_read_manifests(*args, **kwargs)
+counted.storage.read_manifests = counting_read_manifests
+for each_experiment in range(2):
+    with counted.new_experiment() as experiment_recorder:
+        for each_index in range(1_000):
+            experiment_recorder.push(index=each_index)
+            assert len(counted) == each_experiment * 1_000 + each_index + 1
+# (the first len(), and the save at the end of each experiment)
+assert len(manifest_reads) <= 3, f"the manifests were read {len(manifest_reads)} times"
+assert len(counted) == 2_000
+counted.reload()
+assert len(counted) == 2_000
+assert len(ExperimentCollection("data.ignore/checkpoints_count", quiet=True)) == 2_000
+
+# 
+# parent data that is set after a checkpoint
+# 
+for each_backend in ("shards", "sqlite"):
+    for each_checkpoint_every in (10, 5):
+        path = f"data.ignore/checkpoints_parent_data_{each_backend}_{each_checkpoint_every}"
+        shutil.rmtree(f"{path}.collection", ignore_errors=True)
+        collection = ExperimentCollection(path, quiet=True, backend=each_backend, checkpoint_every=each_checkpoint_every)
+        with collection.new_experiment() as experiment_recorder:
+            model_recorder = RecordKeeper(model="a").set_parent(experiment_recorder)
+            # (same parent data as model_recorder, but it never changes)
+            other_recorder = RecordKeeper(model="a").set_parent(experiment_recorder)
+            for each_index in range(25):
+                (model_recorder if each_index % 2 else other_recorder).push(index=each_index)
+            collection.wait_for_checkpoints()
+            experiment_recorder["best_loss"] = 0.1
+            model_recorder["epochs"] = 3
+        
+        def check(collection):
+            assert len(collection.select(best_loss=0.1)) == 25
+            assert [ each["index"] for each in collection.select(columns=["index", "best_loss"], best_loss=0.1) ] == list(range(25))
+            assert all(each["best_loss"] == 0.1 for each in collection.records)
+            # (two parents that had the same data can't be told apart in the earlier saves, so those stay as they were)
+            assert all(each["epochs"] is None for each in collection.records if each["index"] % 2 == 0)
+        check(ExperimentCollection(path, quiet=True, backend=each_backend))
+        collection.compact()
+        check(ExperimentCollection(path, quiet=True, backend=each_backend))
+
+for each_backend in ("shards", "sqlite"):
+    path = f"data.ignore/checkpoints_parent_data_changed_{each_backend}"
+    shutil.rmtree(f"{path}.collection", ignore_errors=True)
+    collection = ExperimentCollection(path, quiet=True, backend=each_backend, checkpoint_every=10)
+    with collection.new_experiment() as experiment_recorder:
+        model_recorder = RecordKeeper(model="a").set_parent(experiment_recorder)
+        for each_index in range(10):
+            model_recorder.push(index=each_index)
+        collection.wait_for_checkpoints()
+        model_recorder["epochs"] = 3
+        for each_index in range(10, 20):
+            model_recorder.push(index=each_index)
+        collection.wait_for_checkpoints()
+        model_recorder["epochs"] = 4
+        # (a new parent that has the data model_recorder had at the first checkpoint)
+        RecordKeeper(model="a").set_parent(experiment_recorder).push(index=20)
+    reopened = ExperimentCollection(path, quiet=True, backend=each_backend)
+    assert [ each["epochs"] for each in reopened.records ] == [ 4 ] * 20 + [ None ]
+    assert len(reopened.select(epochs=4)) == 20
+
+# 
+# a cut-off checkpoint at the end of a shard is ignored, corrupt data in the middle is an error
+# 
+for each_codec in ("none", "zlib"):
+    path = f"data.ignore/checkpoints_corrupt.{each_codec}.pickle"
+    if os.path.isfile(path):
+        os.remove(path)
+    sizes = []
+    for each_index in range(3):
+        pickle_stream_append(list(range(each_index * 100, (each_index + 1) * 100)), path, codec=each_codec)
+        sizes.append(os.path.getsize(path))
+    with open(path, "r+b") as the_file:
+        the_file.truncate(sizes[-1] - 10)
+    assert [ len(each) for each in pickle_stream_load(path) ] == [ 100, 100 ]
+    if each_codec == "none":
+        # (the start of the second pickle)
+        with open(path, "r+b") as the_file:
+            the_file.seek(sizes[0])
+            the_file.write(b"\xff")
+        try:
+            list(pickle_stream_load(path))
+            assert False, "corrupt data followed by more data should raise"
+        except Exception as error:
+            assert "corrupt" in str(error) and path in str(error), error
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+from rigorous_recorder import RecordKeeper, ExperimentCollection, available_codecs, sniff_codec
+from random import random
+import os
+import shutil
+
+shutil.rmtree("data.ignore/codecs", ignore_errors=True)
+
+for each_codec in available_codecs():
+    # 
+    # collection (checkpoints append one more compressed stream to the same shard)
+    # 
+    collection = ExperimentCollection(f"data.ignore/codecs/{each_codec}", quiet=True, codec=each_codec, checkpoint_every=400)
+    with collection.new_experiment() as experiment_recorder:
+        for each_index in range(1_000):
+            experiment_recorder.push(index=each_index, loss=random())
+    
+    collection = ExperimentCollection(f"data.ignore/codecs/{each_codec}", quiet=True)
+    entry = collection.index[-1]
+    assert entry.codec == each_codec
+    assert sniff_codec(f"{collection.folder_path}/{entry.shard}") == each_codec
+    assert [ each["index"] for each in collection[1] ] == list(range(1_000))
+    assert len(collection.records) == 1_000
+    # the cache counts the loaded records, not the (compressed) bytes of the shard
+    shard_size = os.path.getsize(f"{collection.folder_path}/{entry.shard}")
+    if each_codec != "none":
+        assert collection.storage.cache.size > shard_size, f"{each_codec}: {collection.storage.cache.size} <= {shard_size}"
+    
+    # 
+    # save_to/load_from
+    # 
+    keeper = RecordKeeper(codec=each_codec)
+    for each_index in range(100):
+        keeper.push(index=each_index)
+    keeper.save_to(f"data.ignore/codecs/keeper.{each_codec}.pickle", codec=each_codec)
+    loaded = RecordKeeper.load_from(f"data.ignore/codecs/keeper.{each_codec}.pickle")
+    assert [ each["index"] for each in loaded.records ] == list(range(100))
+    assert loaded.local_data["codec"] == each_codec
+
+# 
+# cache_limit evicts (compressed) shards once the loaded records are over the limit
+# 
+collection = ExperimentCollection("data.ignore/codecs/evict", quiet=True, codec="lzma")
+for _ in range(4):
+    with collection.new_experiment() as experiment_recorder:
+        for each_index in range(1_000):
+            experiment_recorder.push(index=each_index, loss=random())
+cache_limit = 2 * max(os.path.getsize(f"{collection.folder_path}/{each.shard}") for each in collection.index)
+collection = ExperimentCollection("data.ignore/codecs/evict", quiet=True, cache_limit=cache_limit)
+for each_number in range(1, 5):
+    assert len(collection[each_number]) == 1_000
+cache = collection.storage.cache
+assert len(cache.shards) < 4, f"{len(cache.shards)} shards stayed loaded with cache_limit={cache_limit} (size={cache.size})"
+assert cache.size <= cache_limit or len(cache.shards) == 1
+
+try:
+    ExperimentCollection("data.ignore/codecs/unknown", quiet=True, codec="not_a_codec")
+    assert False, "unknown codec should raise"
+except Exception as error:
+    assert "not_a_codec" in str(error)
+
+print(f'''available_codecs() = {available_codecs()}''')
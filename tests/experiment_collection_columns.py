@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+from rigorous_recorder import RecordKeeper, ExperimentCollection, MergedCollection
+import shutil
+import pickle
+
+for each_backend in ("shards", "sqlite"):
+    path = f"data.ignore/columns_{each_backend}"
+    shutil.rmtree(f"{path}.collection", ignore_errors=True)
+    collection = ExperimentCollection(path, quiet=True, backend=each_backend, checkpoint_every=40)
+    for each_experiment in range(3):
+        with collection.new_experiment(learning_rate=each_experiment/10) as experiment_recorder:
+            train_recorder = RecordKeeper(training=True).set_parent(experiment_recorder)
+            for each_index in range(100):
+                extra = dict(note="every tenth") if each_index % 10 == 0 else {}
+                train_recorder.push(index=each_index, loss=1/(each_index+1), weights=[ each_index ] * 10, done=each_index == 99, **extra)
+    expected = [ (each["index"], each["loss"], each["experiment_number"]) for each in ExperimentCollection(path, quiet=True, backend=each_backend).records ]
+    
+    #
+    # only the columns
+    #
+    reloaded = ExperimentCollection(path, quiet=True, backend=each_backend)
+    rows = reloaded.select(columns=["index", "loss", "experiment_number"])
+    assert [ tuple(each.values()) for each in rows ] == expected
+    assert type(rows[0]) == dict and list(rows[0].keys()) == [ "index", "loss", "experiment_number" ]
+    assert reloaded._records is None # (nothing else got loaded)
+    # missing keys are None, booleans stay booleans, non-json values work
+    rows = reloaded.select(columns=["note", "done", "weights", "training"], experiment_number=2)
+    assert [ each["note"] for each in rows[:11] ] == [ "every tenth" ] + [ None ] * 9 + [ "every tenth" ]
+    assert [ each["done"] for each in rows ] == [ False ] * 99 + [ True ]
+    assert rows[5]["weights"] == [ 5 ] * 10 and rows[5]["training"] == True
+    # the experiment info is settled (checkpointed records have the final info)
+    assert all(each["had_error"] == False for each in reloaded.select(columns="had_error"))
+    
+    #
+    # filters and arrays
+    #
+    rows = reloaded.select(columns=["loss"], where=lambda row: row["loss"] > 0.2, index=lambda index: index < 10, learning_rate=0.1)
+    assert rows == tuple({ "loss": 1/(each_index+1) } for each_index in range(4))
+    data = reloaded.load(columns=["index", "loss"], had_error=False)
+    assert data["index"] == [ each for each, _, _ in expected ] and data["loss"] == [ each for _, each, _ in expected ]
+    # records that are already loaded (or not saved yet) are just projected
+    reloaded.records
+    assert reloaded.load(columns=["index", "loss"], had_error=False) == data
+
+#
+# merged collections
+#
+merged = MergedCollection("data.ignore/columns_*")
+data = merged.load(columns=["experiment_number", "original_experiment_number", "index"])
+assert data["experiment_number"] == [ number for number in range(1, 7) for _ in range(100) ]
+assert data["original_experiment_number"] == [ number for _ in range(2) for number in range(1, 4) for _ in range(100) ]
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+from rigorous_recorder import RecordKeeper, ExperimentCollection
+from random import random
+import shutil
+import os
+
+def run_experiments(collection, count, fail_every=None):
+    for each_experiment in range(count):
+        try:
+            with collection.new_experiment() as experiment_recorder:
+                train_recorder = RecordKeeper(training=True).set_parent(experiment_recorder)
+                for each_index in range(300):
+                    train_recorder.push(index=each_index, loss=random())
+                if fail_every and each_experiment % fail_every == 0:
+                    raise Exception("this run failed")
+        except Exception as error:
+            pass
+
+def snapshot(collection):
+    return [ (each["experiment_number"], each["error_number"], each["index"]) for each in collection.records ]
+
+for each_codec in ("none", "zlib"):
+    shutil.rmtree(f"data.ignore/compaction_{each_codec}.collection", ignore_errors=True)
+    collection = ExperimentCollection(f"data.ignore/compaction_{each_codec}", quiet=True, codec=each_codec, checkpoint_every=100)
+    run_experiments(collection, 12, fail_every=3)
+    shard_folder = f"{collection.folder_path}/shards"
+    before = snapshot(collection)
+    index_before = [ (each.experiment_number, each.error_number, each.record_count) for each in collection.index ]
+    assert len(os.listdir(shard_folder)) == 12
+    
+    # 
+    # merge small shards
+    # 
+    result = collection.compact()
+    assert result["packed_entries"] == 12 and result["removed_files"] == 12
+    assert os.listdir(shard_folder) == [] and len(os.listdir(f"{collection.folder_path}/packs")) == 1
+    collection = ExperimentCollection(f"data.ignore/compaction_{each_codec}", quiet=True)
+    assert snapshot(collection) == before
+    assert [ (each.experiment_number, each.error_number, each.record_count) for each in collection.index ] == index_before
+    assert len(collection[3]) == 600 # one failed run + the run that succeeded
+    
+    # 
+    # drop failed runs that were re-run successfully
+    # 
+    result = collection.compact(drop_superseded_error_runs=True)
+    assert result["dropped_entries"] == 4
+    collection = ExperimentCollection(f"data.ignore/compaction_{each_codec}", quiet=True)
+    assert snapshot(collection) == [ each for each in before if each[1] == 0 ]
+    assert not any(each.had_error for each in collection.index)
+    
+    # 
+    # keeps working afterwards (and compacts again)
+    # 
+    run_experiments(collection, 3)
+    assert collection.experiment_numbers == tuple(range(1, 12))
+    result = collection.compact()
+    assert result["packed_entries"] == 3
+    collection = ExperimentCollection(f"data.ignore/compaction_{each_codec}", quiet=True)
+    assert collection.experiment_numbers == tuple(range(1, 12)) and len(collection.records) == 11 * 300
+    # older compactions get replaced too (manifests of writers that are still running are kept, but only the new part of them is read)
+    assert len([ each for each in os.listdir(f"{collection.folder_path}/manifests") if each.startswith("compacted.") ]) == 1
+
+# 
+# a bit at a time
+# 
+shutil.rmtree("data.ignore/compaction_incremental.collection", ignore_errors=True)
+collection = ExperimentCollection("data.ignore/compaction_incremental", quiet=True)
+run_experiments(collection, 10)
+before = snapshot(collection)
+calls = 0
+while collection.compact(max_bytes=3 * collection.index[0].shard_size)["packed_entries"]:
+    calls += 1
+assert calls > 1 and os.listdir(f"{collection.folder_path}/shards") == []
+assert snapshot(ExperimentCollection("data.ignore/compaction_incremental", quiet=True)) == before
+
+# 
+# writers that are alive but idle (ex: they only deleted something) keep their manifest
+# 
+shutil.rmtree("data.ignore/compaction_idle_writer.collection", ignore_errors=True)
+run_experiments(ExperimentCollection("data.ignore/compaction_idle_writer", quiet=True), 4)
+idle_writer = ExperimentCollection("data.ignore/compaction_idle_writer", quiet=True)
+idle_writer.delete_experiment(1)
+ExperimentCollection("data.ignore/compaction_idle_writer", quiet=True).compact()
+idle_writer.delete_experiment(2)
+assert idle_writer.experiment_numbers == (3, 4)
+assert ExperimentCollection("data.ignore/compaction_idle_writer", quiet=True).experiment_numbers == (3, 4)
+# a manifest that was compacted away and then made again (same name) is read from the start
+from rigorous_recorder import ShardStorage
+storage = ShardStorage(f"{idle_writer.folder_path}", writer_id="no_lock")
+storage.delete(3)
+ExperimentCollection("data.ignore/compaction_idle_writer", quiet=True).compact()
+assert not os.path.exists(storage.manifest_path)
+storage.delete(4)
+assert ExperimentCollection("data.ignore/compaction_idle_writer", quiet=True).experiment_numbers == ()
+
+# 
+# sqlite
+# 
+shutil.rmtree("data.ignore/compaction_sqlite.collection", ignore_errors=True)
+collection = ExperimentCollection("data.ignore/compaction_sqlite", quiet=True, backend="sqlite")
+run_experiments(collection, 6, fail_every=3)
+before = snapshot(collection)
+assert collection.compact(drop_superseded_error_runs=True)["dropped_entries"] == 2
+collection = ExperimentCollection("data.ignore/compaction_sqlite", quiet=True, backend="sqlite")
+assert snapshot(collection) == [ each for each in before if each[1] == 0 ]
+print(f'''collection.index[-1] = {collection.index[-1]}''')
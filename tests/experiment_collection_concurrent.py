@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+from rigorous_recorder import RecordKeeper, ExperimentCollection
+from random import random
+import subprocess
+import shutil
+import sys
+
+number_of_writers = 8
+experiments_per_writer = 3
+records_per_experiment = 500
+
+# 
+# child process: one worker of a sweep
+# 
+if len(sys.argv) > 1 and sys.argv[1] == "--writer":
+    collection = ExperimentCollection("data.ignore/concurrent", quiet=True, journal=True, checkpoint_every=200)
+    for each_experiment in range(experiments_per_writer):
+        with collection.new_experiment(writer=int(sys.argv[2])) as experiment_recorder:
+            for each_index in range(records_per_experiment):
+                experiment_recorder.push(index=each_index, loss=random())
+    sys.exit(0)
+
+shutil.rmtree("data.ignore/concurrent.collection", ignore_errors=True)
+writers = [ subprocess.Popen([ sys.executable, __file__, "--writer", str(each) ]) for each in range(number_of_writers) ]
+assert all(each.wait() == 0 for each in writers)
+
+collection = ExperimentCollection("data.ignore/concurrent", quiet=True)
+# every experiment got its own number
+number_of_experiments = number_of_writers * experiments_per_writer
+assert collection.experiment_numbers == tuple(range(1, number_of_experiments+1))
+assert len(collection.index) == number_of_experiments
+assert all(each.record_count == records_per_experiment and not each.had_error for each in collection.index)
+# nothing was lost or duplicated
+for each_number in collection.experiment_numbers:
+    assert [ each["index"] for each in collection[each_number] ] == list(range(records_per_experiment))
+assert { each["writer"] for each in collection.records } == set(range(number_of_writers))
+assert collection.journal_segments == []
+
+# the next experiment continues the numbering
+with collection.new_experiment() as experiment_recorder:
+    experiment_recorder.push(index=0)
+assert collection.experiment_numbers[-1] == number_of_experiments + 1
+print(f'''len(collection.index) = {len(collection.index)}''')
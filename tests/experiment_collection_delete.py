@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+from rigorous_recorder import RecordKeeper, ExperimentCollection, KeepLastErrorRuns, KeepOnlySuccessfulAfter
+from random import random
+import shutil
+import time
+import os
+
+def run_experiments(collection, count, fail_every=None):
+    for each_experiment in range(count):
+        try:
+            with collection.new_experiment() as experiment_recorder:
+                train_recorder = RecordKeeper(training=True).set_parent(experiment_recorder)
+                for each_index in range(100):
+                    train_recorder.push(index=each_index, loss=random())
+                if fail_every and each_experiment % fail_every == 0:
+                    raise Exception("this run failed")
+        except Exception as error:
+            pass
+
+def runs(collection):
+    return [ (each.experiment_number, each.error_number) for each in collection.index ]
+
+for each_backend in ("shards", "sqlite"):
+    path = f"data.ignore/delete_{each_backend}"
+    shutil.rmtree(f"{path}.collection", ignore_errors=True)
+    collection = ExperimentCollection(path, quiet=True, backend=each_backend).sketch("loss")
+    run_experiments(collection, 6, fail_every=3)
+    assert runs(collection) == [ (1, 1), (1, 0), (2, 0), (3, 1), (3, 0), (4, 0) ]
+    
+    #
+    # deleting
+    #
+    collection.delete_experiment(2)
+    collection.delete_experiment(3, error_number=1)
+    expected_runs = [ (1, 1), (1, 0), (3, 0), (4, 0) ]
+    assert runs(collection) == expected_runs
+    assert collection.experiment_numbers == (1, 3, 4)
+    assert collection[2] == [] and len(collection[3]) == 100
+    assert len(collection) == len(collection.records) == 400
+    assert (2, 0) not in collection.experiment_sketches and (3, 1) not in collection.experiment_sketches
+    # numbers aren't re-used
+    collection.delete_experiment(4)
+    run_experiments(collection, 1)
+    expected_runs = [ (1, 1), (1, 0), (3, 0), (5, 0) ]
+    collection = ExperimentCollection(path, quiet=True, backend=each_backend)
+    assert runs(collection) == expected_runs
+    assert not any(each["experiment_number"] in (2, 4) for each in collection.records)
+    
+    #
+    # the space comes back on compact()
+    #
+    result = collection.compact()
+    assert result["dropped_entries"] == 3
+    collection = ExperimentCollection(path, quiet=True, backend=each_backend).sketch("loss")
+    assert runs(collection) == expected_runs and len(collection.records) == 400
+    if each_backend == "shards":
+        assert os.listdir(f"{collection.folder_path}/shards") == []
+        # deleted stays deleted after compaction
+        assert collection.compact()["dropped_entries"] == 0
+        assert runs(ExperimentCollection(path, quiet=True)) == expected_runs
+    
+    #
+    # retention policies
+    #
+    collection.retain(KeepLastErrorRuns(2))
+    run_experiments(collection, 4, fail_every=1)
+    assert [ each for each in runs(collection) if each[1] != 0 ] == [ (6, 3), (6, 4) ]
+    assert (6, 4) in collection.experiment_sketches and (6, 1) not in collection.experiment_sketches
+    
+    time.sleep(0.2)
+    collection.retain(KeepOnlySuccessfulAfter(seconds=0.1))
+    assert not any(each.had_error for each in collection.index)
+    assert runs(collection) == [ (1, 0), (3, 0), (5, 0) ]
+
+    #
+    # a number is re-used after an error, so deleting the errored run can't delete the run after it
+    #
+    path = f"data.ignore/delete_reused_{each_backend}"
+    shutil.rmtree(f"{path}.collection", ignore_errors=True)
+    collection = ExperimentCollection(path, quiet=True, backend=each_backend)
+    run_experiments(collection, 1)
+    run_experiments(collection, 1, fail_every=1)
+    collection.delete_experiment(2)
+    assert runs(collection) == [ (1, 0) ]
+    run_experiments(collection, 1)
+    assert runs(collection) == [ (1, 0), (2, 0) ]
+    collection = ExperimentCollection(path, quiet=True, backend=each_backend)
+    assert runs(collection) == [ (1, 0), (2, 0) ] and len(collection[2]) == 100
+    collection.compact()
+    assert runs(ExperimentCollection(path, quiet=True, backend=each_backend)) == [ (1, 0), (2, 0) ]
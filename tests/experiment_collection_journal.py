@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+import rigorous_recorder
+from rigorous_recorder import RecordKeeper, ExperimentCollection
+from random import random
+import shutil
+import os
+import sys
+
+# 
+# child process: gets killed part way through an experiment (no chance to save)
+# 
+if len(sys.argv) > 1 and sys.argv[1] == "--killed-experiment":
+    folder, checkpoint_every, when = sys.argv[2], int(sys.argv[3]) or None, sys.argv[4]
+    if when != "before_save":
+        # like dying right after each save, before its journal segment gets removed
+        remove = rigorous_recorder.FS.remove
+        rigorous_recorder.FS.remove = lambda path: None if "/journal/" in path else remove(path)
+    collection = ExperimentCollection(folder, quiet=True, journal=True, checkpoint_every=checkpoint_every)
+    with collection.new_experiment() as experiment_recorder:
+        train_recorder = RecordKeeper(training=True).set_parent(experiment_recorder)
+        for each_index in range(2_500):
+            train_recorder.push(index=each_index, loss=random())
+        collection.wait_for_checkpoints()
+        if when != "after_save":
+            os._exit(1) # like a SIGKILL/OOM
+    os._exit(1)
+
+import subprocess
+def run_killed_experiment(folder, checkpoint_every, when="before_save"):
+    shutil.rmtree(f"{folder}.collection", ignore_errors=True)
+    subprocess.run([ sys.executable, __file__, "--killed-experiment", folder, str(checkpoint_every), when ])
+
+# 
+# journal only
+# 
+run_killed_experiment("data.ignore/journal", 0)
+collection = ExperimentCollection("data.ignore/journal", quiet=True)
+assert collection.journal_segments == []
+entry = collection.index[-1]
+assert entry.recovered == True and entry.had_error == True
+assert entry.experiment_number == 1 and entry.record_count == 2_500
+assert [ each["index"] for each in collection[1] ] == list(range(2_500))
+assert all(each["training"] for each in collection[1])
+
+# the next experiment is treated like a re-run of the one that crashed
+with collection.new_experiment() as experiment_recorder:
+    experiment_recorder.push(index=0, loss=random())
+assert (collection.index[-1].experiment_number, collection.index[-1].error_number) == (1, 0)
+assert len(collection.index) == 2
+
+# 
+# journal + checkpoints (only the tail after the last checkpoint is replayed)
+# 
+run_killed_experiment("data.ignore/journal_checkpoints", 1_000)
+collection = ExperimentCollection("data.ignore/journal_checkpoints", quiet=True)
+assert len(collection.index) == 1
+assert collection.index[-1].record_count == 2_500
+assert [ each["index"] for each in collection[1] ] == list(range(2_500))
+
+# 
+# killed after saving, before removing the journal (the records aren't added again)
+# 
+run_killed_experiment("data.ignore/journal_not_removed", 1_000, when="after_checkpoints")
+collection = ExperimentCollection("data.ignore/journal_not_removed", quiet=True)
+assert collection.journal_segments == []
+assert collection.index[-1].record_count == 2_500 and collection.index[-1].recovered == True
+assert [ each["index"] for each in collection[1] ] == list(range(2_500))
+
+run_killed_experiment("data.ignore/journal_not_removed_saved", 1_000, when="after_save")
+collection = ExperimentCollection("data.ignore/journal_not_removed_saved", quiet=True)
+assert collection.journal_segments == []
+assert collection.index[-1].record_count == 2_500 and not collection.index[-1].get("recovered", False)
+assert collection.index[-1].had_error == False
+assert [ each["index"] for each in collection[1] ] == list(range(2_500))
+
+# 
+# a normal run leaves no journal behind
+# 
+shutil.rmtree("data.ignore/journal_normal.collection", ignore_errors=True)
+collection = ExperimentCollection("data.ignore/journal_normal", quiet=True, journal=True, checkpoint_every=300)
+with collection.new_experiment() as experiment_recorder:
+    for each_index in range(1_000):
+        experiment_recorder.push(index=each_index, loss=random())
+assert collection.journal_segments == []
+assert not any(each.endswith(".tmp") for each in os.listdir(collection.folder_path))
+collection = ExperimentCollection("data.ignore/journal_normal", quiet=True)
+assert len(collection.index) == 1 and not collection.index[-1].get("recovered", False)
+assert len(collection[1]) == 1_000
+print(f'''collection.index = {collection.index}''')
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+from rigorous_recorder import RecordKeeper, ExperimentCollection
+from random import random
+
+collection = ExperimentCollection("data.ignore/lazy", quiet=True)
+for _ in range(3):
+    with collection.new_experiment() as experiment_recorder:
+        train_recorder = RecordKeeper(training=True).set_parent(experiment_recorder)
+        for each_index in range(1_000):
+            train_recorder.push(index=each_index, loss=random())
+
+# a small cache (in bytes of shard files) so that only ~1 shard stays loaded
+reloaded = ExperimentCollection("data.ignore/lazy", quiet=True, cache_limit=1)
+last_experiment = reloaded[-1]
+# only the shard of the last experiment was loaded
+assert len(reloaded.storage.cache.shards) == 1
+assert reloaded._records is None
+assert len(last_experiment) == 1_000
+assert all(each["experiment_number"] == reloaded.experiment_numbers[-1] for each in last_experiment)
+
+high_loss = reloaded.select(where=lambda record: record["loss"] > 0.9, experiment_number=lambda number: number > 1)
+assert all(each["loss"] > 0.9 and each["experiment_number"] > 1 for each in high_loss)
+assert len(reloaded.storage.cache.shards) == 1
+assert reloaded._records is None
+print(f'''len(high_loss) = {len(high_loss)}''')
+
+# listing experiments only reads the index (the manifests)
+indexed = ExperimentCollection("data.ignore/lazy", quiet=True)
+for each in indexed.index:
+    assert each.record_count == 1_000
+    assert each.had_error == False
+    assert each.experiment_duration == each.experiment_end_time - each.experiment_start_time
+    assert "loss" in each.record_keys and "training" in each.record_keys
+assert len(indexed) == 1_000 * len(indexed.index)
+assert indexed._records is None and len(indexed.storage.cache.shards) == 0
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+from rigorous_recorder import RecordKeeper, ExperimentCollection, AncestorDict
+import shutil
+import pickle
+
+shutil.rmtree("data.ignore/lazy_ancestors.collection", ignore_errors=True)
+collection = ExperimentCollection("data.ignore/lazy_ancestors", quiet=True, checkpoint_every=50)
+for each_experiment in range(3):
+    with collection.new_experiment(config=dict(layers=[ 64 ] * 100)) as experiment_recorder:
+        model_recorder = RecordKeeper(model="model1").set_parent(experiment_recorder)
+        for each_index in range(120):
+            model_recorder.push(index=each_index, loss=1/(each_index+1))
+
+#
+# row-level values don't touch the parent data
+#
+reloaded = ExperimentCollection("data.ignore/lazy_ancestors", quiet=True)
+records = reloaded.records
+assert len(records) == 360
+assert sum(each["index"] for each in records) == 3 * sum(range(120))
+assert all("loss" in each for each in records)
+assert len(reloaded.storage._nodes) == 0 # the node table hasn't been read
+
+#
+# ancestor keys are looked up the first time they're read
+#
+assert records[0]["model"] == "model1" and records[0]["config"]["layers"][0] == 64
+assert len(reloaded.storage._nodes) > 0
+# experiment info is settled (the checkpointed records have the final info)
+assert [ each["had_error"] for each in records ] == [ False ] * 360
+assert [ each["experiment_number"] for each in records ] == [ 1 ] * 120 + [ 2 ] * 120 + [ 3 ] * 120
+# records with the same parents share them
+assert len({ id(each.parents) for each in reloaded[1] }) == 3 # (one per checkpoint)
+assert len({ id(each.ancestors[0]) for each in reloaded[1] }) == 1
+
+#
+# pickling resolves the parents
+#
+copy = pickle.loads(pickle.dumps(ExperimentCollection("data.ignore/lazy_ancestors", quiet=True).records[5]))
+assert type(copy) == AncestorDict and copy["index"] == 5 and copy["had_error"] == False
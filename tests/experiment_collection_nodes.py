@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+from rigorous_recorder import RecordKeeper, ExperimentCollection
+import shutil
+import os
+
+def folder_size(path):
+    return sum(os.path.getsize(f"{path}/{each}") for each in os.listdir(path)) if os.path.isdir(path) else 0
+
+big_config = dict(description="x" * 100_000) # ex: a big model config
+
+shutil.rmtree("data.ignore/nodes.collection", ignore_errors=True)
+collection = ExperimentCollection("data.ignore/nodes", quiet=True, checkpoint_every=50)
+# (shards written like they were before the node table, parent data pickled into every chunk)
+collection.storage.to_chunk = lambda records, *_: records
+with collection.new_experiment(**big_config) as experiment_recorder:
+    for each_index in range(500):
+        experiment_recorder.push(index=each_index)
+old_format_size = folder_size(f"{collection.folder_path}/shards")
+del collection.storage.to_chunk
+
+for each_experiment in range(3):
+    with collection.new_experiment(**big_config) as experiment_recorder:
+        model_recorder = RecordKeeper(model="model1").set_parent(experiment_recorder)
+        for each_index in range(500):
+            model_recorder.push(index=each_index)
+
+#
+# parent data is only stored once
+#
+shard_sizes = sorted(os.path.getsize(f"{collection.folder_path}/{each.shard}") for each in collection.index)
+# 10 checkpoints => the old format has the big config 10 times
+assert old_format_size > 1_000_000
+assert shard_sizes[-1] == old_format_size and max(shard_sizes[:-1]) < 50_000
+# once per experiment info (the final info is different from the in-progress one, so twice per experiment)
+assert folder_size(f"{collection.folder_path}/nodes") < 7 * 110_000
+
+#
+# loading re-links the parents
+#
+reloaded = ExperimentCollection("data.ignore/nodes", quiet=True)
+records = reloaded.records
+assert len(records) == 2000
+assert [ each["index"] for each in reloaded[2] ] == list(range(500)) and reloaded[2][0]["model"] == "model1"
+assert all(each["had_error"] == False and each["description"] == big_config["description"] for each in records)
+# the collection's data is one object, shared by every record (even across shards)
+assert len({ id(each.ancestors[-1]) for each in records[500:] }) == 1
+# every record of an experiment shares its parents
+for each_number in (2, 3, 4):
+    experiment_records = reloaded[each_number]
+    assert len({ id(each.ancestors[0]) for each in experiment_records }) == 1
+    assert len({ id(each.ancestors[1]) for each in experiment_records }) <= 2 # (checkpointed + final experiment info)
+
+#
+# other writers, compaction, parallel loading
+#
+other_writer = ExperimentCollection("data.ignore/nodes", quiet=True)
+with other_writer.new_experiment(**big_config) as experiment_recorder:
+    for each_index in range(100):
+        experiment_recorder.push(index=each_index)
+reloaded = ExperimentCollection("data.ignore/nodes", quiet=True, workers=4)
+assert len(reloaded.records) == 2100 and reloaded.records[-1]["description"] == big_config["description"]
+reloaded.compact()
+assert [ (each["experiment_number"], each["index"]) for each in ExperimentCollection("data.ignore/nodes", quiet=True).records ] == [ (each["experiment_number"], each["index"]) for each in reloaded.records ]
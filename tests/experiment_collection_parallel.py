@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+from rigorous_recorder import RecordKeeper, ExperimentCollection, MergedCollection
+import shutil
+
+# (top level, so worker processes can import it)
+def summarize(records):
+    return (records[0]["experiment_number"], len(records), max(each["index"] for each in records))
+
+def is_high(record):
+    return record["index"] >= 195
+
+if __name__ == "__main__":
+    for each_backend in ("shards", "sqlite"):
+        path = f"data.ignore/parallel_{each_backend}"
+        shutil.rmtree(f"{path}.collection", ignore_errors=True)
+        collection = ExperimentCollection(path, quiet=True, backend=each_backend)
+        for each_experiment in range(12):
+            with collection.new_experiment(learning_rate=each_experiment/10) as experiment_recorder:
+                train_recorder = RecordKeeper(training=True).set_parent(experiment_recorder)
+                test_recorder  = RecordKeeper(training=False).set_parent(experiment_recorder)
+                for each_index in range(200):
+                    (train_recorder if each_index % 2 else test_recorder).push(index=each_index)
+        serial_records = [ (each["experiment_number"], each["index"]) for each in ExperimentCollection(path, quiet=True, backend=each_backend).records ]
+        
+        #
+        # loading
+        #
+        for each_pool in ("threads", "processes"):
+            parallel_collection = ExperimentCollection(path, quiet=True, backend=each_backend, workers=4, pool=each_pool)
+            assert [ (each["experiment_number"], each["index"]) for each in parallel_collection.records ] == serial_records # same order
+            assert parallel_collection.records[-1]["learning_rate"] == 1.1
+        
+        #
+        # map/filter
+        #
+        for each_pool in ("threads", "processes"):
+            summaries = collection.map_shards(summarize, workers=4, pool=each_pool)
+            assert summaries == [ (each_number, 200, 199) for each_number in range(1, 13) ]
+            assert collection.map_shards(summarize, workers=4, pool=each_pool, experiment_number=lambda number: number > 10, training=True) == [ (11, 100, 199), (12, 100, 199) ]
+            high = collection.filter_records(is_high, workers=4, pool=each_pool)
+            assert [ (each["experiment_number"], each["index"]) for each in high ] == [ (number, index) for number in range(1, 13) for index in range(195, 200) ]
+        assert len(collection.filter_records(lambda record: record["index"] == 0, workers=4, training=False)) == 12
+        assert collection.map_shards(len) == [ 200 ] * 12 # (no workers => one at a time)
+    
+    merged = MergedCollection("data.ignore/parallel_*", workers=4)
+    assert len(merged.records) == 2 * 12 * 200
+    assert merged.map_shards(len) == [ 200 ] * 24
+    try:
+        merged.map_shards(len, pool="processes")
+        assert False
+    except Exception as error:
+        assert "pool" in str(error)
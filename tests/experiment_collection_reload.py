@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+from rigorous_recorder import RecordKeeper, ExperimentCollection, MergedCollection
+import shutil
+
+def run_experiment(collection, count=100):
+    with collection.new_experiment() as experiment_recorder:
+        for each_index in range(count):
+            experiment_recorder.push(index=each_index)
+
+def count_shard_loads(collection):
+    loaded = []
+    load_file = collection.storage.load_file
+    def counting_load_file(shard, entry=None):
+        loaded.append(shard)
+        return load_file(shard, entry)
+    collection.storage.load_file = counting_load_file
+    return loaded
+
+shutil.rmtree("data.ignore/reload.collection", ignore_errors=True)
+# a second process (ex: a notebook) watching the collection
+# (created first, so that new record keepers get connected to the writer)
+reader = ExperimentCollection("data.ignore/reload", quiet=True)
+loaded = count_shard_loads(reader)
+writer = ExperimentCollection("data.ignore/reload", quiet=True, checkpoint_every=50)
+for _ in range(3):
+    run_experiment(writer)
+
+first_records = reader.records
+assert len(first_records) == 300 and len(loaded) == 3
+
+#
+# only the new experiment gets read
+#
+run_experiment(writer)
+reader.reload()
+assert len(reader.records) == 400 and len(loaded) == 4
+assert all(each is reader.records[index] for index, each in enumerate(first_records)) # old records are re-used
+assert reader.experiment_numbers == (1, 2, 3, 4)
+
+# nothing changed => nothing read
+reader.reload()
+assert len(reader.records) == 400 and len(loaded) == 4
+
+#
+# an experiment that is still running (its checkpoints show up)
+#
+with writer.new_experiment() as experiment_recorder:
+    for each_index in range(120):
+        experiment_recorder.push(index=each_index)
+    writer.wait_for_checkpoints()
+    reader.reload()
+    assert len(reader.records) == 500 and len(loaded) == 5
+    assert reader.records[-1]["experiment_number"] == 5
+reader.reload()
+assert len(reader.records) == 520 and len(loaded) == 6
+assert [ each["index"] for each in reader[5] ] == list(range(120))
+assert reader.records[-1]["had_error"] == False
+
+#
+# deleting and compacting
+#
+writer.delete_experiment(2)
+reader.reload()
+assert reader.experiment_numbers == (1, 3, 4, 5) and len(reader.records) == 420 and len(loaded) == 6
+writer.compact()
+reader.reload()
+assert reader.experiment_numbers == (1, 3, 4, 5) and len(reader.records) == 420
+assert [ each["index"] for each in reader[5] ] == list(range(120))
+
+#
+# merged collections reload the same way
+#
+merged = MergedCollection("data.ignore/reload")
+assert len(merged.records) == 420
+run_experiment(writer)
+merged.reload()
+assert len(merged.records) == 520 and merged.experiment_numbers == (1, 2, 3, 4, 5)
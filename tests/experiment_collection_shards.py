@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+from rigorous_recorder import RecordKeeper, ExperimentCollection
+from random import random
+import os
+
+collection = ExperimentCollection("data.ignore/shards", quiet=True)
+number_of_shards_before = len(collection.storage.entries)
+
+def run_experiment(should_fail=False):
+    with collection.new_experiment() as experiment_recorder:
+        train_recorder = RecordKeeper(training=True).set_parent(experiment_recorder)
+        for each_index in range(100):
+            train_recorder.push(index=each_index, loss=random())
+        if should_fail:
+            raise Exception("an error run")
+
+run_experiment()
+first_entry = collection.storage.entries[-1]
+first_shard_path = f"{collection.folder_path}/{first_entry['shard']}"
+modified_time = os.path.getmtime(first_shard_path)
+
+try:
+    run_experiment(should_fail=True)
+except Exception as error:
+    pass
+run_experiment()
+
+# each save (including the error run) is its own shard, and older shards are never rewritten
+entries = collection.storage.entries
+assert len(entries) == number_of_shards_before + 3
+assert [ each["had_error"] for each in entries[-3:] ] == [ False, True, False ]
+assert all(each["record_count"] == 100 for each in entries[-3:])
+assert os.path.getmtime(first_shard_path) == modified_time
+
+reloaded = ExperimentCollection("data.ignore/shards", quiet=True)
+assert len(reloaded.records) == sum(each["record_count"] for each in entries)
+assert len(reloaded[first_entry["experiment_number"]]) == 100
+print(f'''entries[-1] = {entries[-1]}''')
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+from rigorous_recorder import RecordKeeper, ExperimentCollection
+from random import random
+import shutil
+
+shutil.rmtree("data.ignore/sqlite.collection", ignore_errors=True)
+collection = ExperimentCollection("data.ignore/sqlite", quiet=True, backend="sqlite", index_keys=("index",), checkpoint_every=700)
+for each_experiment in range(3):
+    with collection.new_experiment(learning_rate=each_experiment/10) as experiment_recorder:
+        model1_recorder = RecordKeeper(model="model1").set_parent(experiment_recorder)
+        model2_recorder = RecordKeeper(model="model2").set_parent(experiment_recorder)
+        for each_index in range(1_000):
+            model1_recorder.push(index=each_index, loss=random(), training=True)
+            model2_recorder.push(index=each_index, loss=random(), training=False)
+
+collection = ExperimentCollection("data.ignore/sqlite", quiet=True, backend="sqlite")
+assert collection.experiment_numbers == (1, 2, 3)
+assert [ each.record_count for each in collection.index ] == [ 2_000, 2_000, 2_000 ]
+assert len(collection) == 6_000
+
+# parent data comes back shared (each keeper's local_data is stored once)
+records = collection[2]
+assert len(records) == 2_000
+assert records[0]["learning_rate"] == 0.1 and records[0]["experiment_number"] == 2
+model1_records = [ each for each in records if each["model"] == "model1" ]
+assert len(model1_records) == 1_000
+assert all(each.ancestors[0] is model1_records[0].ancestors[0] for each in model1_records[:700])
+
+# filters on the records themselves are done inside sqlite
+selected = collection.select(experiment_number=3, index=10)
+assert len(selected) == 2 and { each["model"] for each in selected } == { "model1", "model2" }
+# filters on parent data still work (they're checked after loading)
+selected = collection.select(model="model2", index=999)
+assert [ each["experiment_number"] for each in selected ] == [ 1, 2, 3 ]
+selected = collection.select(training=True, where=lambda record: record["index"] < 5)
+assert len(selected) == 15
+
+# index keys can have quotes in them (they're part of the index name)
+shutil.rmtree("data.ignore/sqlite_quotes.collection", ignore_errors=True)
+quoted_key = 'say "hi"; DROP TABLE records; --'
+collection_with_quotes = ExperimentCollection("data.ignore/sqlite_quotes", quiet=True, backend="sqlite", index_keys=(quoted_key,))
+with collection_with_quotes.new_experiment() as experiment_recorder:
+    for each_index in range(10):
+        experiment_recorder.push({ quoted_key: each_index })
+collection_with_quotes = ExperimentCollection("data.ignore/sqlite_quotes", quiet=True, backend="sqlite", index_keys=(quoted_key,))
+assert len(collection_with_quotes.select(**{ quoted_key: 3 })) == 1
+assert len(collection_with_quotes) == 10
+
+# a statement that fails doesn't leave its transaction (and the database lock) behind
+import sqlite3
+try:
+    with collection_with_quotes.storage.connect() as connection:
+        connection.execute("DELETE FROM records")
+        connection.execute("SELECT * FROM not_a_table")
+    assert False, "the bad statement should raise"
+except sqlite3.OperationalError:
+    pass
+sqlite3.connect(collection_with_quotes.storage.database_path, timeout=0).execute("BEGIN IMMEDIATE").connection.rollback()
+assert len(collection_with_quotes) == 10
+
+# everything at once
+assert [ each["index"] for each in collection.records if each["experiment_number"] == 1 and each["model"] == "model1" ] == list(range(1_000))
+print(f'''collection.index[-1] = {collection.index[-1]}''')
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+from rigorous_recorder import RecordKeeper, ExperimentCollection
+import threading
+import asyncio
+import shutil
+import time
+
+def run_experiments(path, backend, count):
+    writer = ExperimentCollection(path, quiet=True, backend=backend, checkpoint_every=50)
+    for each_experiment in range(count):
+        with writer.new_experiment() as experiment_recorder:
+            for each_index in range(120):
+                experiment_recorder.push(index=each_index)
+                if each_index % 50 == 49:
+                    writer.wait_for_checkpoints()
+                    time.sleep(0.1) # (so the watcher sees the checkpoint)
+
+for each_backend in ("shards", "sqlite"):
+    path = f"data.ignore/watch_{each_backend}"
+    shutil.rmtree(f"{path}.collection", ignore_errors=True)
+    # (the watcher is created before the writer, so that new record keepers get connected to the writer)
+    watcher = ExperimentCollection(path, quiet=True, backend=each_backend)
+    run_experiments(path, each_backend, 1)
+    
+    #
+    # sync
+    #
+    writer_thread = threading.Thread(target=run_experiments, args=(path, each_backend, 2))
+    writer_thread.start()
+    updates = []
+    for entry, new_records in watcher.watch(poll_seconds=0.01, max_poll_seconds=0.05, idle_timeout=1):
+        updates.append((entry.experiment_number, [ each["index"] for each in new_records ]))
+    writer_thread.join()
+    # (experiment 1 was already there, only the new ones are yielded)
+    assert { number for number, _ in updates } == { 2, 3 }
+    for each_number in (2, 3):
+        indices = [ each_index for number, each_batch in updates if number == each_number for each_index in each_batch ]
+        assert indices == list(range(120)) # nothing missing, nothing twice
+    # checkpoints show up while the experiment is still running
+    assert len(updates) > 2
+    
+    # from the start
+    everything = [ each for _, each_batch in watcher.watch(idle_timeout=0.2, from_start=True) for each in each_batch ]
+    assert len(everything) == 360 and everything[-1]["had_error"] == False
+    
+    #
+    # asyncio
+    #
+    async def watch_async():
+        records = []
+        async for entry, new_records in watcher.watch_async(poll_seconds=0.01, max_poll_seconds=0.05, idle_timeout=1):
+            records += new_records
+        return records
+    writer_thread = threading.Thread(target=run_experiments, args=(path, each_backend, 1))
+    writer_thread.start()
+    records = asyncio.run(watch_async())
+    writer_thread.join()
+    assert [ each["index"] for each in records ] == list(range(120)) and records[-1]["experiment_number"] == 4
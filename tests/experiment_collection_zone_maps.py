@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+from rigorous_recorder import RecordKeeper, ExperimentCollection, MergedCollection, Compare
+import shutil
+
+def count_loaded_entries(collection):
+    loaded = []
+    for each_name in ("select_records", "load_columns"):
+        original = getattr(collection.storage, each_name)
+        def counting(entry, *args, original=original):
+            loaded.append(entry["experiment_number"])
+            return original(entry, *args)
+        setattr(collection.storage, each_name, counting)
+    return loaded
+
+for each_backend in ("shards", "sqlite"):
+    path = f"data.ignore/zone_maps_{each_backend}"
+    shutil.rmtree(f"{path}.collection", ignore_errors=True)
+    collection = ExperimentCollection(path, quiet=True, backend=each_backend, checkpoint_every=30)
+    for each_experiment in range(4):
+        with collection.new_experiment() as experiment_recorder:
+            model_recorder = RecordKeeper(model=f"model{each_experiment % 2}").set_parent(experiment_recorder)
+            for each_index in range(each_experiment*100, each_experiment*100 + 100):
+                note = "slow" if each_index % 50 == 0 else None
+                model_recorder.push(index=each_index, step=float(each_index % 3), training=each_index % 2 == 0, note=note, weights=[ each_index ])
+    collection.wait_for_checkpoints()
+    
+    #
+    # the statistics (merged across checkpoints)
+    #
+    zone_map = collection.index[1].zone_map
+    assert (zone_map["index"]["min"], zone_map["index"]["max"], zone_map["index"]["null_count"]) == (100, 199, 0)
+    assert 50 <= zone_map["index"]["distinct"] <= 200 # (an estimate)
+    assert zone_map["step"]["distinct"] == 3 and zone_map["training"]["distinct"] == 2
+    assert zone_map["note"]["null_count"] == 98 and zone_map["note"]["min"] == "slow"
+    assert zone_map["model"] == dict(zone_map["model"], min="model1", max="model1", null_count=0)
+    assert "min" not in zone_map["weights"] # (lists can't be compared)
+    assert "had_error" not in zone_map # (the entry has it)
+    
+    #
+    # shards that can't match are skipped
+    #
+    reloaded = ExperimentCollection(path, quiet=True, backend=each_backend)
+    loaded = count_loaded_entries(reloaded)
+    assert [ each["index"] for each in reloaded.select(index=Compare("<", 150)) ] == list(range(150))
+    assert loaded == [ 1, 2 ]
+    loaded.clear()
+    assert [ each["index"] for each in reloaded.select(index=Compare(">=", 350), training=True) ] == list(range(350, 400, 2))
+    assert loaded == [ 4 ]
+    loaded.clear()
+    assert [ each["index"] for each in reloaded.select(index=250) ] == [ 250 ] and loaded == [ 3 ]
+    loaded.clear()
+    # parent data
+    assert len(reloaded.select(columns=["index"], model="model0")) == 200 and loaded == [ 1, 3 ]
+    loaded.clear()
+    # None
+    assert len(reloaded.select(note="slow")) == 8 and len(reloaded.select(note=Compare("!=", None))) == 8 and len(loaded) == 8
+    loaded.clear()
+    assert reloaded.select(note=None, index=Compare("<", 5)) and reloaded.select(missing_key=5) == () and loaded == [ 1 ]
+    loaded.clear()
+    # lambdas can't be checked against the zone map
+    assert len(reloaded.select(index=lambda index: index < 150)) == 150 and len(loaded) == 4
+    assert reloaded.map_shards(len, index=Compare(">", 390)) == [ 9 ]
+
+    #
+    # record keys with the same name as a manifest field (sequence, shard, length, etc) are checked on each record
+    #
+    path = f"data.ignore/zone_maps_field_names_{each_backend}"
+    shutil.rmtree(f"{path}.collection", ignore_errors=True)
+    collection = ExperimentCollection(path, quiet=True, backend=each_backend)
+    for each_experiment in range(3):
+        with collection.new_experiment() as experiment_recorder:
+            for each_index in range(10):
+                experiment_recorder.push(length=each_index, sequence=each_index, shard="a", record_count=each_index)
+    def check(collection):
+        assert len(collection.select(sequence=1)) == 3
+        assert len(collection.select(shard="a")) == 30
+        assert len(collection.select(length=5)) == 3
+        assert len(collection.select(columns=["length"], record_count=Compare("<", 2))) == 6
+        assert sum(collection.map_shards(len, sequence=1)) == 3
+        assert len(collection.select(experiment_number=2, sequence=1)) == 1
+    check(ExperimentCollection(path, quiet=True, backend=each_backend))
+    collection.compact()
+    check(ExperimentCollection(path, quiet=True, backend=each_backend))
+    loaded = ExperimentCollection(path, quiet=True, backend=each_backend)
+    loaded.records
+    check(loaded)
+    check(MergedCollection(path))
+
+# 
+# the hashes are the same in every process (python's hash() of a str isn't)
+# 
+import subprocess, sys, os, json
+def zone_in_another_process(hash_seed):
+    code = "from rigorous_recorder import zone_of; import json; print(json.dumps(zone_of([ f'model{index}' for index in range(1000) ] + [ ('a', 1) ], 1001)))"
+    output = subprocess.run([ sys.executable, "-c", code ], env={ **os.environ, "PYTHONHASHSEED": str(hash_seed) }, capture_output=True, text=True, check=True).stdout
+    return json.loads(output)
+from rigorous_recorder import zone_of, merge_zones
+zone, other_zone = zone_in_another_process(1), zone_in_another_process(2)
+assert zone["hashes"] == other_zone["hashes"] == zone_of([ f"model{index}" for index in range(1000) ] + [ ("a", 1) ], 1001)["hashes"]
+# (so the same values from two processes aren't counted twice)
+assert merge_zones(zone, other_zone)["distinct"] == merge_zones(zone, zone)["distinct"]
+
+try:
+    Compare("=<", 3)
+    assert False
+except Exception as error:
+    assert "operator" in str(error)
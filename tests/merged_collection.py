@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+from rigorous_recorder import RecordKeeper, ExperimentCollection, MergedCollection
+from random import random
+import shutil
+
+# 
+# a few "nodes" that each ran the same study
+# 
+shutil.rmtree("data.ignore/merged", ignore_errors=True)
+for each_node in range(3):
+    backend = "sqlite" if each_node == 2 else "shards"
+    collection = ExperimentCollection(f"data.ignore/merged/node{each_node}/my_study", quiet=True, backend=backend)
+    for each_experiment in range(2):
+        with collection.new_experiment(node=each_node) as experiment_recorder:
+            model_recorder = RecordKeeper(model="model1", layers=3).set_parent(experiment_recorder)
+            for each_index in range(100):
+                model_recorder.push(index=each_index, loss=random())
+
+# 
+# renumbered
+# 
+merged = MergedCollection("data.ignore/merged/*/my_study")
+assert merged.experiment_numbers == (1, 2, 3, 4, 5, 6)
+assert len(merged) == 600 and len(merged.index) == 6
+assert [ (each.collection, each.original_experiment_number) for each in merged.index ][2] == ("data.ignore/merged/node1/my_study", 1)
+records = merged[3]
+assert len(records) == 100
+assert all(each["node"] == 1 and each["original_experiment_number"] == 1 and each["experiment_number"] == 3 for each in records)
+assert len(merged.select(node=2, index=5)) == 2
+assert len(merged[-1]) == 100 and merged[-1][0]["node"] == 2
+assert len(merged.records) == 600
+# the same parent data (model config) from every collection is only kept once
+model_configs = { id(each.ancestors[1]) for each in merged.records }
+assert len(model_configs) == 1
+
+# 
+# namespaced
+# 
+merged = MergedCollection(
+    { f"node{each}": f"data.ignore/merged/node{each}/my_study" for each in range(3) },
+    numbering="namespace",
+)
+assert merged.experiment_numbers[:3] == (("node0", 1), ("node0", 2), ("node1", 1))
+assert [ each["index"] for each in merged[("node1", 2)] ] == list(range(100))
+assert { each["collection"] for each in merged.select(had_error=False) } == { "node0", "node1", "node2" }
+
+# the sources are still normal collections
+assert ExperimentCollection("data.ignore/merged/node1/my_study", quiet=True).experiment_numbers == (1, 2)
+print(f'''merged.index[0] = {merged.index[0]}''')
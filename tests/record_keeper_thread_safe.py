@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+from rigorous_recorder import RecordKeeper
+from threading import Thread
+recorder = RecordKeeper()
+
+# parent data
+experiment_recorder = RecordKeeper(experiment=1).set_parent(recorder)
+loader_recorder     = RecordKeeper(data_loader=True).set_parent(experiment_recorder).thread_safe(batch_size=64)
+
+number_of_threads = 8
+records_per_thread = 1_000
+def load_data(thread_index):
+    for each_index in range(records_per_thread):
+        # .add() in one thread doesn't leak into the pending record of another thread
+        loader_recorder.add(thread=thread_index)
+        loader_recorder.add(index=each_index)
+        loader_recorder.commit()
+
+threads = [ Thread(target=load_data, args=(each,)) for each in range(number_of_threads) ]
+for each in threads: each.start()
+for each in threads: each.join()
+
+assert len(loader_recorder) == number_of_threads * records_per_thread
+for each_thread_index in range(number_of_threads):
+    indices = [ each["index"] for each in loader_recorder.records if each["thread"] == each_thread_index ]
+    # commit order is preserved within each thread
+    assert indices == list(range(records_per_thread))
+
+# several thread safe keepers with the same parent (the parent's rollup sees every commit of both)
+parent_recorder = RecordKeeper(experiment=2).rollup("loss")
+child_recorders = [ RecordKeeper(child=each).set_parent(parent_recorder).thread_safe(batch_size=16) for each in range(2) ]
+def push_losses(thread_index):
+    child_recorder = child_recorders[thread_index % 2]
+    for each_index in range(records_per_thread):
+        child_recorder.push(loss=1.0)
+threads = [ Thread(target=push_losses, args=(each,)) for each in range(number_of_threads) ]
+for each in threads: each.start()
+for each in threads: each.join()
+for each in child_recorders: each.flush()
+assert parent_recorder.rollups["loss"].count == number_of_threads * records_per_thread
+assert sum(each.rollups["loss"].count for each in child_recorders) == number_of_threads * records_per_thread
+
+print(f'''loader_recorder[0] = {loader_recorder[0]}''')
+loader_recorder.save_to("data.ignore/thread_safe_recorder.pickle")
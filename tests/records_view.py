@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+from rigorous_recorder import RecordKeeper, ExperimentCollection, RecordsView
+import shutil
+
+loaded, pending = [ 0, 1, 2 ], [ 3, 4 ]
+view = RecordsView(loaded, [], pending)
+assert len(view) == 5 and list(view) == [ 0, 1, 2, 3, 4 ]
+assert [ view[each] for each in range(-5, 5) ] == [ 0, 1, 2, 3, 4, 0, 1, 2, 3, 4 ]
+assert view[1:4] == [ 1, 2, 3 ] and view[-2:] == [ 3, 4 ] and view[::2] == [ 0, 2, 4 ] and view[4:1] == []
+assert list(reversed(view)) == [ 4, 3, 2, 1, 0 ]
+assert view == [ 0, 1, 2, 3, 4 ] and view + [ 5 ] == [ 0, 1, 2, 3, 4, 5 ] and 3 in view and view.index(3) == 3
+for each_index in (5, -6):
+    try:
+        view[each_index]
+        assert False
+    except IndexError:
+        pass
+# it follows the lists
+pending.append(5)
+assert len(view) == 6 and view[-1] == 5
+
+#
+# collection.records
+#
+shutil.rmtree("data.ignore/records_view.collection", ignore_errors=True)
+collection = ExperimentCollection("data.ignore/records_view", quiet=True)
+for each_experiment in range(3):
+    with collection.new_experiment(run=each_experiment) as experiment_recorder:
+        for each_index in range(100):
+            experiment_recorder.push(index=each_index)
+        records = collection.records
+        assert isinstance(records, RecordsView) and len(records) == len(collection) == each_experiment * 100 + 100
+        assert records[-1]["index"] == 99 and records[-1]["experiment_number"] == each_experiment + 1
+assert len(records) == 300 and [ each["index"] for each in records[99:101] ] == [ 99, 0 ]
+assert collection.experiment_numbers == (1, 2, 3) and len(collection[2]) == 100 and len(experiment_recorder) == 100
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+from rigorous_recorder import RecordKeeper, Recorder, EveryNth, LogSpaced, KeepWhere, Reservoir
+from random import random
+
+recorder = RecordKeeper()
+experiment_recorder = RecordKeeper(experiment=1).set_parent(recorder)
+
+every_tenth_recorder = RecordKeeper(policy="every_nth").set_parent(experiment_recorder).retain(EveryNth(10))
+log_recorder         = RecordKeeper(policy="log_spaced").set_parent(experiment_recorder).retain(LogSpaced(growth=2))
+high_loss_recorder   = RecordKeeper(policy="keep_where").set_parent(experiment_recorder).retain(KeepWhere(lambda record: record["loss"] > 0.9))
+sample_recorder      = RecordKeeper(policy="reservoir").set_parent(experiment_recorder).retain(Reservoir(100, seed=1))
+frame_recorder       = Recorder(policy="reservoir").retain(Reservoir(100, seed=1))
+
+for each_index in range(100_000):
+    loss = random()
+    every_tenth_recorder.push(index=each_index, loss=loss)
+    log_recorder.push(index=each_index, loss=loss)
+    high_loss_recorder.push(index=each_index, loss=loss)
+    sample_recorder.push(index=each_index, loss=loss)
+    frame_recorder.push(index=each_index, loss=loss)
+
+assert [ each["index"] for each in every_tenth_recorder ][:3] == [ 0, 10, 20 ]
+assert len(every_tenth_recorder) == 10_000
+assert [ each["index"] for each in log_recorder ][:6] == [ 0, 1, 2, 4, 8, 16 ]
+assert all(each["loss"] > 0.9 for each in high_loss_recorder)
+assert len(sample_recorder) == 100
+assert len(frame_recorder) == 100
+# a reservoir sample shouldn't be stuck at the start of the stream
+assert max(each["index"] for each in sample_recorder) > 1_000
+assert max(each["index"] for each in frame_recorder.records) > 1_000
+
+print(f'''len(log_recorder) = {len(log_recorder)}''')
+print(f'''sample_recorder[0] = {sample_recorder[0]}''')
@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+from rigorous_recorder import RecordKeeper, Recorder
+from statistics import mean as average
+from random import random
+
+experiment_recorder = RecordKeeper(experiment=1).rollup("loss")
+model1_recorder = RecordKeeper(model="model1").set_parent(experiment_recorder)
+model2_recorder = RecordKeeper(model="model2").set_parent(experiment_recorder)
+model1_train_recorder = RecordKeeper(training=True).set_parent(model1_recorder)
+model2_train_recorder = RecordKeeper(training=True).set_parent(model2_recorder)
+for each_index in range(1_000):
+    model1_train_recorder.push(index=each_index, loss=random())
+    model2_train_recorder.push(index=each_index, loss=random()+1, name="not a number")
+
+# every node below the declaration reports its own subtree (no walking over records)
+assert experiment_recorder.rollups["loss"].count == 2_000
+assert model1_recorder.rollups["loss"].count == 1_000
+assert abs(model1_recorder.rollups["loss"].mean - average(each["loss"] for each in model1_train_recorder)) < 1e-9
+assert model2_recorder.rollups["loss"].min >= 1
+assert experiment_recorder.rollups["loss"].max == max(model2_recorder.rollups["loss"].max, model1_recorder.rollups["loss"].max)
+print(f'''experiment_recorder.rollups = {experiment_recorder.rollups}''')
+
+frame_recorder = Recorder().rollup("x")
+for each_index in range(10):
+    frame_recorder.push(x=each_index)
+assert frame_recorder.rollups["x"].sum == 45
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+from rigorous_recorder import RecordKeeper, ExperimentCollection
+from multiprocessing import Process, shared_memory
+import shutil
+
+def environment_worker(shared_recorder, worker_index):
+    for each_index in range(5_000):
+        shared_recorder.push(worker=worker_index, index=each_index, reward=each_index/2, done=each_index % 100 == 99)
+    # keys that are left out come back as None
+    shared_recorder.push(worker=worker_index, name="finished")
+
+def small_worker(shared_recorder):
+    for each_index in range(100):
+        shared_recorder.push(index=each_index)
+
+if __name__ == "__main__":
+    recorder = RecordKeeper()
+    experiment_recorder = RecordKeeper(experiment=1).set_parent(recorder)
+    
+    schema = dict(worker=int, index=int, reward=float, done=bool, name="16s")
+    # small capacity to make sure the children wait on a full ring buffer
+    shared_recorders = [ experiment_recorder.shared_memory_recorder(schema, capacity=1024) for _ in range(4) ]
+    workers = [ Process(target=environment_worker, args=(each, index)) for index, each in enumerate(shared_recorders) ]
+    for each in workers: each.start()
+    while any(each.is_alive() for each in workers):
+        experiment_recorder.flush()
+    for each in workers: each.join()
+    
+    assert len(experiment_recorder) == 4 * 5_001
+    for worker_index in range(4):
+        records = [ each for each in experiment_recorder.records if each["worker"] == worker_index ]
+        assert [ each["index"] for each in records[:-1] ] == list(range(5_000))
+        assert records[-1]["name"] == "finished" and records[-1]["index"] is None
+        assert records[-2]["done"] == True
+    print(f'''experiment_recorder[-1] = {experiment_recorder[-1]}''')
+    for each in shared_recorders:
+        each.close()
+
+    # 
+    # just start() and join(), with more records than fit in the ring buffer
+    # 
+    small_recorder = experiment_recorder.shared_memory_recorder(dict(index=int), capacity=16)
+    worker = Process(target=small_worker, args=(small_recorder,))
+    worker.start()
+    worker.join()
+    assert [ each["index"] for each in small_recorder.drain() ] == list(range(100))
+    
+    # 
+    # push
+    # 
+    text_recorder = RecordKeeper().shared_memory_recorder(dict(index=int, name="8s"))
+    data = dict(index=1)
+    text_recorder.push(data, name="émile")
+    assert data == dict(index=1) # (not changed)
+    try:
+        # (9 bytes of utf-8, cutting it off would split the last character)
+        text_recorder.push(index=2, name="éééé"+"é")
+        assert False
+    except Exception as error:
+        assert "utf-8" in str(error)
+    assert text_recorder.drain() == [ dict(index=1, name="émile") ]
+    
+    # 
+    # closing frees the shared memory
+    # 
+    name = text_recorder.memory.name
+    text_recorder.close()
+    try:
+        shared_memory.SharedMemory(name=name)
+        assert False
+    except FileNotFoundError:
+        pass
+    
+    # saving an experiment closes the shared memory of its record keepers (records that are still in it are kept)
+    shutil.rmtree("data.ignore/shared_memory.collection", ignore_errors=True)
+    collection = ExperimentCollection("data.ignore/shared_memory", quiet=True)
+    with collection.new_experiment() as experiment_recorder:
+        experiment_shared_recorder = experiment_recorder.shared_memory_recorder(dict(index=int), capacity=16)
+        worker = Process(target=small_worker, args=(experiment_shared_recorder,))
+        worker.start()
+        worker.join()
+    assert experiment_shared_recorder.closed
+    assert [ each["index"] for each in collection[-1] ] == list(range(100))
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+from rigorous_recorder import RecordKeeper, Recorder, ExperimentCollection, QuantileSketch, HistogramSketch, merge_sketches
+from random import random
+
+# 
+# keeper sketches (see every commit of the keeper and its sub-keepers)
+# 
+recorder = RecordKeeper().sketch("loss").sketch("latency", HistogramSketch(low=0, high=1, bins=10))
+model1_recorder = RecordKeeper(model="model1").set_parent(recorder).sketch("loss")
+model2_recorder = RecordKeeper(model="model2").set_parent(recorder)
+for each_index in range(50_000):
+    model1_recorder.push(index=each_index, loss=random(), latency=random())
+    model2_recorder.push(index=each_index, loss=random()+1)
+
+assert recorder.sketches["loss"].count == 100_000
+assert model1_recorder.sketches["loss"].count == 50_000
+assert abs(model1_recorder.sketches["loss"].quantile(0.5) - 0.5) < 0.05
+assert abs(recorder.sketches["loss"].quantile(0.5) - 1.0) < 0.05
+assert abs(recorder.sketches["latency"].quantile(0.99) - 0.99) < 0.05
+print(f'''recorder.sketches = {recorder.sketches}''')
+
+# merging
+merged = merge_sketches([ model1_recorder.sketches, model1_recorder.sketches ])
+assert merged["loss"].count == 100_000 and model1_recorder.sketches["loss"].count == 50_000
+
+# frame-based recorder
+frame_recorder = Recorder().sketch("x")
+for each_index in range(1_000):
+    frame_recorder.push(x=each_index)
+assert frame_recorder.sketches["x"].quantile(0.9) in range(880, 920)
+
+# 
+# collection sketches (one per experiment, saved with the collection)
+# 
+collection = ExperimentCollection("data.ignore/sketches", quiet=True).sketch("loss")
+for _ in range(2):
+    with collection.new_experiment() as experiment_recorder:
+        train_recorder = RecordKeeper(training=True).set_parent(experiment_recorder)
+        for each_index in range(1_000):
+            train_recorder.push(index=each_index, loss=random())
+
+reloaded = ExperimentCollection("data.ignore/sketches", quiet=True)
+assert len(reloaded.experiment_sketches) >= 2
+assert reloaded.sketches["loss"].count == 1_000 * len(reloaded.experiment_sketches)
+print(f'''reloaded.sketches = {reloaded.sketches}''')